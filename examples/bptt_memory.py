@@ -0,0 +1,68 @@
+"""Peak memory of BPTT with and without checkpointed simulations.
+
+Each configuration runs in a new process, which computes the BPTT policy loss and
+its gradient once. The peak resident set size (RSS) of the process is reported,
+as well as the increase with respect to the peak before the loss computation.
+"""
+import multiprocessing as mp
+import resource
+import time
+
+import torch
+
+from rllib.algorithms.bptt import BPTT
+from rllib.dataset.datatypes import Observation
+from rllib.model import NNModel
+from rllib.policy import NNPolicy
+from rllib.util.neural_networks.utilities import DisableGradient
+from rllib.value_function import NNQFunction
+
+DIM_STATE, DIM_ACTION = (16,), (4,)
+LAYERS = (256, 256)
+BATCH_SIZE, NUM_PARTICLES = 64, 16
+HORIZONS = (5, 10, 20, 40)
+CHECKPOINT_STEPS = (None, 5, 1)
+
+
+def peak_rss():
+    """Get the peak resident set size of the process, in MB (Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(horizon, checkpoint_steps):
+    """Compute the gradient of the BPTT policy loss and measure the peak memory."""
+    torch.manual_seed(0)
+    dynamical_model = NNModel(dim_state=DIM_STATE, dim_action=DIM_ACTION, layers=LAYERS)
+    reward_model = NNModel(
+        dim_state=DIM_STATE, dim_action=DIM_ACTION, model_kind="rewards", layers=LAYERS
+    )
+    algorithm = BPTT(
+        policy=NNPolicy(dim_state=DIM_STATE, dim_action=DIM_ACTION, layers=LAYERS),
+        critic=NNQFunction(dim_state=DIM_STATE, dim_action=DIM_ACTION, layers=LAYERS),
+        dynamical_model=dynamical_model,
+        reward_model=reward_model,
+        num_model_steps=horizon,
+        num_particles=NUM_PARTICLES,
+        gamma=0.99,
+        checkpoint_steps=checkpoint_steps,
+    )
+    observation = Observation(state=torch.randn(BATCH_SIZE, 1, *DIM_STATE))
+
+    initial_rss = peak_rss()
+    start = time.time()
+    with DisableGradient(dynamical_model, reward_model):
+        algorithm.actor_loss(observation).policy_loss.backward()
+    return peak_rss(), peak_rss() - initial_rss, time.time() - start
+
+
+if __name__ == "__main__":
+    context = mp.get_context("spawn")
+    print(f"{'horizon':>8} {'checkpoint':>10} {'peak MB':>9} {'delta MB':>9} {'s':>6}")
+    for horizon in HORIZONS:
+        for checkpoint_steps in CHECKPOINT_STEPS:
+            with context.Pool(1) as pool:
+                rss, delta, duration = pool.apply(run, (horizon, checkpoint_steps))
+            print(
+                f"{horizon:>8} {str(checkpoint_steps):>10} {rss:>9.0f} {delta:>9.0f} "
+                f"{duration:>6.2f}"
+            )
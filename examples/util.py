@@ -8,7 +8,7 @@ from gym.envs import registry
 from examples.experiment_parser import Experiment
 from rllib.environment import GymEnvironment
 from rllib.util.training.agent_training import evaluate_agent, train_agent
-from rllib.util.utilities import load_random_state, set_random_seed
+from rllib.util.utilities import set_random_seed
 
 try:
     from dm_control.suite import BENCHMARKING
@@ -99,13 +99,10 @@ def load_from_directory(agent, directory=None):
         latest_directory = latest_directory_list[-2]
         directory = os.path.join(path, latest_directory)
 
-    # Load agent.
-    agent.load(f"{directory}/last.pkl")
+    # Load agent and random state.
+    agent.load_checkpoint(directory)
     agent.logger.change_log_dir(f"runs/{directory}")
 
-    # Load random state.
-    load_random_state(directory)
-
 
 def train(agent, environment, args):
     """Train agent."""
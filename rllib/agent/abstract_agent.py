@@ -11,10 +11,15 @@ from tqdm import tqdm
 from rllib.dataset.datatypes import Loss
 from rllib.dataset.utilities import average_dataclass
 from rllib.policy.nn_policy import NNPolicy
+from rllib.util.checkpointer import Checkpointer
 from rllib.util.early_stopping import EarlyStopping
 from rllib.util.logger import Logger
 from rllib.util.neural_networks.utilities import DisableGradient
-from rllib.util.utilities import save_random_state, tensor_to_distribution
+from rllib.util.utilities import (
+    load_random_state,
+    save_random_state,
+    tensor_to_distribution,
+)
 from rllib.value_function import NNQFunction
 
 
@@ -29,6 +34,13 @@ class AbstractAgent(object, metaclass=ABCMeta):
         initial exploratory steps.
     exploration_episodes: int, optional (default=0)
         initial exploratory episodes
+    checkpoint_frequency: int, optional (default=1)
+        number of episodes between checkpoints, zero disables them.
+    checkpointer: Checkpointer, optional (default=None)
+        incremental checkpointer. By default, the whole agent is saved.
+    logger_class: type, optional (default=Logger)
+        class of the logger, e.g., `StreamingLogger' to stream the statistics to
+        append-only files instead of rewriting them at every checkpoint.
 
     Methods
     -------
@@ -64,11 +76,16 @@ class AbstractAgent(object, metaclass=ABCMeta):
         device="cpu",
         log_dir=None,
         name=None,
+        checkpoint_frequency=1,
+        checkpointer=None,
+        logger_class=Logger,
         *args,
         **kwargs,
     ):
         self._name = name
-        self.logger = Logger(
+        self.checkpoint_frequency = checkpoint_frequency
+        self.checkpointer = checkpointer
+        self.logger = logger_class(
             self.name if log_dir is None else log_dir,
             tensorboard=tensorboard,
             comment=comment,
@@ -115,7 +132,10 @@ class AbstractAgent(object, metaclass=ABCMeta):
 
     @classmethod
     def default(cls, environment, comment=None, gamma=0.99, *args, **kwargs):
-        """Get default agent for a given environment."""
+        """Get default agent for a given environment.
+
+        The keyword arguments, e.g., `logger_class', are passed to the agent.
+        """
         return cls(
             comment=environment.name if comment is None else comment,
             gamma=gamma,
@@ -149,23 +169,27 @@ class AbstractAgent(object, metaclass=ABCMeta):
         return str_
 
     def act(self, state):
-        """Ask the agent for an action to interact with the environment."""
+        """Ask the agent for an action to interact with the environment.
+
+        The state may also be a batch of states, e.g., of several environments.
+        """
+        if not isinstance(state, torch.Tensor):
+            state = torch.tensor(
+                state, dtype=torch.get_default_dtype(), device=self.device
+            )
         if self.total_steps < self.exploration_steps or (
             self.total_episodes < self.exploration_episodes
         ):
-            policy = self.policy.random()
+            batch_size = state.shape if self.policy.discrete_state else state.shape[:-1]
+            policy = self.policy.random(batch_size if len(batch_size) else None)
         else:
-            if not isinstance(state, torch.Tensor):
-                state = torch.tensor(
-                    state, dtype=torch.get_default_dtype(), device=self.device
-                )
             policy = self.policy(state)
 
         self.pi = tensor_to_distribution(policy, **self.policy.dist_params)
         if self.training:
             action = self.pi.sample()
         elif self.pi.has_enumerate_support:
-            action = torch.argmax(self.pi.probs)
+            action = torch.argmax(self.pi.probs, dim=-1)
         else:
             try:
                 action = self.pi.mean
@@ -236,13 +260,22 @@ class AbstractAgent(object, metaclass=ABCMeta):
 
         self.logger.end_episode(**end_episode_dict)
 
-        # save checkpoint at every episode.
-        self.save_checkpoint()
+        if (
+            self.checkpoint_frequency > 0
+            and self.total_episodes % self.checkpoint_frequency == 0
+        ):
+            self.save_checkpoint()
 
         if best_return >= max(
-            self.logger.get("train_return-0") + self.logger.get("eval_return-0")
-        ):  # logger.get() returns a list!
-            self.save("best.pkl")
+            self.logger.get_column("train_return-0").max,
+            self.logger.get_column("eval_return-0").max,
+        ):
+            if self.checkpointer is None:
+                self.save("best.pkl")
+            else:  # The best agent does not need the replay buffers.
+                self.checkpointer.save(
+                    self._get_state(), self.logger.log_dir, "best", save_replay=False
+                )
 
     def end_interaction(self):
         """End the interaction with the environment."""
@@ -345,10 +378,49 @@ class AbstractAgent(object, metaclass=ABCMeta):
         return self.__class__.__name__ if self._name is None else self._name
 
     def save_checkpoint(self):
-        """Save a checkpoint of the agent at the end of each episode."""
+        """Save a checkpoint of the agent at the end of each episode.
+
+        With a checkpointer, only the transitions appended to the replay buffers
+        since the last checkpoint are saved.
+        """
         self.logger.export_to_json()
-        self.save("last.pkl")
-        save_random_state(self.logger.log_dir)
+        if self.checkpointer is None:
+            self.save("last.pkl")
+            save_random_state(self.logger.log_dir)
+        else:
+            self.checkpointer.save(self._get_state(), self.logger.log_dir, "last")
+
+    def load_checkpoint(self, directory=None):
+        """Load the last checkpoint of the agent and the random state.
+
+        Parameters
+        ----------
+        directory: str, optional.
+            Directory of the checkpoint. By default use the log directory.
+        """
+        if directory is None:
+            directory = self.logger.log_dir
+        if self.checkpointer is None:
+            self.load(f"{directory}/last.pkl")
+            load_random_state(directory)
+        else:
+            data = self.checkpointer.load(self._get_state(), directory, "last")
+            self.__dict__.update(data)
+
+    def _get_state(self):
+        """Get the attributes of the agent that are saved."""
+        state = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, (Logger, Checkpointer)) or key == "pi":
+                continue
+            elif isinstance(value, AbstractAgent):
+                # abstract agents can't be pickled.
+                # if an agent has a sub-agent, then it should implement the saving.
+                # Most likely, the sub-agent will call the .save() function, thus
+                # only the log_dir has to be set properly.
+                continue
+            state[key] = value
+        return state
 
     def save(self, filename, directory=None):
         """Save agent.
@@ -370,17 +442,9 @@ class AbstractAgent(object, metaclass=ABCMeta):
         path = f"{directory}/{filename}"
 
         params = {}
-        for key, value in self.__dict__.items():
-            if isinstance(value, Logger) or key == "pi":
-                continue
-            elif isinstance(value, nn.Module) or isinstance(value, Optimizer):
+        for key, value in self._get_state().items():
+            if isinstance(value, nn.Module) or isinstance(value, Optimizer):
                 params[key] = value.state_dict()
-            elif isinstance(value, AbstractAgent):
-                # abstract agents can't be pickled.
-                # if an agent has a sub-agent, then it should implement the saving.
-                # Most likely, the sub-agent will call the .save() function, thus
-                # only the log_dir has to be set properly.
-                continue
             else:
                 params[key] = value
 
@@ -397,14 +461,8 @@ class AbstractAgent(object, metaclass=ABCMeta):
         """
         agent_dict = torch.load(path)
 
-        for key, value in self.__dict__.items():
-            if isinstance(value, Logger) or key == "pi":
-                continue
-            elif isinstance(value, AbstractAgent):
-                # abstract agents can't be saved as a dict.
-                # if an agent has a sub-agent, then it should implement the loading.
-                continue
-            elif isinstance(value, nn.Module) or isinstance(value, Optimizer):
+        for key, value in self._get_state().items():
+            if isinstance(value, nn.Module) or isinstance(value, Optimizer):
                 value.load_state_dict(agent_dict[key])
             else:
                 self.__dict__[key] = agent_dict[key]
@@ -10,6 +10,7 @@ from rllib.dataset.datatypes import Action, Loss, Observation, State
 from rllib.environment import AbstractEnvironment
 from rllib.policy import AbstractPolicy
 from rllib.value_function.abstract_value_function import AbstractQFunction
+from rllib.util.checkpointer import Checkpointer
 from rllib.util.early_stopping import EarlyStopping
 from rllib.util.logger import Logger
 from rllib.util.parameter_decay import ParameterDecay
@@ -36,6 +37,8 @@ class AbstractAgent(object, metaclass=ABCMeta):
     target_update_frequency: int
     clip_gradient_val: float
     device: str
+    checkpoint_frequency: int
+    checkpointer: Optional[Checkpointer]
 
     training: bool
     _training_verbose: bool
@@ -62,6 +65,9 @@ class AbstractAgent(object, metaclass=ABCMeta):
         device: str = ...,
         log_dir: Optional[str] = ...,
         name: Optional[str] = ...,
+        checkpoint_frequency: int = ...,
+        checkpointer: Optional[Checkpointer] = ...,
+        logger_class: Type[Logger] = ...,
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
@@ -98,6 +104,8 @@ class AbstractAgent(object, metaclass=ABCMeta):
     @property
     def name(self) -> str: ...
     def save_checkpoint(self) -> None: ...
+    def load_checkpoint(self, directory: Optional[str] = ...) -> None: ...
+    def _get_state(self) -> Dict[str, Any]: ...
     def save(self, filename: str, directory: Optional[str] = ...) -> str: ...
     def load(self, path: str) -> None: ...
     @staticmethod
@@ -12,6 +12,7 @@ import torch
 from torch.optim import Adam
 
 from rllib.agent.abstract_agent import AbstractAgent
+from rllib.algorithms.abstract_mb_algorithm import AbstractMBAlgorithm
 from rllib.algorithms.model_learning_algorithm import ModelLearningAlgorithm
 from rllib.dataset.experience_replay import ExperienceReplay, StateExperienceReplay
 from rllib.environment.fake_environment import FakeEnvironment
@@ -138,7 +139,7 @@ class ModelBasedAgent(AbstractAgent):
         if self.training:
             self.memory.append(observation)
         if self.learn_model_at_observe:
-            self.model_learning_algorithm.learn(self.logger)
+            self.learn_model()
         if (
             self.train_at_observe
             and len(self.memory) > self.batch_size
@@ -165,17 +166,21 @@ class ModelBasedAgent(AbstractAgent):
         if self.model_learning_algorithm is not None and self.training:
             self.model_learning_algorithm.add_last_trajectory(self.last_trajectory)
         if self.pretrain_model:
-            self.model_learning_algorithm.learn(
-                self.logger, max_iter=self.pre_train_iterations
-            )
+            self.learn_model(max_iter=self.pre_train_iterations)
         if self.learn_model_at_end_episode:
-            self.model_learning_algorithm.learn(self.logger)
+            self.learn_model()
         if self.train_at_end_episode:
             self.learn()
         if self.simulate:
             self.simulate_policy_on_model()
         super().end_episode()
 
+    def learn_model(self, max_iter=None):
+        """Learn the models, and refresh the cache of simulations of the algorithm."""
+        self.model_learning_algorithm.learn(self.logger, max_iter=max_iter)
+        if isinstance(self.algorithm, AbstractMBAlgorithm):
+            self.algorithm.refresh_simulation_cache(self.memory)
+
     def learn(self, memory=None):
         """Learn a policy with the model."""
         #
@@ -57,6 +57,7 @@ class ModelBasedAgent(AbstractAgent):
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
+    def learn_model(self, max_iter: Optional[int] = ...) -> None: ...
     @property
     def learn_model_at_observe(self) -> bool: ...
     @property
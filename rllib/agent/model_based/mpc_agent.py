@@ -9,8 +9,12 @@ from .model_based_agent import ModelBasedAgent
 class MPCAgent(ModelBasedAgent):
     """Implementation of an agent that runs an MPC policy."""
 
-    def __init__(self, mpc_solver, solver_frequency=1, *args, **kwargs):
-        policy = MPCPolicy(mpc_solver, solver_frequency=solver_frequency)
+    def __init__(
+        self, mpc_solver, solver_frequency=1, time_budget=None, *args, **kwargs
+    ):
+        policy = MPCPolicy(
+            mpc_solver, solver_frequency=solver_frequency, time_budget=time_budget
+        )
         super().__init__(
             policy=policy,
             simulation_frequency=0,
@@ -24,6 +28,13 @@ class MPCAgent(ModelBasedAgent):
             **kwargs,
         )
 
+    def act(self, state):
+        """See `AbstractAgent.act'. It also logs the statistics of the solver."""
+        action = super().act(state)
+        self.logger.update(**self.policy.solver.info())
+        self.policy.solver.reset_info()
+        return action
+
     @classmethod
     def default(
         cls,
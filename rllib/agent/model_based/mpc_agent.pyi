@@ -1,10 +1,19 @@
-from typing import Any
+from typing import Any, Optional
 
 from rllib.algorithms.mpc.abstract_solver import MPCSolver
+from rllib.dataset.datatypes import Action, State
 
 from .model_based_agent import ModelBasedAgent
 
 class MPCAgent(ModelBasedAgent):
     """Implementation of an agent that runs an MPC policy."""
 
-    def __init__(self, mpc_solver: MPCSolver, *args: Any, **kwargs: Any) -> None: ...
+    def __init__(
+        self,
+        mpc_solver: MPCSolver,
+        solver_frequency: int = ...,
+        time_budget: Optional[float] = ...,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None: ...
+    def act(self, state: State) -> Action: ...
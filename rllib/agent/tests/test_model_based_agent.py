@@ -6,6 +6,7 @@ import torch
 
 from rllib.agent import BPTTAgent, DynaAgent, MPCAgent, MVEAgent, STEVEAgent, SVGAgent
 from rllib.algorithms.mpc import CEMShooting, MPPIShooting, RandomShooting
+from rllib.dataset.datatypes import Observation
 from rllib.environment import GymEnvironment
 from rllib.model.environment_model import EnvironmentModel
 from rllib.util.training.agent_training import evaluate_agent, train_agent
@@ -97,6 +98,87 @@ class TestDerivedMBAgents(object):
         )
         rollout_agent(environment, agent)
 
+    @pytest.mark.parametrize("extender", [DynaAgent, MVEAgent])
+    def test_simulation_cache(self, environment, base_agent, extender):
+        agent = extender.default(
+            environment,
+            base_agent_name=base_agent,
+            num_model_steps=4,
+            num_particles=2,
+            num_iter=2,
+            num_epochs=2,
+            td_k=True,
+            sim_cache_size=64,
+            sim_refresh_ratio=0.5,
+            exploration_steps=0,
+            exploration_episodes=0,
+            simulation_max_steps=10,
+        )
+        rollout_agent(environment, agent)
+        assert agent.algorithm.simulation_algorithm.cache.is_full
+
+
+class TestSimulationCache(object):
+    @pytest.fixture(params=["Pendulum-v1"], scope="class")
+    def environment(self, request):
+        return GymEnvironment(request.param, SEED)
+
+    @pytest.fixture(params=[DynaAgent, MVEAgent])
+    def agent(self, environment, request):
+        torch.manual_seed(SEED)
+        agent = request.param.default(
+            environment,
+            base_agent_name="SAC",
+            num_model_steps=4,
+            num_particles=2,
+            td_k=True,
+            sim_cache_size=16,
+            sim_refresh_ratio=0.5,
+            exploration_steps=0,
+            exploration_episodes=0,
+        )
+        for _ in range(20):
+            agent.memory.append(
+                Observation.random_example(
+                    dim_state=environment.dim_state, dim_action=environment.dim_action
+                )
+            )
+        yield agent
+        agent.logger.delete_directory()  # Cleanup directory.
+
+    def test_sample_from_cache(self, agent, monkeypatch):
+        algorithm = agent.algorithm
+        cache = algorithm.simulation_algorithm.cache
+        observation = agent.memory.sample_batch(5)[0]
+        state = observation.state[..., 0, :]
+        # Without rollouts in the cache, they are simulated from the states.
+        assert algorithm.get_simulated_observation(state).state.shape == (10, 4, 3)
+        algorithm.refresh_simulation_cache(agent.memory)
+
+        def simulate(*args, **kwargs):
+            raise AssertionError("The rollouts must be sampled from the cache.")
+
+        monkeypatch.setattr(algorithm.simulation_algorithm, "simulate", simulate)
+        sim_observation = algorithm.get_simulated_observation(state)
+        assert sim_observation.state.shape == (10, 4, 3)
+        cached_states = cache[torch.arange(len(cache))].state
+        is_cached = (sim_observation.state.unsqueeze(1) == cached_states).all(-1)
+        assert torch.all(is_cached.all(-1).any(-1))
+
+        if isinstance(agent, MVEAgent):  # The td_k targets also use the cache.
+            algorithm.model_augmented_critic_loss(observation)
+
+    def test_refresh(self, agent):
+        algorithm = agent.algorithm
+        cache = algorithm.simulation_algorithm.cache
+        algorithm.refresh_simulation_cache(agent.memory)
+        assert cache.is_full
+
+        states = cache[torch.arange(16)].state.clone()
+        algorithm.refresh_simulation_cache(agent.memory)
+        refreshed = (cache[torch.arange(16)].state != states).flatten(1).any(-1)
+        assert refreshed.sum() == cache.refresh_ratio * cache.max_len
+
 
 class TestMPCAgent(object):
     ENVIRONMENT = "VContinuous-CartPole-v0"
@@ -211,3 +293,14 @@ class TestMPCAgent(object):
         self.init()
         mpc_solver = self.get_solver(solver, True, 1, default_action)
         self.run_agent(mpc_solver)
+
+    def test_mpc_num_cpu(self, solver):
+        self.init()
+        mpc_solver = self.get_solver(solver, True, 2, "mean")
+        self.run_agent(mpc_solver)
+
+    def test_mpc_time_budget(self, solver):
+        self.init()
+        mpc_solver = self.get_solver(solver, True, 1, "mean")
+        mpc_solver.time_budget = 0.05
+        self.run_agent(mpc_solver)
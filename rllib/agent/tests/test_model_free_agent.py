@@ -1,3 +1,5 @@
+import json
+
 import numpy as np
 import pytest
 import torch
@@ -28,6 +30,7 @@ from rllib.agent import (
     VMPOAgent,
 )
 from rllib.environment import GymEnvironment
+from rllib.util.logger import StreamingLogger
 from rllib.util.training.agent_training import evaluate_agent, train_agent
 
 MAX_STEPS = 25
@@ -120,3 +123,27 @@ def test_discrete_agent(discrete_environment, discrete_agent):
 
 def test_continuous_agent(continuous_environment, continuous_agent):
     rollout_agent(continuous_environment, continuous_agent)
+
+
+def test_streaming_logger():
+    torch.manual_seed(SEED)
+    np.random.seed(SEED)
+
+    environment = GymEnvironment("CartPole-v0", SEED)
+    agent = DQNAgent.default(environment, logger_class=StreamingLogger)
+    assert isinstance(agent.logger, StreamingLogger)
+    train_agent(
+        agent,
+        environment,
+        num_episodes=NUM_EPISODES,
+        max_steps=MAX_STEPS,
+        plot_flag=False,
+    )
+    agent.logger.flush(wait=True)
+
+    assert len(agent.logger) == agent.total_episodes == NUM_EPISODES
+    with open(f"{agent.logger.log_dir}/statistics.jsonl", "r") as f:
+        statistics = [json.loads(line) for line in f]
+    assert statistics == list(agent.logger.statistics)
+    assert len(agent.logger.get("train_return-0")) == NUM_EPISODES
+    agent.logger.delete_directory()  # Cleanup directory.
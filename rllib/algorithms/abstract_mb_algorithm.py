@@ -1,6 +1,9 @@
 """ModelBasedAlgorithm."""
 from abc import ABCMeta
 
+import torch
+
+from rllib.dataset.experience_replay import SimulatedExperienceReplay
 from rllib.model import TransformedModel
 
 from .abstract_algorithm import AbstractAlgorithm
@@ -25,11 +28,17 @@ class AbstractMBAlgorithm(AbstractAlgorithm, metaclass=ABCMeta):
         Number of parallel samples to simulate.
     termination: Termination, optional.
         Termination condition to evaluate while simulating.
+    sim_cache_size: int, optional.
+        Number of simulated rollouts to cache. If zero, there is no cache.
+    sim_refresh_ratio: float, optional.
+        Fraction of the cached rollouts that are simulated again at each refresh.
 
     Methods
     -------
     simulate(self, state: State, policy: AbstractPolicy) -> Trajectory:
         Simulate a set of particles starting from `state' and following `policy'.
+    refresh_simulation_cache(self, memory: ExperienceReplay) -> None:
+        Simulate new rollouts into the cache, from the states of `memory'.
     """
 
     def __init__(
@@ -40,6 +49,8 @@ class AbstractMBAlgorithm(AbstractAlgorithm, metaclass=ABCMeta):
         num_particles=1,
         termination_model=None,
         log_simulation=False,
+        sim_cache_size=0,
+        sim_refresh_ratio=1.0,
         *args,
         **kwargs,
     ):
@@ -61,10 +72,26 @@ class AbstractMBAlgorithm(AbstractAlgorithm, metaclass=ABCMeta):
         self.num_model_steps = num_model_steps
         self.num_particles = num_particles
 
+        cache = None
+        if sim_cache_size > 0:
+            cache = SimulatedExperienceReplay(sim_cache_size, sim_refresh_ratio)
         self.simulation_algorithm = SimulationAlgorithm(
             dynamical_model=dynamical_model,
             reward_model=reward_model,
             termination_model=termination_model,
             num_particles=num_particles,
             num_model_steps=num_model_steps,
+            cache=cache,
         )
+
+    def refresh_simulation_cache(self, memory):
+        """Simulate new rollouts into the cache, from the states of `memory'.
+
+        It should be called each time that the models are learned, so that the
+        algorithms sample rollouts of the current model from the cache. It does
+        nothing if there is no cache or `memory' is empty.
+        """
+        if self.simulation_algorithm.cache is None or len(memory) == 0:
+            return
+        with torch.no_grad():
+            self.simulation_algorithm.refresh_cache(memory, self.policy)
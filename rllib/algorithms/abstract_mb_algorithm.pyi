@@ -1,6 +1,7 @@
 from abc import ABCMeta
 from typing import Any, Optional
 
+from rllib.dataset.experience_replay import ExperienceReplay
 from rllib.model import AbstractModel
 
 from .abstract_algorithm import AbstractAlgorithm
@@ -23,6 +24,9 @@ class AbstractMBAlgorithm(AbstractAlgorithm, metaclass=ABCMeta):
         num_particles: int = ...,
         termination_model: Optional[AbstractModel] = ...,
         log_simulation: bool = ...,
+        sim_cache_size: int = ...,
+        sim_refresh_ratio: float = ...,
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
+    def refresh_simulation_cache(self, memory: ExperienceReplay) -> None: ...
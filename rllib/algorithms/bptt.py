@@ -8,6 +8,12 @@ from .abstract_mb_algorithm import AbstractMBAlgorithm
 class BPTT(AbstractMBAlgorithm):
     """Back-Propagation Through Time Algorithm.
 
+    Parameters
+    ----------
+    checkpoint_steps: int, optional.
+        Number of steps of the checkpointed segments of the simulations of the
+        policy loss, see `rollout_model'.
+
     References
     ----------
     Deisenroth, M., & Rasmussen, C. E. (2011).
@@ -18,7 +24,7 @@ class BPTT(AbstractMBAlgorithm):
     Model-Augmented Actor-Critic: Backpropagating through Paths. ICLR.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, checkpoint_steps=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         if self.num_model_steps > 0:
@@ -34,6 +40,7 @@ class BPTT(AbstractMBAlgorithm):
                 td_lambda=self.td_lambda,
                 reward_transformer=self.reward_transformer,
                 entropy_regularization=self.entropy_loss.eta.item(),
+                checkpoint_steps=checkpoint_steps,
             )
 
     def actor_loss(self, observation):
@@ -1,3 +1,5 @@
+from typing import Any, Optional
+
 from rllib.value_function import AbstractValueFunction
 
 from .abstract_algorithm import AbstractAlgorithm
@@ -6,3 +8,6 @@ from .abstract_mb_algorithm import AbstractMBAlgorithm
 class BPTT(AbstractMBAlgorithm):
     critic: AbstractValueFunction
     critic_target: AbstractValueFunction
+    def __init__(
+        self, *args: Any, checkpoint_steps: Optional[int] = ..., **kwargs: Any
+    ) -> None: ...
@@ -1,13 +1,16 @@
 """ModelBasedAlgorithm."""
 import torch
 
-from rllib.dataset.utilities import stack_list_of_tuples
-
 from .abstract_mb_algorithm import AbstractMBAlgorithm
 
 
 class Dyna(AbstractMBAlgorithm):
-    """Dyna Algorithm."""
+    """Dyna Algorithm.
+
+    The base algorithm is called with the real transitions and with rollouts of the
+    model that start from the real states. If the algorithm has a simulation cache,
+    see `AbstractMBAlgorithm', the rollouts are sampled from the cache instead.
+    """
 
     def __init__(
         self, base_algorithm, only_sim=False, only_real=False, *args, **kwargs
@@ -30,8 +33,7 @@ class Dyna(AbstractMBAlgorithm):
 
         with torch.no_grad():
             state = observation.state[..., 0, :]
-            sim_trajectory = self.simulation_algorithm.simulate(state, self.policy)
-            sim_observation = stack_list_of_tuples(sim_trajectory, dim=-2)
+            sim_observation = self.get_simulated_observation(state)
 
         sim_loss = self.base_algorithm(sim_observation)
         if self.only_sim:
@@ -39,6 +41,21 @@ class Dyna(AbstractMBAlgorithm):
 
         return real_loss.reduce("mean") + sim_loss.reduce("mean")
 
+    def get_simulated_observation(self, state, initial_action=None):
+        """Get the stacked rollouts of the model from the batch of `state'.
+
+        If the simulation cache has rollouts, it samples as many rollouts as it
+        would simulate from it. These start from other states and policy actions.
+        Otherwise, it simulates them from `state' and `initial_action'.
+        """
+        cache = self.simulation_algorithm.cache
+        if cache is None or len(cache) == 0:
+            return self.simulation_algorithm.simulate(
+                state, self.policy, initial_action=initial_action, stack_obs=True
+            )
+        num_rollouts = state.shape[:-1].numel() * max(self.num_particles, 1)
+        return cache.sample_batch(num_rollouts)[0]
+
     def update(self):
         """Update base algorithm."""
         super().update()
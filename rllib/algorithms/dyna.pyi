@@ -1,5 +1,7 @@
 from typing import Any, List, Optional, Union
 
+from torch import Tensor
+
 from rllib.dataset.datatypes import Loss, Observation
 from rllib.model import AbstractModel
 
@@ -26,3 +28,6 @@ class Dyna(AbstractMBAlgorithm):
     def forward(
         self, observation: Union[Observation, List[Observation]], **kwargs: Any
     ) -> Loss: ...
+    def get_simulated_observation(
+        self, state: Tensor, initial_action: Optional[Tensor] = ...
+    ) -> Observation: ...
@@ -2,7 +2,6 @@
 
 import torch
 
-from rllib.dataset.utilities import stack_list_of_tuples
 from rllib.util.value_estimation import mc_return
 
 from .mpo import MPO
@@ -36,8 +35,9 @@ class MBMPO(MPO):
         """Compute mpo loss for a given set of state/action pairs."""
         model_free_loss = super().compute_mpo_loss(state, action)
         with torch.no_grad():
-            sim_trajectory = self.simulator.simulate(state, self.old_policy, action)
-            sim_observation = stack_list_of_tuples(sim_trajectory, dim=-2)
+            sim_observation = self.simulator.simulate(
+                state, self.old_policy, action, stack_obs=True
+            )
             q_values = mc_return(
                 sim_observation,
                 gamma=self.gamma,
@@ -4,9 +4,7 @@ import math
 import numpy as np
 import torch
 
-from rllib.model.utilities import PredictionStrategy
 from rllib.util.early_stopping import EarlyStopping
-from rllib.util.multiprocessing import run_parallel_returns
 
 from .abstract_mb_algorithm import AbstractMBAlgorithm
 
@@ -70,25 +68,22 @@ class ModelEnsembleEarlyStopping(AbstractMBAlgorithm, EarlyStopping):
         for es_algorithm in self.model_ensemble_early_stopping:
             es_algorithm.reset(hard=hard)
 
-    def _evaluate_model(self, i, state):
-        self.dynamical_model.set_head(i)
-        self.reward_model.set_head(i)
-        observation = self.simulate(state, self.policy, stack_obs=True)
-        return observation.reward.sum(-1).mean()
-
     def update(self, state):
-        """Update estimation."""
+        """Update estimation.
+
+        All the heads of the model are simulated in a single batched rollout.
+        """
         if self.eval_frequency > 0 and (self.step_counts + 1) % self.eval_frequency > 0:
             self.step_counts += 1
             return
 
         self.step_counts = 0
-        with torch.no_grad(), PredictionStrategy(
-            self.dynamical_model, self.reward_model, prediction_strategy="set_head"
-        ):
-            estimated_returns = run_parallel_returns(
-                self._evaluate_model, [(i, state) for i in range(self.num_models)]
+        with torch.no_grad():
+            observation = self.simulation_algorithm.simulate(
+                state, self.policy, stack_obs=True, multi_head=True
             )
+        estimated_returns = observation.reward.sum(-1)
+        estimated_returns = estimated_returns.reshape(self.num_models, -1).mean(-1)
 
         for i in range(self.num_models):
             self.model_ensemble_early_stopping[i].update(estimated_returns[i])
@@ -2,5 +2,6 @@
 from .abstract_solver import MPCSolver
 from .cem_shooting import CEMShooting
 from .gradient_based_solver import GradientBasedSolver
+from .ilqr_solver import ILQRSolver
 from .mppi_shooting import MPPIShooting
 from .random_shooting import RandomShooting
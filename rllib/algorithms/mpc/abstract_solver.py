@@ -1,15 +1,15 @@
 """MPC Algorithms."""
+import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import torch
 import torch.nn as nn
 
-from rllib.dataset.utilities import stack_list_of_tuples
 from rllib.util.multi_objective_reduction import MeanMultiObjectiveReduction
 from rllib.util.neural_networks.utilities import repeat_along_dimension, to_torch
-from rllib.util.rollout import rollout_actions
-from rllib.util.value_estimation import discount_sum
+from rllib.util.rollout import rollout_returns
 
 
 class MPCSolver(nn.Module, metaclass=ABCMeta):
@@ -19,6 +19,11 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
 
     When called, it will return the sequence of actions that solves the problem.
 
+    The solver also plans for a batch of initial states with shape [B x dim_state].
+    The B problems are solved jointly: the particles of all of them are evaluated in
+    a single rollout with states of shape [B x num_particles x dim_state], while the
+    mean, covariance, and warm start of the action distribution are kept per problem.
+
     Parameters
     ----------
     dynamical_model: state transition model.
@@ -41,7 +46,14 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
     default_action: str, optional.
          Default action behavior.
     num_cpu: int, optional.
-        Number of CPUs to run the solver.
+        Number of threads that evaluate shards of the particles concurrently. The
+        torch intra-op threads are divided among them, see `evaluate_in_parallel'.
+    compact_particles: bool, optional.
+        Drop the terminated particles from the rollouts, see `step_model_compact'.
+    time_budget: float, optional.
+        Wall-clock seconds per call. If given, the solver runs as many iterations as
+        fit in the budget, instead of `num_iter', and returns the best action
+        sequence found so far.
     """
 
     def __init__(
@@ -61,6 +73,8 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
         action_scale=1.0,
         num_cpu=1,
         multi_objective_reduction=MeanMultiObjectiveReduction(dim=-1),
+        compact_particles=False,
+        time_budget=None,
         *args,
         **kwargs,
     ):
@@ -101,28 +115,143 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
         self.action_scale = action_scale
         self.clamp = clamp
         self.num_cpu = num_cpu
+        self._executor = None
         self.multi_objective_reduction = multi_objective_reduction
+        self.compact_particles = compact_particles
+        self.time_budget = time_budget
+        self._info = {}
+
+    def iterations(self):
+        """Yield the indexes of the iterations of a call to the solver.
+
+        Without a `time_budget', it yields `num_iter' iterations. Otherwise, it yields
+        iterations while the next one is expected to finish before the deadline, at
+        least one. The number of iterations and the time spent are logged, also when
+        the generator is closed before, e.g., if the solver stops early.
+        """
+        start = time.perf_counter()
+        num_iter = 0
+        try:
+            while True:
+                yield num_iter
+                num_iter += 1
+                elapsed = time.perf_counter() - start
+                if self.time_budget is None and num_iter >= self.num_iter:
+                    break
+                elif self.time_budget is not None:
+                    if elapsed * (num_iter + 1) / num_iter > self.time_budget:
+                        break
+        finally:
+            self._info.update(
+                mpc_iterations=num_iter, mpc_time=time.perf_counter() - start
+            )
+
+    def record_score(self, score):
+        """Record the mean score of an iteration, to log the improvement of the return.
+
+        The score is kept as a tensor, so that the iterations do not synchronize.
+        """
+        self._info.setdefault("scores", []).append(score.detach().mean())
+
+    def update_best(self, action_sequence, score, best=None):
+        """Update the best action sequence of each problem in the batch.
+
+        Parameters
+        ----------
+        action_sequence: Tensor
+            Action sequence with dimensions [horizon x batch_shape x dim action].
+        score: Tensor
+            Score of the action sequence with dimensions [batch_shape].
+        best: Tuple[Tensor, Tensor], optional.
+            Best action sequence and score so far.
+        """
+        self.record_score(score)
+        if best is None:
+            return action_sequence.detach().clone(), score
+        best_sequence, best_score = best
+        improved = (score > best_score).unsqueeze(-1)
+        best_sequence = torch.where(improved, action_sequence.detach(), best_sequence)
+        return best_sequence, torch.max(score, best_score)
+
+    def info(self):
+        """Get the statistics of the last call to the solver."""
+        info = {k: v for k, v in self._info.items() if k != "scores"}
+        scores = self._info.get("scores", [])
+        if len(scores) > 1:
+            info["mpc_return_improvement"] = (scores[-1] - scores[0]).item() / (
+                len(scores) - 1
+            )
+        return info
+
+    def reset_info(self):
+        """Reset the statistics of the solver."""
+        self._info = {}
+
+    def __getstate__(self):
+        """Get the state without the thread pool, which can not be copied."""
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    @property
+    def executor(self):
+        """Get the persistent pool of `num_cpu' threads, created at the first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_cpu)
+        return self._executor
+
+    def evaluate_in_parallel(self, function, *tensors, dim=-2):
+        """Evaluate `function' on shards of the particles of `tensors' concurrently.
+
+        The particles along dimension `dim' are split in `num_cpu' shards that are
+        evaluated by the persistent thread pool, which run in parallel as torch
+        releases the GIL. The outputs, or each output if `function' returns a tuple,
+        are concatenated along `dim'.
+
+        Each shard also runs torch intra-op parallel kernels, so while the shards are
+        evaluated the intra-op threads of the process are divided among them, to
+        avoid running `num_cpu' times more threads than cores.
+        """
+        if self.num_cpu <= 1:
+            return function(*tensors)
+        shards = zip(*[tensor.chunk(self.num_cpu, dim=dim) for tensor in tensors])
+        grad_enabled = torch.is_grad_enabled()  # The grad mode is thread local.
+
+        def evaluate_shard(shard):
+            with torch.set_grad_enabled(grad_enabled):
+                return function(*shard)
+
+        num_threads = torch.get_num_threads()
+        torch.set_num_threads(max(1, num_threads // self.num_cpu))
+        try:
+            outputs = list(self.executor.map(evaluate_shard, shards))
+        finally:
+            torch.set_num_threads(num_threads)
+        if isinstance(outputs[0], tuple):
+            return tuple(torch.cat(output, dim=dim) for output in zip(*outputs))
+        return torch.cat(outputs, dim=dim)
 
     def evaluate_action_sequence(self, action_sequence, state):
-        """Evaluate action sequence by performing a rollout."""
-        trajectory = stack_list_of_tuples(
-            rollout_actions(
+        """Evaluate action sequence by performing a rollout.
+
+        Only the discounted returns are accumulated, the trajectory is not stored.
+        The particles are evaluated in `num_cpu' parallel shards.
+        """
+        return self.evaluate_in_parallel(
+            lambda action_sequence_, state_: rollout_returns(
                 self.dynamical_model,
                 self.reward_model,
-                self.action_scale * action_sequence,  # scale actions.
-                state,
-                self.termination_model,
+                state_,
+                action_sequence=self.action_scale * action_sequence_,  # scale.
+                termination_model=self.termination_model,
+                gamma=self.gamma,
+                terminal_reward=self.terminal_reward,
+                compact=self.compact_particles,
             ),
-            dim=-2,
+            action_sequence,
+            state,
         )
 
-        returns = discount_sum(trajectory.reward, self.gamma)
-
-        if self.terminal_reward:
-            terminal_reward = self.terminal_reward(trajectory.next_state[..., -1, :])
-            returns = returns + self.gamma ** self.num_model_steps * terminal_reward
-        return returns
-
     @abstractmethod
     def get_candidate_action_sequence(self):
         """Get candidate actions."""
@@ -133,14 +262,36 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
         """Get best action."""
         raise NotImplementedError
 
+    def get_best_candidate(self, action_sequence, returns):
+        """Get the evaluated candidate with the highest return of each problem.
+
+        Returns
+        -------
+        best_sequence: Tensor
+            Action sequence with dimensions [horizon x batch_shape x dim action].
+        score: Tensor
+            Return of the action sequence with dimensions [batch_shape].
+        """
+        score, idx = self.multi_objective_reduction(returns).max(dim=-1)
+        idx = idx.unsqueeze(0).unsqueeze(-1).unsqueeze(-1)
+        idx = idx.expand(self.num_model_steps, *score.shape, 1, self.dim_action)
+        return torch.gather(action_sequence, -2, idx).squeeze(-2), score
+
     @abstractmethod
     def update_sequence_generation(self, elite_actions):
         """Update sequence generation."""
         raise NotImplementedError
 
     def initialize_actions(self, batch_shape):
-        """Initialize mean and covariance of action distribution."""
-        if self.warm_start and self.mean is not None:
+        """Initialize mean and covariance of action distribution.
+
+        The warm start is only used if the batch shape of the problems is unchanged.
+        """
+        if (
+            self.warm_start
+            and self.mean is not None
+            and self.mean.shape[1:-1] == batch_shape
+        ):
             next_mean = self.mean[1:, ..., :]
             if self.default_action == "zero":
                 final_action = torch.zeros_like(self.mean[:1, ..., :])
@@ -164,11 +315,21 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
         self.initialize_actions(batch_shape)
         state = repeat_along_dimension(state, number=self.num_particles, dim=-2)
 
-        for _ in range(self.num_iter):
+        self.reset_info()
+        best = None
+        for _ in self.iterations():
             action_sequence = self.get_candidate_action_sequence()
             returns = self.evaluate_action_sequence(action_sequence, state)
             elite_actions = self.get_best_action(action_sequence, returns)
             self.update_sequence_generation(elite_actions)
+            if self.time_budget is None:
+                self.record_score(self.multi_objective_reduction(returns).max(-1)[0])
+            else:
+                best = self.update_best(
+                    *self.get_best_candidate(action_sequence, returns), best
+                )
+        if self.time_budget is not None:
+            self.mean = best[0]
 
         if self.clamp:
             return self.mean.clamp(-1.0, 1.0)
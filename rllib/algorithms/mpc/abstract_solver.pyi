@@ -1,5 +1,6 @@
 from abc import ABCMeta, abstractmethod
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 import torch
 import torch.nn as nn
@@ -27,6 +28,10 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
     _scale: float
     covariance: Tensor
     multi_objective_reduction: AbstractMultiObjectiveReduction
+    compact_particles: bool
+    _executor: Optional[ThreadPoolExecutor]
+    time_budget: Optional[float]
+    _info: Dict[str, Any]
     def __init__(
         self,
         dynamical_model: AbstractModel,
@@ -44,9 +49,27 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
         clamp: bool = ...,
         num_cpu: int = ...,
         multi_objective_reduction: AbstractMultiObjectiveReduction = ...,
+        compact_particles: bool = ...,
+        time_budget: Optional[float] = ...,
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
+    def iterations(self) -> Iterator[int]: ...
+    def record_score(self, score: Tensor) -> None: ...
+    def update_best(
+        self,
+        action_sequence: Tensor,
+        score: Tensor,
+        best: Optional[Tuple[Tensor, Tensor]] = ...,
+    ) -> Tuple[Tensor, Tensor]: ...
+    def info(self) -> Dict[str, float]: ...
+    def reset_info(self) -> None: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    @property
+    def executor(self) -> ThreadPoolExecutor: ...
+    def evaluate_in_parallel(
+        self, function: Callable[..., Tensor], *tensors: Tensor, dim: int = ...
+    ) -> Tensor: ...
     def evaluate_action_sequence(
         self, action_sequence: Tensor, state: Tensor
     ) -> Tensor: ...
@@ -54,6 +77,9 @@ class MPCSolver(nn.Module, metaclass=ABCMeta):
     def get_candidate_action_sequence(self) -> Tensor: ...
     @abstractmethod
     def get_best_action(self, action_sequence: Tensor, returns: Tensor) -> Tensor: ...
+    def get_best_candidate(
+        self, action_sequence: Tensor, returns: Tensor
+    ) -> Tuple[Tensor, Tensor]: ...
     @abstractmethod
     def update_sequence_generation(self, elite_actions: Tensor) -> None: ...
     def initialize_actions(self, batch_shape: torch.Size) -> None: ...
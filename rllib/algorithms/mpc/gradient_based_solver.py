@@ -38,18 +38,31 @@ class GradientBasedSolver(MPCSolver):
         actions = self.get_candidate_action_sequence()
         optimizer = Adam([actions], lr=self.lr)
 
-        for i in range(self.num_iter):
+        self.reset_info()
+        best = None
+        for _ in self.iterations():
             optimizer.zero_grad()
             with DisableGradient(self.dynamical_model, self.reward_model):
                 trajectory = rollout_actions(
-                    self.dynamical_model, self.reward_model, actions, state
+                    self.dynamical_model,
+                    self.reward_model,
+                    actions,
+                    state,
+                    self.termination_model,
+                    compact=self.compact_particles,
                 )
 
             returns = discount_sum(
                 stack_list_of_tuples(trajectory, dim=-2).reward, gamma=self.gamma
             )
+            best = self.update_best(
+                actions, self.multi_objective_reduction(returns.detach()), best
+            )
             (-returns).sum().backward()
             optimizer.step()
 
+        if self.time_budget is not None:
+            self.mean = best[0]
+            return self.mean
         self.mean = actions.detach().clone()
         return actions
@@ -0,0 +1,265 @@
+"""Iterative LQR solver of the MPC problem."""
+import torch
+
+from .abstract_solver import MPCSolver
+
+
+class ILQRSolver(MPCSolver):
+    r"""Solve the MPC problem with iterative LQR (iLQR).
+
+    Each iteration linearizes the dynamics and quadratizes the rewards around the
+    nominal trajectory, with autograd derivatives that are batched over the horizon
+    and the problems. A backward Riccati pass computes the feedback gains
+    .. math:: u_t = \bar{u}_t + \alpha k_t + K_t (x_t - \bar{x}_t),
+    and a forward pass evaluates all the step sizes `alphas' jointly, keeping for
+    each problem the one with the highest return. As alpha=0 recovers the nominal
+    trajectory, the return never decreases.
+
+    The planning uses the mean of the dynamical and reward models and ignores the
+    termination model.
+
+    Parameters
+    ----------
+    num_iter: int, optional.
+        Number of iLQR iterations.
+    alphas: Tuple[float], optional.
+        Step sizes of the line search of the forward pass.
+    regularization: float, optional.
+        Initial Levenberg-Marquardt regularization of the Hessian of Q w.r.t. u.
+
+    Other Parameters
+    ----------------
+    See Also: MPCSolver.
+
+    References
+    ----------
+    Li, W., & Todorov, E. (2004).
+    Iterative linear quadratic regulator design for nonlinear biological movement
+    systems. ICINCO.
+
+    Tassa, Y., Erez, T., & Todorov, E. (2012).
+    Synthesis and stabilization of complex behaviors through online trajectory
+    optimization. IROS.
+    """
+
+    def __init__(
+        self,
+        num_iter=10,
+        alphas=(1.0, 0.5, 0.25, 0.1, 0.01),
+        regularization=1e-6,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(num_iter=num_iter, *args, **kwargs)
+        self.alphas = torch.tensor((0.0,) + tuple(alphas))
+        self.regularization = regularization
+
+    def get_candidate_action_sequence(self):
+        """Get candidate action sequence. Not implemented."""
+        return self.mean
+
+    def get_best_action(self, action_sequence, returns):
+        """Return action_sequence. Not implemented."""
+        return action_sequence
+
+    def update_sequence_generation(self, elite_actions):
+        """Do Nothing. Not implemented."""
+        pass
+
+    def step(self, state, action):
+        """Get the mean next state and reward of normalized actions."""
+        action = self.action_scale * action
+        next_state = self.dynamical_model(state, action)[0]
+        reward = self.reward_model(state, action, next_state)[0]
+        return next_state, self.multi_objective_reduction(reward)
+
+    def terminal_value(self, state):
+        """Get the terminal value of the states."""
+        value = self.terminal_reward(state)
+        if value.shape == state.shape[:-1]:  # Single objective value functions.
+            return value
+        return self.multi_objective_reduction(value)
+
+    def rollout(self, state, action_sequence, feedback=None, nominal_states=None):
+        """Rollout the nominal or the feedback controller.
+
+        Parameters
+        ----------
+        state: Tensor
+            Initial states with dimensions [batch_shape x dim state].
+        action_sequence: Tensor
+            Nominal actions with dimensions [horizon x batch_shape x dim action].
+        feedback: Tuple[Tensor, Tensor], optional.
+            Feed-forward and feedback gains. If given, the states, actions, and
+            returns get an extra dimension with the step sizes of the line search,
+            after the time dimension.
+        nominal_states: Tensor, optional.
+            Nominal states, required with the feedback gains.
+
+        Returns
+        -------
+        states: Tensor
+            States with dimensions [horizon + 1 x ... x dim state].
+        actions: Tensor
+            Actions with dimensions [horizon x ... x dim action].
+        returns: Tensor
+            Discounted returns.
+        """
+        states, actions, returns = [state], [], 0.0
+        if feedback is not None:
+            alphas = self.alphas.reshape(-1, *[1] * state.dim())
+            state = state.unsqueeze(0).expand(len(self.alphas), *state.shape)
+            states = [state]
+        for t in range(self.num_model_steps):
+            action = action_sequence[t]
+            if feedback is not None:
+                gain_k, gain_big_k = feedback[0][t], feedback[1][t]
+                error = (state - nominal_states[t]).unsqueeze(-1)
+                action = action + alphas * gain_k + (gain_big_k @ error).squeeze(-1)
+            if self.clamp:
+                action = action.clamp(-1.0, 1.0)
+            state, reward = self.step(state, action)
+            returns = returns + self.gamma ** t * reward
+            states.append(state)
+            actions.append(action)
+        if self.terminal_reward is not None:
+            returns = returns + self.gamma ** self.num_model_steps * (
+                self.terminal_value(state)
+            )
+        return torch.stack(states), torch.stack(actions), returns
+
+    @staticmethod
+    def _jacobian(outputs, inputs):
+        """Get the jacobian of `outputs' w.r.t. each of `inputs', batched.
+
+        All the leading dimensions are batch dimensions, and it needs one backward
+        pass per output dimension. Inputs that do not affect `outputs' get zeros.
+        """
+        rows = [[] for _ in inputs]
+        for i in range(outputs.shape[-1]):
+            if outputs.requires_grad:
+                grads = torch.autograd.grad(
+                    outputs[..., i].sum(),
+                    inputs,
+                    retain_graph=True,
+                    create_graph=True,
+                    allow_unused=True,
+                )
+            else:
+                grads = [None] * len(inputs)
+            for row, grad, input_ in zip(rows, grads, inputs):
+                row.append(torch.zeros_like(input_) if grad is None else grad)
+        return [torch.stack(row, dim=-2) for row in rows]
+
+    def derivatives(self, states, action_sequence):
+        """Linearize the dynamics and quadratize the costs around the trajectory.
+
+        The costs are the negative rewards. All the time steps are differentiated
+        jointly, as the horizon is just another batch dimension.
+        """
+        state = states[:-1].detach().requires_grad_(True)
+        action = action_sequence.detach().requires_grad_(True)
+        with torch.enable_grad():
+            next_state, reward = self.step(state, action)
+            f_x, f_u = self._jacobian(next_state, (state, action))
+            c_x, c_u = self._jacobian(-reward.unsqueeze(-1), (state, action))
+            c_x, c_u = c_x.squeeze(-2), c_u.squeeze(-2)
+            c_xx, _ = self._jacobian(c_x, (state, action))
+            c_ux, c_uu = self._jacobian(c_u, (state, action))
+
+            final_state = states[-1].detach().requires_grad_(True)
+            if self.terminal_reward is not None:
+                cost = -self.terminal_value(final_state).unsqueeze(-1)
+                (v_x,) = self._jacobian(cost, (final_state,))
+                v_x = v_x.squeeze(-2)
+                (v_xx,) = self._jacobian(v_x, (final_state,))
+            else:
+                v_x = torch.zeros_like(final_state)
+                v_xx = torch.zeros(final_state.shape + final_state.shape[-1:])
+
+        derivatives = (f_x, f_u, c_x, c_u, c_xx, c_ux, c_uu, v_x, v_xx)
+        return [d.detach() for d in derivatives]
+
+    def backward_pass(self, derivatives, regularization):
+        """Compute the feed-forward and feedback gains with the Riccati recursion.
+
+        Returns None if Q_uu is not positive definite for some problem.
+        """
+        f_x, f_u, c_x, c_u, c_xx, c_ux, c_uu, v_x, v_xx = derivatives
+        eye = regularization * torch.eye(f_u.shape[-1])
+        gains_k, gains_big_k = [], []
+        for t in reversed(range(self.num_model_steps)):
+            f_xt, f_ut = f_x[t].transpose(-2, -1), f_u[t].transpose(-2, -1)
+            q_x = c_x[t] + self.gamma * (f_xt @ v_x.unsqueeze(-1)).squeeze(-1)
+            q_u = c_u[t] + self.gamma * (f_ut @ v_x.unsqueeze(-1)).squeeze(-1)
+            q_xx = c_xx[t] + self.gamma * f_xt @ v_xx @ f_x[t]
+            q_ux = c_ux[t] + self.gamma * f_ut @ v_xx @ f_x[t]
+            q_uu = c_uu[t] + self.gamma * f_ut @ v_xx @ f_u[t]
+
+            cholesky, info = torch.linalg.cholesky_ex(q_uu + eye)
+            if torch.any(info > 0):
+                return None
+            gain_k = -torch.cholesky_solve(q_u.unsqueeze(-1), cholesky).squeeze(-1)
+            gain_big_k = -torch.cholesky_solve(q_ux, cholesky)
+
+            gain_big_kt = gain_big_k.transpose(-2, -1)
+            v_x = (
+                q_x
+                + (gain_big_kt @ q_uu @ gain_k.unsqueeze(-1)).squeeze(-1)
+                + (gain_big_kt @ q_u.unsqueeze(-1)).squeeze(-1)
+                + (q_ux.transpose(-2, -1) @ gain_k.unsqueeze(-1)).squeeze(-1)
+            )
+            v_xx = (
+                q_xx
+                + gain_big_kt @ q_uu @ gain_big_k
+                + gain_big_kt @ q_ux
+                + q_ux.transpose(-2, -1) @ gain_big_k
+            )
+            v_xx = 0.5 * (v_xx + v_xx.transpose(-2, -1))
+            gains_k.append(gain_k)
+            gains_big_k.append(gain_big_k)
+        return torch.stack(gains_k[::-1]), torch.stack(gains_big_k[::-1])
+
+    def forward(self, state):
+        """Return the action sequence that solves the MPC problem."""
+        self.dynamical_model.eval()
+        self.initialize_actions(state.shape[:-1])
+        self.reset_info()
+
+        with torch.no_grad():
+            states, action_sequence, returns = self.rollout(state, self.mean)
+        regularization, iterations = self.regularization, self.iterations()
+        for _ in iterations:
+            feedback = None
+            derivatives = self.derivatives(states, action_sequence)
+            while feedback is None and regularization < 1e10:
+                feedback = self.backward_pass(derivatives, regularization)
+                if feedback is None:
+                    regularization = max(10 * regularization, 1e-6)
+            if feedback is None:
+                iterations.close()  # Log the iterations before stopping.
+                break
+
+            with torch.no_grad():
+                all_states, all_actions, all_returns = self.rollout(
+                    state, action_sequence, feedback, states
+                )
+            idx = all_returns.argmax(dim=0)  # Best step size of each problem.
+            states = self._select(all_states, idx)
+            action_sequence = self._select(all_actions, idx)
+            returns = all_returns.max(dim=0)[0]
+            if torch.any(idx > 0):
+                regularization = regularization / 10
+            else:
+                regularization = max(10 * regularization, 1e-6)
+            self.record_score(returns)
+
+        self.mean = action_sequence.detach()
+        return self.mean
+
+    @staticmethod
+    def _select(tensor, idx):
+        """Select the step size `idx' of each problem from [T x num_alphas x ...]."""
+        idx = idx.reshape(1, 1, *idx.shape, 1)
+        idx = idx.expand(tensor.shape[0], 1, *tensor.shape[2:])
+        return tensor.gather(1, idx).squeeze(1)
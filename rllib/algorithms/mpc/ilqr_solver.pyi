@@ -0,0 +1,38 @@
+from typing import Any, List, Optional, Tuple
+
+from torch import Tensor
+
+from .abstract_solver import MPCSolver
+
+class ILQRSolver(MPCSolver):
+    alphas: Tensor
+    regularization: float
+    def __init__(
+        self,
+        num_iter: int = ...,
+        alphas: Tuple[float, ...] = ...,
+        regularization: float = ...,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None: ...
+    def get_candidate_action_sequence(self) -> Tensor: ...
+    def get_best_action(self, action_sequence: Tensor, returns: Tensor) -> Tensor: ...
+    def update_sequence_generation(self, elite_actions: Tensor) -> None: ...
+    def step(self, state: Tensor, action: Tensor) -> Tuple[Tensor, Tensor]: ...
+    def terminal_value(self, state: Tensor) -> Tensor: ...
+    def rollout(
+        self,
+        state: Tensor,
+        action_sequence: Tensor,
+        feedback: Optional[Tuple[Tensor, Tensor]] = ...,
+        nominal_states: Optional[Tensor] = ...,
+    ) -> Tuple[Tensor, Tensor, Tensor]: ...
+    @staticmethod
+    def _jacobian(outputs: Tensor, inputs: Tuple[Tensor, ...]) -> List[Tensor]: ...
+    def derivatives(self, states: Tensor, action_sequence: Tensor) -> List[Tensor]: ...
+    def backward_pass(
+        self, derivatives: List[Tensor], regularization: float
+    ) -> Optional[Tuple[Tensor, Tensor]]: ...
+    def forward(self, state: Tensor) -> Tensor: ...
+    @staticmethod
+    def _select(tensor: Tensor, idx: Tensor) -> Tensor: ...
@@ -60,11 +60,14 @@ class MPPIShooting(MPCSolver):
         return action_sequence
 
     def get_best_action(self, action_sequence, returns):
-        """Get best action by a weighted average of e^kappa returns."""
+        """Get best action by a weighted average of e^kappa returns.
+
+        The weights are normalized over the particles of each problem in the batch.
+        """
         returns = self.multi_objective_reduction(returns)
         returns = self.kappa() * returns
-        weights = torch.exp(returns - torch.max(returns))
-        normalization = weights.sum()
+        weights = torch.exp(returns - torch.max(returns, dim=-1, keepdim=True)[0])
+        normalization = weights.sum(dim=-1).unsqueeze(-1)
 
         weights = weights.unsqueeze(0).unsqueeze(-1)
         weights = weights.repeat_interleave(self.num_model_steps, 0).repeat_interleave(
@@ -2,7 +2,9 @@
 
 import torch
 
-from rllib.util.value_estimation import mb_return
+from rllib.util.neural_networks.utilities import repeat_along_dimension
+from rllib.util.rollout import rollout_returns
+from rllib.util.utilities import sample_action
 
 from .random_shooting import RandomShooting
 
@@ -29,23 +31,45 @@ class PolicyShooting(RandomShooting):
         self.policy = policy
 
     def forward(self, state, **kwargs):
-        """Get best action."""
+        """Get the mean of the action sequences of the elite policy rollouts.
+
+        Returns
+        -------
+        action_sequence: Tensor
+            Action sequence with dimensions [horizon x batch_shape x dim action].
+        """
         self.dynamical_model.eval()
 
-        value, trajectory = mb_return(
+        state = repeat_along_dimension(state, number=self.num_particles, dim=0)
+        action = sample_action(self.policy, state)
+        value, action_sequence = self.evaluate_in_parallel(
+            self._rollout_policy, state, action, dim=0
+        )
+        value = self.multi_objective_reduction(value)
+        idx = torch.topk(value, k=self.num_elites, largest=True, dim=0)[1]
+
+        # Mean over the elite samples, the particles are the first dimension.
+        idx = idx.unsqueeze(1)  # Horizon dimension.
+        idx = idx.reshape(idx.shape + (1,) * (action_sequence.ndim - idx.ndim))
+        idx = idx.expand(-1, *action_sequence.shape[1:])
+        self.mean = action_sequence.gather(0, idx).mean(0)
+        if self.clamp:
+            return self.mean.clamp(-1.0, 1.0)
+        return self.mean
+
+    def _rollout_policy(self, state, action):
+        """Get the returns and the action sequences, with the particles first."""
+        returns, action_sequence = rollout_returns(
+            self.dynamical_model,
+            self.reward_model,
             state,
-            dynamical_model=self.dynamical_model,
-            reward_model=self.reward_model,
             policy=self.policy,
-            num_model_steps=self.num_model_steps,
-            gamma=self.gamma,
-            num_particles=self.num_particles,
-            value_function=self.terminal_reward,
+            initial_action=action,
+            num_steps=self.num_model_steps,
             termination_model=self.termination_model,
+            gamma=self.gamma,
+            terminal_reward=self.terminal_reward,
+            compact=self.compact_particles,
+            return_actions=True,
         )
-        actions = trajectory.action
-        value = self.multi_objective_reduction(value)
-        idx = torch.topk(value, k=self.num_elites, largest=True)[1]
-
-        # Return first action and the mean over the elite samples.
-        return actions[0, idx].mean(0)
+        return returns, action_sequence.movedim(0, 1)
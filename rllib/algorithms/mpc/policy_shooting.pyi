@@ -1,8 +1,15 @@
-from typing import Any
+from typing import Any, Tuple
+
+from torch import Tensor
 
 from rllib.policy import AbstractPolicy
 
 from .random_shooting import RandomShooting
 
 class PolicyShooting(RandomShooting):
+    policy: AbstractPolicy
     def __init__(self, policy: AbstractPolicy, *args: Any, **kwargs: Any) -> None: ...
+    def forward(self, state: Tensor, **kwargs: Any) -> Tensor: ...
+    def _rollout_policy(
+        self, state: Tensor, action: Tensor
+    ) -> Tuple[Tensor, Tensor]: ...
@@ -0,0 +1,242 @@
+import pytest
+import torch
+
+from rllib.algorithms.mpc import (
+    CEMShooting,
+    GradientBasedSolver,
+    ILQRSolver,
+    MPPIShooting,
+    RandomShooting,
+)
+from rllib.algorithms.mpc.policy_shooting import PolicyShooting
+from rllib.model import AbstractModel
+from rllib.policy import MPCPolicy, NNPolicy
+
+
+class ConstantDynamics(AbstractModel):
+    def __init__(self):
+        super().__init__(dim_state=(2,), dim_action=(1,))
+
+    def forward(self, state, action, next_state=None):
+        return state, torch.zeros(state.shape + state.shape[-1:])
+
+
+class LinearDynamics(AbstractModel):
+    def __init__(self, a, b):
+        super().__init__(dim_state=(a.shape[0],), dim_action=(b.shape[1],))
+        self.a, self.b = a, b
+
+    def forward(self, state, action, next_state=None):
+        next_state = state @ self.a.T + action @ self.b.T
+        return next_state, torch.zeros(next_state.shape + next_state.shape[-1:])
+
+
+class PendulumDynamics(AbstractModel):
+    def __init__(self):
+        super().__init__(dim_state=(2,), dim_action=(1,))
+
+    def forward(self, state, action, next_state=None):
+        angle, velocity = state[..., :1], state[..., 1:]
+        velocity = velocity + 0.1 * (torch.sin(angle) + action)
+        next_state = torch.cat((angle + 0.1 * velocity, velocity), dim=-1)
+        return next_state, torch.zeros(next_state.shape + (2,))
+
+
+class QuadraticReward(AbstractModel):
+    def __init__(self, q, r):
+        super().__init__(
+            dim_state=(q.shape[0],), dim_action=(r.shape[0],), model_kind="rewards"
+        )
+        self.q, self.r = q, r
+
+    def forward(self, state, action, next_state=None):
+        state_cost = ((state @ self.q) * state).sum(-1, keepdim=True)
+        action_cost = ((action @ self.r) * action).sum(-1, keepdim=True)
+        reward = -(state_cost + action_cost)
+        return reward, torch.zeros(reward.shape + (1,))
+
+
+class SignReward(AbstractModel):
+    """Reward that prefers actions with the sign of the first coordinate.
+
+    The second coordinate offsets the reward, so that the returns of the problems in
+    a batch have different scales.
+    """
+
+    def __init__(self):
+        super().__init__(dim_state=(2,), dim_action=(1,), model_kind="rewards")
+
+    def forward(self, state, action, next_state=None):
+        reward = state[..., :1] * action - 0.1 * action ** 2 + state[..., 1:]
+        return reward, torch.zeros(reward.shape + (1,))
+
+
+@pytest.fixture(params=[RandomShooting, CEMShooting, MPPIShooting])
+def solver(request):
+    return request.param(
+        dynamical_model=ConstantDynamics(),
+        reward_model=SignReward(),
+        num_model_steps=4,
+        num_particles=100,
+    )
+
+
+def test_batched_planning(solver):
+    torch.manual_seed(0)
+    state = torch.tensor([[1.0, 0.0], [-1.0, -100.0], [1.0, 100.0]])
+    action_sequence = solver(state)
+
+    assert action_sequence.shape == (4, 3, 1)
+    assert torch.all(action_sequence[:, 0] > 0)
+    assert torch.all(action_sequence[:, 1] < 0)
+    assert torch.all(action_sequence[:, 2] > 0)
+    assert solver.covariance.shape == (4, 3, 1, 1)
+
+
+def test_batched_warm_start(solver):
+    solver(torch.zeros(3, 2))
+    assert solver.mean.shape == (4, 3, 1)
+    solver(torch.zeros(5, 2))  # The batch shape changed, no warm start.
+    assert solver.mean.shape == (4, 5, 1)
+
+
+def test_time_budget(solver):
+    torch.manual_seed(0)
+    solver.time_budget = 0.2
+    state = torch.tensor([[1.0, 0.0], [-1.0, -100.0], [1.0, 100.0]])
+    action_sequence = solver(state)
+    assert action_sequence.shape == (4, 3, 1)
+    assert solver.info()["mpc_iterations"] >= 1
+
+    # The returned sequence is the best evaluated one, so it is not worse than the
+    # best candidate of any iteration.
+    returns = solver.evaluate_action_sequence(
+        solver.mean.unsqueeze(-2), state.unsqueeze(-2)
+    )
+    score = solver.multi_objective_reduction(returns).mean()
+    assert all(
+        score >= iteration_score - 1e-5 for iteration_score in solver._info["scores"]
+    )
+
+
+def test_num_cpu(solver):
+    torch.manual_seed(0)
+    state = torch.randn(3, 1, 2).expand(3, 100, 2)
+    action_sequence = torch.randn(4, 3, 100, 1)
+    returns = solver.evaluate_action_sequence(action_sequence, state)
+
+    num_threads = torch.get_num_threads()
+    solver.num_cpu = 3
+    sharded_returns = solver.evaluate_action_sequence(action_sequence, state)
+    torch.testing.assert_close(sharded_returns, returns)
+    assert torch.get_num_threads() == num_threads
+
+
+def test_batched_gradient_solver():
+    solver = GradientBasedSolver(
+        dynamical_model=ConstantDynamics(),
+        reward_model=SignReward(),
+        num_model_steps=4,
+        num_iter=20,
+        lr=0.1,
+    )
+    action_sequence = solver(torch.tensor([[1.0, 0.0], [-1.0, 0.0]]))
+    assert torch.all(action_sequence[:, 0] > 0)
+    assert torch.all(action_sequence[:, 1] < 0)
+
+
+def test_batched_mpc_policy(solver):
+    policy = MPCPolicy(solver, solver_frequency=2)
+    state = torch.tensor([[1.0, 0.0], [-1.0, 0.0]])
+    for _ in range(3):
+        action, scale_tril = policy(state)
+        assert action.shape == (2, 1)
+        assert action[0] > 0 and action[1] < 0
+
+
+@pytest.mark.parametrize("batch_shape", [(), (2,)])
+def test_policy_shooting(batch_shape):
+    solver = PolicyShooting(
+        policy=NNPolicy(dim_state=(2,), dim_action=(1,)),
+        dynamical_model=ConstantDynamics(),
+        reward_model=SignReward(),
+        num_model_steps=4,
+        num_particles=50,
+        num_cpu=2,
+    )
+    state = torch.randn(*batch_shape, 2)
+    assert solver(state).shape == (4, *batch_shape, 1)
+
+    policy = MPCPolicy(solver, solver_frequency=2)
+    for _ in range(3):
+        action, _ = policy(state)
+        assert action.shape == (*batch_shape, 1)
+
+
+def lqr_actions(a, b, q, r, state, horizon):
+    """Solve the finite horizon LQR problem with the Riccati recursion."""
+    p, gains = torch.zeros_like(q), []
+    for _ in range(horizon):
+        gain = torch.linalg.solve(r + b.T @ p @ b, b.T @ p @ a)
+        p = q + a.T @ p @ (a - b @ gain)
+        gains.append(gain)
+    actions = []
+    for gain in reversed(gains):
+        actions.append(-state @ gain.T)
+        state = state @ a.T + actions[-1] @ b.T
+    return torch.stack(actions)
+
+
+def test_ilqr_linear_quadratic():
+    a = torch.tensor([[1.0, 0.1], [0.0, 1.0]])
+    b = torch.tensor([[0.0], [0.1]])
+    q, r = torch.eye(2), 0.1 * torch.eye(1)
+    solver = ILQRSolver(
+        dynamical_model=LinearDynamics(a, b),
+        reward_model=QuadraticReward(q, r),
+        num_model_steps=10,
+        num_iter=2,
+        clamp=False,
+    )
+    state = torch.tensor([[1.0, 0.0], [0.0, -1.0], [0.5, 0.5]])
+    action_sequence = solver(state)
+
+    assert action_sequence.shape == (10, 3, 1)
+    torch.testing.assert_close(
+        action_sequence, lqr_actions(a, b, q, r, state, 10), atol=1e-4, rtol=1e-4
+    )
+    assert solver.info()["mpc_iterations"] == 2
+
+
+def test_ilqr_early_stop():
+    solver = ILQRSolver(
+        dynamical_model=PendulumDynamics(),
+        reward_model=QuadraticReward(torch.eye(2), 0.01 * torch.eye(1)),
+        num_model_steps=5,
+        num_iter=3,
+    )
+    solver.regularization = 1e10  # The backward pass can not be regularized.
+    action_sequence = solver(torch.tensor([[1.0, 0.0]]))
+    torch.testing.assert_close(action_sequence, torch.zeros(5, 1, 1))
+    assert solver.info()["mpc_iterations"] == 0
+    assert "mpc_time" in solver.info()
+
+
+def test_ilqr_nonlinear():
+    solver = ILQRSolver(
+        dynamical_model=PendulumDynamics(),
+        reward_model=QuadraticReward(torch.eye(2), 0.01 * torch.eye(1)),
+        num_model_steps=20,
+        num_iter=10,
+    )
+    state = torch.tensor([[1.0, 0.0], [-0.5, 1.0]])
+    action_sequence = solver(state)
+
+    assert action_sequence.shape == (20, 2, 1)
+    assert torch.all(action_sequence.abs() <= 1.0)
+    scores = solver._info["scores"]
+    assert all(x <= y + 1e-6 for x, y in zip(scores, scores[1:]))
+    assert solver.info()["mpc_return_improvement"] > 0
+
+    solver(state)  # Warm start.
+    assert solver.mean.shape == (20, 2, 1)
@@ -2,7 +2,6 @@
 import torch
 
 from rllib.dataset.datatypes import Loss
-from rllib.dataset.utilities import stack_list_of_tuples
 from rllib.util.neural_networks.utilities import broadcast_to_tensor
 from rllib.util.value_estimation import discount_cumsum, mc_return
 from rllib.value_function import NNEnsembleQFunction
@@ -13,6 +12,10 @@ from .dyna import Dyna
 class MVE(Dyna):
     """Derived Algorithm using MVE to calculate targets.
 
+    With `td_k', the critic is trained on the simulated rollouts, which can be
+    sampled from the simulation cache. Otherwise, the targets of the real
+    transitions are always simulated from them.
+
     References
     ----------
     Feinberg, V., et. al. (2018).
@@ -37,10 +40,12 @@ class MVE(Dyna):
         """Get Model-Based critic-loss."""
         with torch.no_grad():
             state, action = observation.state[..., 0, :], observation.action[..., 0, :]
-            sim_trajectory = self.simulation_algorithm.simulate(
-                state, self.policy, initial_action=action
-            )
-            sim_observation = stack_list_of_tuples(sim_trajectory, dim=-2)
+            if self.td_k:  # The targets do not need to start at the real states.
+                sim_observation = self.get_simulated_observation(state, action)
+            else:
+                sim_observation = self.simulation_algorithm.simulate(
+                    state, self.policy, initial_action=action, stack_obs=True
+                )
 
         if not self.td_k:
             sim_observation.state = observation.state[..., :1, :]
@@ -16,6 +16,7 @@ class GAE(nn.Module):
     .. math:: A(s, a) = \sum_t (\gamma \lambda)^t \delta_t,
     where the td error is:
     .. math:: \delta_t = r + \gamma V_t(s_{t+1}) - V(s_t)
+    The sum stops at the terminal steps, so a batch can hold several episodes.
 
     It has a parameter, lambda, that interpolates between the REINFORCE estimate,
     when lambda = 1, and the TD-Residual estimate, when lambda = 0.
@@ -64,4 +65,4 @@ class GAE(nn.Module):
             next_v = next_v * not_done
             td_error = reward + next_v - self.value_function(state)
 
-        return discount_cumsum(td_error, self.lambda_gamma)
+        return discount_cumsum(td_error, self.lambda_gamma, done=done)
@@ -1,7 +1,10 @@
 """Simulation algorithm."""
 
+import math
+
+from rllib.dataset.datatypes import Observation
 from rllib.util.neural_networks.utilities import repeat_along_dimension
-from rllib.util.rollout import rollout_model
+from rllib.util.rollout import rollout_model, rollout_model_stacked
 
 
 class SimulationAlgorithm(object):
@@ -19,6 +22,13 @@ class SimulationAlgorithm(object):
         Number of particles to simulate from initial state.
     num_model_steps: int.
         Number of steps to simulate the particles. .
+    compact_particles: bool.
+        Drop the terminated particles from the rollouts, see `step_model_compact'.
+    checkpoint_steps: int, optional.
+        Number of steps of the checkpointed segments of the rollouts, see
+        `rollout_model'.
+    cache: SimulatedExperienceReplay, optional.
+        Cache of simulated rollouts, which is refreshed with `refresh_cache'.
 
     Methods
     -------
@@ -28,8 +38,20 @@ class SimulationAlgorithm(object):
         real_dataset: ExperienceReplay
     ) -> Tensor:
         Get initial states for simulation.
-    simulate(self, state: State, policy: AbstractPolicy) -> Trajectory:
+    simulate(
+        self,
+        state: State,
+        policy: AbstractPolicy,
+        stack_obs: bool = False,
+        multi_head: bool = False,
+    ) -> Trajectory:
         Simulate a set of particles starting from `state' and following `policy'.
+        If `stack_obs' is True, it returns a single Observation with the same shapes
+        as stack_list_of_tuples(trajectory, dim=-2).
+        If `multi_head' is True, it simulates all the heads of the ensemble models
+        in a single batched rollout, and the tensors get a leading head dimension.
+    refresh_cache(self, memory: ExperienceReplay, policy: AbstractPolicy) -> None:
+        Simulate `cache.num_refresh' rollouts from states of `memory' into the cache.
     """
 
     def __init__(
@@ -39,6 +61,9 @@ class SimulationAlgorithm(object):
         termination_model=None,
         num_particles=1,
         num_model_steps=1,
+        compact_particles=False,
+        checkpoint_steps=None,
+        cache=None,
     ):
         super().__init__()
         self.dynamical_model = dynamical_model
@@ -46,8 +71,25 @@ class SimulationAlgorithm(object):
         self.termination_model = termination_model
         self.num_particles = num_particles
         self.num_model_steps = num_model_steps
+        self.compact_particles = compact_particles
+        self.checkpoint_steps = checkpoint_steps
+        self.cache = cache
+
+    @property
+    def num_heads(self):
+        """Get the number of heads of the dynamical model."""
+        model = getattr(self.dynamical_model, "base_model", self.dynamical_model)
+        return getattr(model, "num_heads", 1)
 
-    def simulate(self, initial_state, policy, initial_action=None, memory=None):
+    def simulate(
+        self,
+        initial_state,
+        policy,
+        initial_action=None,
+        memory=None,
+        stack_obs=False,
+        multi_head=False,
+    ):
         """Simulate a set of particles starting from `state' and following `policy'."""
         if self.num_particles > 0:
             initial_state = repeat_along_dimension(
@@ -60,7 +102,7 @@ class SimulationAlgorithm(object):
                 )
                 initial_action = initial_action.reshape(*initial_state.shape[:-1], -1)
 
-        trajectory = rollout_model(
+        trajectory = (rollout_model_stacked if stack_obs else rollout_model)(
             dynamical_model=self.dynamical_model,
             reward_model=self.reward_model,
             policy=policy,
@@ -69,5 +111,32 @@ class SimulationAlgorithm(object):
             max_steps=self.num_model_steps,
             termination_model=self.termination_model,
             memory=memory,
+            compact=self.compact_particles,
+            num_heads=self.num_heads if multi_head else None,
+            checkpoint_steps=self.checkpoint_steps,
         )
+        if stack_obs:  # Move the time dimension after the batch dimensions.
+            batch_ndim = initial_state.ndim - len(self.dynamical_model.dim_state)
+            batch_ndim += int(multi_head)
+            return Observation(
+                *[self._time_to_batch(x, batch_ndim) for x in trajectory]
+            )
         return trajectory
+
+    def refresh_cache(self, memory, policy):
+        """Simulate `cache.num_refresh' rollouts from states of `memory' into the cache.
+
+        The initial states are sampled from `memory', and each one of them starts
+        `num_particles' rollouts. The oldest rollouts of the cache are overwritten.
+        """
+        num_states = math.ceil(self.cache.num_refresh / max(self.num_particles, 1))
+        observation, *_ = memory.sample_batch(num_states)
+        initial_state = observation.state[..., 0, :]
+        self.cache.append(self.simulate(initial_state, policy, stack_obs=True))
+
+    @staticmethod
+    def _time_to_batch(tensor, batch_ndim):
+        """Move the leading time dimension as stack_list_of_tuples(dim=-2) does."""
+        if tensor.ndim > batch_ndim:
+            return tensor.movedim(0, batch_ndim)
+        return tensor
@@ -1,9 +1,9 @@
-from typing import Optional
+from typing import Optional, Union
 
 from torch import Tensor
 
-from rllib.dataset.datatypes import Trajectory
-from rllib.dataset.experience_replay import ExperienceReplay
+from rllib.dataset.datatypes import Observation, Trajectory
+from rllib.dataset.experience_replay import ExperienceReplay, SimulatedExperienceReplay
 from rllib.model.abstract_model import AbstractModel
 from rllib.policy import AbstractPolicy
 
@@ -13,6 +13,9 @@ class SimulationAlgorithm(object):
     termination_model: Optional[AbstractModel]
     num_particles: int
     num_model_steps: int
+    compact_particles: bool
+    checkpoint_steps: Optional[int]
+    cache: Optional[SimulatedExperienceReplay]
     def __init__(
         self,
         dynamical_model: AbstractModel,
@@ -20,6 +23,9 @@ class SimulationAlgorithm(object):
         termination_model: Optional[AbstractModel] = ...,
         num_particles: int = ...,
         num_model_steps: int = ...,
+        compact_particles: bool = ...,
+        checkpoint_steps: Optional[int] = ...,
+        cache: Optional[SimulatedExperienceReplay] = ...,
     ) -> None: ...
     def simulate(
         self,
@@ -28,4 +34,12 @@ class SimulationAlgorithm(object):
         initial_action: Optional[Tensor] = ...,
         memory: Optional[ExperienceReplay] = ...,
         stack_obs: bool = ...,
-    ) -> Trajectory: ...
+        multi_head: bool = ...,
+    ) -> Union[Trajectory, Observation]: ...
+    @property
+    def num_heads(self) -> int: ...
+    def refresh_cache(
+        self, memory: ExperienceReplay, policy: AbstractPolicy
+    ) -> None: ...
+    @staticmethod
+    def _time_to_batch(tensor: Tensor, batch_ndim: int) -> Tensor: ...
@@ -2,9 +2,6 @@
 import torch
 
 from rllib.dataset.datatypes import Loss
-from rllib.dataset.utilities import stack_list_of_tuples
-from rllib.model.utilities import PredictionStrategy
-from rllib.util.multiprocessing import run_parallel_returns
 from rllib.util.value_estimation import n_step_return
 from rllib.value_function import NNEnsembleQFunction
 
@@ -56,45 +53,9 @@ class STEVE(MVE):
 
         return Loss(critic_loss=critic_loss)
 
-    def _get_member_target(self, model_idx, state, action, critic_target):
-        """Get member target.
-
-        Notes
-        -----
-        Helper method to paralelize the calculation through processes.
-        """
-        self.dynamical_model.set_head(model_idx)
-        self.reward_model.set_head(model_idx)
-        with torch.no_grad():
-            trajectory = self.simulation_algorithm.simulate(
-                state, self.policy, initial_action=action
-            )
-            observation = stack_list_of_tuples(trajectory, dim=state.ndim - 2)
-            n_step_returns = n_step_return(
-                observation,
-                gamma=self.gamma,
-                value_function=self.value_function,
-                reward_transformer=self.reward_transformer,
-                entropy_regularization=self.entropy_loss.eta.item(),
-                reduction="none",
-            )  # samples*batch x horizon x num_q
-            value = n_step_returns.reshape(
-                -1, 1, self.num_particles, self.num_model_steps, self.num_q
-            )
-        return value
-
-    def get_value_target(self, observation):
-        """Rollout model and call base algorithm with transitions."""
-        critic_target = torch.zeros(
-            observation.state.shape[: -len(self.dynamical_model.dim_state)]
-            + (
-                self.num_particles,
-                self.num_model_steps + 1,
-                self.num_models,
-                self.num_q,
-            )
-        )  # Critic target shape B x (H + 1) x M x Q
-        td_return = n_step_return(
+    def _n_step_return(self, observation):
+        """Get the n-step returns with shape [... x n-step x dim reward x num q]."""
+        value = n_step_return(
             observation,
             gamma=self.gamma,
             value_function=self.value_function,
@@ -102,26 +63,44 @@ class STEVE(MVE):
             entropy_regularization=self.entropy_loss.eta.item(),
             reduction="none",
         )
-        td_samples = td_return.unsqueeze(-2).repeat_interleave(self.num_particles, -2)
-        td_model = td_samples.unsqueeze(-2).repeat_interleave(self.num_models, -2)
-        if td_model.shape != critic_target[..., -1, :, :].shape:
-            td_model = td_model.unsqueeze(1)
-        critic_target[..., -1, :, :] = td_model
-
-        with PredictionStrategy(
-            self.dynamical_model, self.reward_model, prediction_strategy="set_head"
-        ), torch.no_grad():
-            state = observation.state[..., 0, :]
-            action = observation.action[..., 0, :]
-            value = run_parallel_returns(
-                self._get_member_target,
-                [(i, state, action, critic_target) for i in range(self.num_models)],
-            )
-            critic_target[..., :-1, :, :] = torch.stack(value, dim=4)
-
-        mean_target = critic_target.mean(dim=(2, 4, 5))  # (samples, models, qs)
-        weight_target = 1 / (self.eps + critic_target.var(dim=(2, 4, 5)))
-
-        weights = weight_target / weight_target.sum(-1, keepdim=True)
-        target_q = (weights * mean_target).sum(-1)
+        if value.ndim == observation.reward.ndim:  # Single q-function.
+            value = value.unsqueeze(-1)
+        return value
+
+    def get_value_target(self, observation):
+        """Rollout model and call base algorithm with transitions.
+
+        All the heads of the model are simulated in a single batched rollout. The
+        target is the average of the h-step returns, weighted by the inverse of
+        their variance across particles, models, and q-functions.
+        """
+        td_return = self._n_step_return(observation)
+        state = observation.state[..., 0, :]
+        batch_shape = state.shape[:-1]
+        sim_observation = self.simulation_algorithm.simulate(
+            state,
+            self.policy,
+            initial_action=observation.action[..., 0, :],
+            stack_obs=True,
+            multi_head=True,
+        )
+        sim_return = self._n_step_return(sim_observation)  # M x P*B x H x R x Q
+        sim_return = sim_return.reshape(
+            self.num_models, self.num_particles, *batch_shape, *sim_return.shape[-3:]
+        ).movedim(0, -3)
+        sim_return = sim_return.movedim(0, len(batch_shape))  # B x P x H x M x R x Q
+
+        critic_target = torch.zeros(
+            observation.state.shape[: -len(self.dynamical_model.dim_state)]
+            + (self.num_particles, self.num_model_steps + 1, self.num_models)
+            + td_return.shape[-2:]
+        )  # Critic target shape B x T x P x (H + 1) x M x R x Q
+        critic_target[..., :-1, :, :, :] = sim_return.unsqueeze(len(batch_shape))
+        critic_target[..., -1, :, :, :] = td_return[..., None, None, :, :]
+
+        mean_target = critic_target.mean(dim=(-5, -3, -1))  # B x T x (H + 1) x R
+        weight_target = 1 / (self.eps + critic_target.var(dim=(-5, -3, -1)))
+
+        weights = weight_target / weight_target.sum(-2, keepdim=True)
+        target_q = (weights * mean_target).sum(-2)
         return target_q
@@ -2,4 +2,5 @@ from .bootstrap_experience_replay import BootstrapExperienceReplay
 from .exp3_experience_replay import EXP3ExperienceReplay
 from .experience_replay import ExperienceReplay
 from .prioritized_experience_replay import PrioritizedExperienceReplay
+from .simulated_experience_replay import SimulatedExperienceReplay
 from .state_experience_replay import StateExperienceReplay
@@ -37,7 +37,9 @@ class BootstrapExperienceReplay(ExperienceReplay):
 
     def __init__(self, num_bootstraps=1, bootstrap=True, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.weights = torch.empty(self.max_len, num_bootstraps, dtype=torch.int)
+        self.weights = self._build_tensor(
+            "weights", (self.max_len, num_bootstraps), torch.int
+        )
         self.mask_distribution = Poisson(torch.ones(num_bootstraps))
         self.bootstrap = bootstrap
 
@@ -1,8 +1,10 @@
 """Implementation of an EXP3 Experience Replay Buffer."""
 
+import numpy as np
 import torch
 
 from .prioritized_experience_replay import PrioritizedExperienceReplay
+from .segment_tree import LogSumExpTree
 
 
 class EXP3ExperienceReplay(PrioritizedExperienceReplay):
@@ -27,6 +29,11 @@ class EXP3ExperienceReplay(PrioritizedExperienceReplay):
 
     ..math :: r_{t} / p_{:, t} 1[I_{t} = k]
 
+    The log-weights are stored in a log-sum-exp tree, hence appending, updating a
+    batch and sampling are O(log K) operations per index.
+    Whenever the total log-weight drifts beyond `drift_threshold', all log-weights
+    are shifted back to zero, which leaves the distribution unchanged.
+
     Parameters
     ----------
     max_len: int.
@@ -47,6 +54,8 @@ class EXP3ExperienceReplay(PrioritizedExperienceReplay):
         is added to the dataset.
     num_memory_steps: int, optional.
         Number of steps in return vector.
+    drift_threshold: float, optional.
+        Maximum absolute value of the total log-weight before rescaling.
 
     References
     ----------
@@ -61,36 +70,107 @@ class EXP3ExperienceReplay(PrioritizedExperienceReplay):
     Foundations and Trends® in Machine Learning.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, drift_threshold=100.0, **kwargs):
         super().__init__(*args, **kwargs)
+        self.drift_threshold = drift_threshold
+
+    @property
+    def priorities(self):
+        """Get list of priorities."""
+        return torch.tensor(
+            self._log_weight_tree.values, dtype=torch.get_default_dtype()
+        )
 
     @property
     def probabilities(self):
         """Get list of probabilities."""
-        probs = self.weights[: len(self)].reciprocal()
-        return probs / torch.sum(probs)
+        probs = torch.zeros(len(self))
+        valid_indexes = self.valid_indexes
+        probs[valid_indexes] = torch.tensor(
+            self._get_probabilities(valid_indexes.numpy()),
+            dtype=torch.get_default_dtype(),
+        )
+        return probs
+
+    def _build_trees(self):
+        """Build the tree that stores the log-weights."""
+        self._log_weight_tree = LogSumExpTree(self.max_len)
+        self._log_weight_offset = 0.0
+
+    def _get_priorities(self, indexes):
+        """Get the log-weights at `indexes'."""
+        return self._log_weight_tree[indexes]
+
+    def get_chunk(self, data_count=0):
+        """Get the transitions appended since the buffer had `data_count' of them.
+
+        The chunk also stores the total shift of the log-weights, so that the
+        log-weights of chunks taken before and after a rescale are consistent.
+        """
+        chunk = super().get_chunk(data_count)
+        chunk["log_weight_offset"] = self._log_weight_offset
+        return chunk
+
+    def add_chunk(self, chunk):
+        """Write a chunk into the buffer and restore the log-weights of its slots."""
+        self._rescale(chunk["log_weight_offset"] - self._log_weight_offset)
+        super().add_chunk(chunk)
+
+    def _rescale(self, offset):
+        """Shift all the log-weights by -`offset', which keeps the distribution."""
+        self._log_weight_tree.rescale(offset)
+        self._log_weight_offset += offset
+
+    def _set_priorities(self, indexes, priorities):
+        """Set the log-weights at `indexes'."""
+        if isinstance(priorities, torch.Tensor):
+            priorities = priorities.detach().cpu().numpy()
+        self._log_weight_tree[indexes] = priorities
+
+    def _clear_priorities(self, indexes):
+        """Clear the log-weights at `indexes' so that they are never sampled."""
+        self._log_weight_tree[indexes] = -np.inf
+
+    def _get_probabilities(self, indexes):
+        """Get the EXP3 sampling probabilities of the valid `indexes'."""
+        tree, beta = self._log_weight_tree, self.beta().item()
+        softmax = np.exp(tree[indexes] - tree.reduce())
+        return (1 - beta) * softmax + beta / self._num_valid
+
+    def _sample_valid_indexes(self, batch_size):
+        """Sample `batch_size' valid indexes with the EXP3 probabilities."""
+        if self._num_valid == 0:
+            raise ValueError("There are no valid indexes to sample.")
+        indexes = self._log_weight_tree.sample(batch_size)
+        uniform = np.random.rand(batch_size) < self.beta().item()
+        indexes[uniform] = self._valid_list[
+            np.random.randint(self._num_valid, size=np.sum(uniform))
+        ]
+        return indexes
+
+    def _get_weights(self, indexes):
+        """Get the importance sampling weights of the observations at `indexes'."""
+        weights = 1.0 / (self._get_probabilities(indexes) * self._num_valid)
+        return torch.tensor(weights, dtype=torch.get_default_dtype())
 
     def update(self, indexes, td):
         """Update experience replay sampling distribution with set of weights."""
-        idx, inverse_idx, counts = torch.unique(
-            indexes, return_counts=True, return_inverse=True
-        )
-
-        inv_prob = self.probabilities[indexes].reciprocal()
-        self._priorities[indexes] += self.alpha() * td * inv_prob * counts[inverse_idx]
-
-        self.max_priority = max(
-            self.max_priority, torch.max(self._priorities[idx]).item()
-        )
+        indexes = np.asarray(indexes)
+        if isinstance(td, torch.Tensor):
+            td = td.detach().cpu().numpy()
+        idx, inverse_idx = np.unique(indexes, return_inverse=True)
+
+        # Accumulate the importance-weighted rewards of repeated indexes.
+        reward = np.zeros(len(idx))
+        np.add.at(reward, inverse_idx, td / self._get_probabilities(indexes))
+        log_weights = self._log_weight_tree[idx] + self.alpha().item() * reward
+        self._set_priorities(idx, log_weights)
+
+        self.max_priority = max(self.max_priority, np.max(log_weights))
         self.alpha.update()
         self.beta.update()
-        self._update_weights()
-
-    def _update_weights(self):
-        """Update priorities and weights."""
-        num = len(self)
-        probs = torch.exp(self._priorities[:num] - self.max_priority)
-        probs = (1 - self.beta()) * probs / torch.sum(probs) + self.beta() / num
 
-        weights = 1.0 / (probs * num)
-        self.weights[:num] = weights
+        offset = self._log_weight_tree.reduce()
+        if abs(offset) > self.drift_threshold:
+            self._rescale(offset)
+            self.max_priority -= offset
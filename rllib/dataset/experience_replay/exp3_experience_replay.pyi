@@ -1,3 +1,20 @@
+from typing import Any, Dict
+
+from numpy import ndarray
+
+from rllib.dataset.datatypes import Index
+
 from .prioritized_experience_replay import PrioritizedExperienceReplay
+from .segment_tree import LogSumExpTree
 
-class EXP3ExperienceReplay(PrioritizedExperienceReplay): ...
+class EXP3ExperienceReplay(PrioritizedExperienceReplay):
+    drift_threshold: float
+    _log_weight_tree: LogSumExpTree
+    _log_weight_offset: float
+    def __init__(
+        self, *args: Any, drift_threshold: float = ..., **kwargs: Any
+    ) -> None: ...
+    def _get_probabilities(self, indexes: Index) -> ndarray: ...
+    def get_chunk(self, data_count: int = ...) -> Dict[str, Any]: ...
+    def add_chunk(self, chunk: Dict[str, Any]) -> None: ...
+    def _rescale(self, offset: float) -> None: ...
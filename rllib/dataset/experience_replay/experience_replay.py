@@ -1,16 +1,18 @@
 """Implementation of an Experience Replay Buffer."""
 import math
+import os
 import warnings
 from dataclasses import asdict
 
 import numpy as np
 import torch
 from torch.utils import data
-from torch.utils.data._utils.collate import default_collate
 
 from rllib.dataset.datatypes import Observation
 from rllib.dataset.utilities import stack_list_of_tuples
 
+from .tensor_memory import MemmapMemory, TensorMemory, memmap_tensor
+
 
 class ExperienceReplay(data.Dataset):
     """An Experience Replay Buffer dataset.
@@ -27,6 +29,17 @@ class ExperienceReplay(data.Dataset):
         callable that takes an observation as input and returns a modified observation.
         If they have an `update` method it will be called whenever a new trajectory
         is added to the dataset.
+    num_memory_steps: int, optional.
+        Number of consecutive transitions returned per index.
+    storage: str, optional (default="object").
+        How the transitions are stored. Options are:
+            - "object": a numpy object array of observations.
+            - "tensor": preallocated per-field tensors, see `TensorMemory'.
+            - "memmap": per-field memory-mapped files in `path', see `MemmapMemory'.
+              The valid mask and the data count are also memory-mapped, so a
+              buffer that already exists in `path' is reopened with its data.
+    path: str, optional.
+        Directory of the "memmap" storage.
 
     Methods
     -------
@@ -54,14 +67,30 @@ class ExperienceReplay(data.Dataset):
     TODO: Make this class robust, easy to use, and fast.
     """
 
-    def __init__(self, max_len, transformations=None, num_memory_steps=0):
+    def __init__(
+        self,
+        max_len,
+        transformations=None,
+        num_memory_steps=0,
+        storage="object",
+        path=None,
+    ):
         super().__init__()
+        if storage not in ["object", "tensor", "memmap"]:
+            raise ValueError(f"{storage} not in ['object', 'tensor', 'memmap'].")
+        if storage == "memmap" and path is None:
+            raise ValueError("A path is required for the memmap storage.")
         self.max_len = max_len
-        self.memory = np.empty((self.max_len,), dtype=Observation)
-
-        self.valid = torch.zeros(self.max_len)
+        self.storage = storage
+        self.path = path
+        self.memory = self._build_memory()
+
+        self._mapped_tensors = dict()
+        self._header = self._build_tensor("_header", (1,), torch.long)
+        self.valid = self._build_tensor("valid", (self.max_len,))
+        self._reset_valid_list()
         self.weights = torch.ones(self.max_len)
-        self.data_count = 0
+        self._data_count = self._header[0].item()
 
         self.transformations = transformations or list()
         self._num_memory_steps = num_memory_steps
@@ -72,6 +101,22 @@ class ExperienceReplay(data.Dataset):
         if self.num_memory_steps < 0:
             raise ValueError("Number of steps must be non-negative.")
 
+        if self.data_count > 0:  # A memory-mapped buffer is reopened.
+            self._restore_valid_list()
+
+    def __getstate__(self):
+        """Get the state to pickle, without the memory-mapped tensors."""
+        state = self.__dict__.copy()
+        for name in self._mapped_tensors:
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        """Set the pickled state and map the memory-mapped tensors again."""
+        self.__dict__.update(state)
+        for name, (shape, dtype) in self._mapped_tensors.items():
+            setattr(self, name, self._build_tensor(name, shape, dtype))
+
     @classmethod
     def from_other(cls, other, num_memory_steps=None):
         """Create a Experience Replay from another one.
@@ -82,7 +127,12 @@ class ExperienceReplay(data.Dataset):
         num_memory_steps = (
             other.num_memory_steps if num_memory_steps is None else num_memory_steps
         )
-        new = cls(other.max_len, other.transformations, num_memory_steps)
+        new = cls(
+            other.max_len,
+            other.transformations,
+            num_memory_steps,
+            storage=other.copy_storage,
+        )
 
         start_idx = other.ptr
         for i in range(other.max_len):
@@ -109,16 +159,24 @@ class ExperienceReplay(data.Dataset):
         test_idx = idx[split_idx:]
 
         train = type(self)(
-            max_len=self.max_len, transformations=self.transformations, *args, **kwargs
+            max_len=self.max_len,
+            transformations=self.transformations,
+            storage=self.copy_storage,
+            *args,
+            **kwargs,
         )
         test = type(self)(
-            max_len=self.max_len, transformations=self.transformations, *args, **kwargs
+            max_len=self.max_len,
+            transformations=self.transformations,
+            storage=self.copy_storage,
+            *args,
+            **kwargs,
         )
 
         for dataset, idx in zip([train, test], [train_idx, test_idx]):
             for i in idx:
                 dataset.memory[i] = self.memory[i]
-                dataset.valid[i] = self.valid[i]
+                dataset._set_valid(i, self.valid[i])
                 dataset.weights[i] = self.weights[i]
                 dataset.data_count += 1
 
@@ -146,9 +204,89 @@ class ExperienceReplay(data.Dataset):
 
         """
         if self.valid[idx] == 0:  # when a non-valid index is sampled.
-            idx = np.random.choice(self.valid_indexes).item()
+            idx = self._sample_valid_indexes(1).item()
+
+        return asdict(self._get_observation(idx)), idx, self._get_weights(idx)
+
+    def _build_memory(self):
+        """Build an empty memory for the storage kind."""
+        if self.storage == "tensor":
+            return TensorMemory(self.max_len)
+        elif self.storage == "memmap":
+            return MemmapMemory(self.max_len, os.path.join(self.path, "memory"))
+        return np.empty((self.max_len,), dtype=Observation)
+
+    def _build_tensor(self, name, shape, dtype=None):
+        """Build a zero tensor, which is memory-mapped with the memmap storage.
+
+        Memory-mapped tensors are stored in the attribute `name' and they keep the
+        values they had in `path' when the buffer is reopened.
+        """
+        dtype = torch.get_default_dtype() if dtype is None else dtype
+        if self.storage != "memmap":
+            return torch.zeros(shape, dtype=dtype)
+        self._mapped_tensors[name] = (shape, dtype)
+        filename = os.path.join(self.path, f"{name.lstrip('_')}.dat")
+        return memmap_tensor(filename, shape, dtype)
+
+    def _gather(self, indexes):
+        """Gather the observations at `indexes'.
+
+        The returned fields have shape `indexes.shape + field_shape'.
+        """
+        if self.storage == "object":
+            indexes = np.asarray(indexes)
+            observation = stack_list_of_tuples(self.memory[indexes.reshape(-1)])
+            return Observation(
+                *map(lambda x: x.reshape(indexes.shape + x.shape[1:]), observation)
+            )
+        return self.memory[indexes]
 
-        return asdict(self._get_observation(idx)), idx, self.weights[idx]
+    def _reset_valid_list(self):
+        """Reset the list of valid indexes.
+
+        The valid indexes are kept in the first `_num_valid' entries of
+        `_valid_list', and `_valid_position' maps every index to its position in
+        the list (or -1 if it is not valid).
+        Hence, validating and invalidating an index are O(1) operations.
+        """
+        self._valid_list = np.zeros(self.max_len, dtype=np.int64)
+        self._valid_position = np.full(self.max_len, -1, dtype=np.int64)
+        self._num_valid = 0
+
+    def _restore_valid_list(self):
+        """Restore the list of valid indexes and the zero observation from `valid'."""
+        valid_indexes = torch.nonzero(self.valid, as_tuple=False).squeeze(1).numpy()
+        self._num_valid = len(valid_indexes)
+        self._valid_list[: self._num_valid] = valid_indexes
+        self._valid_position[valid_indexes] = np.arange(self._num_valid)
+        if self._num_valid > 0:
+            self._init_observation(self.memory[int(valid_indexes[0])])
+
+    def _set_valid(self, idx, value):
+        """Set the valid flag of `idx' and update the list of valid indexes."""
+        self.valid[idx] = value
+        position = self._valid_position[idx]
+        if value and position < 0:
+            self._valid_list[self._num_valid] = idx
+            self._valid_position[idx] = self._num_valid
+            self._num_valid += 1
+        elif not value and position >= 0:  # Swap with the last valid index.
+            last_idx = self._valid_list[self._num_valid - 1]
+            self._valid_list[position] = last_idx
+            self._valid_position[last_idx] = position
+            self._valid_position[idx] = -1
+            self._num_valid -= 1
+
+    def _sample_valid_indexes(self, batch_size):
+        """Sample uniformly `batch_size' valid indexes with replacement."""
+        if self._num_valid == 0:
+            raise ValueError("There are no valid indexes to sample.")
+        return self._valid_list[np.random.randint(self._num_valid, size=batch_size)]
+
+    def _get_weights(self, indexes):
+        """Get the weights of the observations at `indexes'."""
+        return self.weights[indexes]
 
     def _init_observation(self, observation):
         if observation.state.ndim == 0:
@@ -169,21 +307,16 @@ class ExperienceReplay(data.Dataset):
         )
 
     def _get_consecutive_observations(self, start_idx, num_memory_steps):
-        if num_memory_steps == 0 and not (
-            isinstance(start_idx, int) or isinstance(start_idx, np.int)
-        ):
-            observation = stack_list_of_tuples(self.memory[start_idx])
-            return Observation(*map(lambda x: x.unsqueeze(1), observation))
-        num_memory_steps = max(1, num_memory_steps)
-        if start_idx + num_memory_steps <= self.max_len:
-            obs_list = self.memory[start_idx : start_idx + num_memory_steps]
-        else:  # The trajectory is split by the circular buffer.
-            delta_idx = start_idx + num_memory_steps - self.max_len
-            obs_list = np.concatenate(
-                (self.memory[start_idx : self.max_len], self.memory[:delta_idx])
-            )
+        """Get the windows of consecutive observations that start at `start_idx'.
 
-        return stack_list_of_tuples(obs_list)
+        If `start_idx' is an integer, the fields have shape (num_memory_steps, ...),
+        and if it is an array of size N, they have shape (N, num_memory_steps, ...).
+        When num_memory_steps is zero, a window of one observation is returned.
+        """
+        num_memory_steps = max(1, num_memory_steps)
+        # The windows might be split by the circular buffer.
+        indexes = np.asarray(start_idx)[..., np.newaxis] + np.arange(num_memory_steps)
+        return self._gather(indexes % self.max_len)
 
     def _get_observation(self, idx):
         """Return any desired observation.
@@ -204,10 +337,70 @@ class ExperienceReplay(data.Dataset):
             observation = transform(observation)
         return observation
 
+    def get_chunk(self, data_count=0):
+        """Get the transitions appended since the buffer had `data_count' of them.
+
+        The chunk also covers the `num_memory_steps' slots after the pointer, which
+        the last append invalidated, and it never covers more than `max_len' slots.
+        Only the observations of the valid slots are stored, as the invalid ones
+        hold the zero observation.
+
+        Parameters
+        ----------
+        data_count: int.
+            Number of transitions of the buffer when the previous chunk was taken.
+
+        Returns
+        -------
+        chunk: dict.
+            Transitions, valid flags, and weights of the slots that changed.
+        """
+        end = self.data_count + self.num_memory_steps
+        start = max(data_count, end - self.max_len)
+        indexes = np.arange(start, end) % self.max_len
+        valid = self.valid[indexes].clone()
+        valid_indexes = indexes[valid.bool().numpy()]
+        return {
+            "start": start,
+            "data_count": self.data_count,
+            "indexes": indexes,
+            "valid": valid,
+            "weights": self.weights[indexes].clone(),
+            "observation": self._gather(valid_indexes) if len(valid_indexes) else None,
+        }
+
+    def add_chunk(self, chunk):
+        """Write a chunk obtained with `get_chunk' into the buffer.
+
+        Applying the chunks of a buffer in order rebuilds its transitions.
+        """
+        indexes, valid = chunk["indexes"], chunk["valid"]
+        mask = valid.bool().numpy()
+        observation = chunk["observation"]
+        if observation is not None:
+            valid_indexes = indexes[mask]
+            first = Observation(*[x[0] for x in observation])
+            if self.zero_observation is None:
+                self._init_observation(first)
+            if self.storage == "object":
+                for i, idx in enumerate(valid_indexes):
+                    self.memory[idx] = Observation(*[x[i] for x in observation])
+            else:  # The first write allocates the columns of an empty memory.
+                self.memory[int(valid_indexes[0])] = first
+                self.memory[torch.as_tensor(valid_indexes)] = observation
+        if self.zero_observation is not None:
+            for idx in indexes[~mask]:
+                self.memory[idx] = self.zero_observation
+        for idx, value in zip(indexes, valid):
+            self._set_valid(idx, value)
+        self.weights[indexes] = chunk["weights"]
+        self.data_count = chunk["data_count"]
+
     def reset(self):
         """Reset memory to empty."""
-        self.memory = np.empty((self.max_len,), dtype=Observation)
-        self.valid = torch.zeros(self.max_len)
+        self.memory = self._build_memory()
+        self.valid.zero_()
+        self._reset_valid_list()
         self.data_count = 0
         self.zero_observation = None
 
@@ -225,7 +418,7 @@ class ExperienceReplay(data.Dataset):
             warnings.warn("Buffer not initialized.", RuntimeWarning)
         else:
             self.memory[self.ptr] = self.zero_observation
-            self.valid[self.ptr] = 0
+            self._set_valid(self.ptr, 0)
             self.data_count += 1
 
     def append(self, observation):
@@ -248,12 +441,15 @@ class ExperienceReplay(data.Dataset):
         if self.zero_observation is None:
             self._init_observation(observation)
 
-        self.memory[self.ptr] = observation.clone()
-        self.valid[self.ptr] = 1
+        if self.storage == "object":
+            self.memory[self.ptr] = observation.clone()
+        else:  # The memory copies the observation into its columns.
+            self.memory[self.ptr] = observation
+        self._set_valid(self.ptr, 1)
 
         for i in range(self.num_memory_steps):
             self.memory[(self.ptr + i + 1) % self.max_len] = self.zero_observation
-            self.valid[(self.ptr + i + 1) % self.max_len] = 0
+            self._set_valid((self.ptr + i + 1) % self.max_len, 0)
         self.data_count += 1
 
         for transformation in self.transformations:
@@ -261,14 +457,30 @@ class ExperienceReplay(data.Dataset):
             observation = transformation(observation)
 
     def sample_batch(self, batch_size):
-        """Sample a batch of observations."""
-        indices = np.random.choice(self.valid_indexes, batch_size)
-        if self.num_memory_steps == 0:
-            obs = self._get_observation(indices)
-            return obs, torch.tensor(indices), self.weights[indices]
-        else:
-            obs, idx, weight = default_collate([self[i] for i in indices])
-            return Observation(**obs), idx, weight
+        """Sample a batch of observations.
+
+        The windows of consecutive observations are gathered at once with a
+        (batch_size, num_memory_steps) index matrix.
+        """
+        indices = self._sample_valid_indexes(batch_size)
+        obs = self._get_observation(indices)
+        return obs, torch.tensor(indices), self._get_weights(indices)
+
+    @property
+    def data_count(self):
+        """Return the number of transitions (valid or not) appended to the buffer."""
+        return self._data_count
+
+    @data_count.setter
+    def data_count(self, value):
+        """Set the number of transitions and write it to the header."""
+        self._data_count = value
+        self._header[0] = value
+
+    @property
+    def copy_storage(self):
+        """Return the storage of copies of the buffer, which are kept in RAM."""
+        return "tensor" if self.storage == "memmap" else self.storage
 
     @property
     def is_full(self):
@@ -292,7 +504,7 @@ class ExperienceReplay(data.Dataset):
     @property
     def all_raw(self):
         """Get all the un-transformed data."""
-        all_raw = stack_list_of_tuples(self.memory[self.valid_indexes])
+        all_raw = self._gather(torch.sort(self.valid_indexes)[0])
         return all_raw
 
     @property
@@ -302,8 +514,11 @@ class ExperienceReplay(data.Dataset):
 
     @property
     def valid_indexes(self):
-        """Return list of valid indexes."""
-        return torch.nonzero(self.valid, as_tuple=False).squeeze(1)
+        """Return list of valid indexes.
+
+        The indexes are not sorted, see `_reset_valid_list'.
+        """
+        return torch.tensor(self._valid_list[: self._num_valid])
 
     @property
     def num_memory_steps(self):
@@ -313,10 +528,17 @@ class ExperienceReplay(data.Dataset):
     @num_memory_steps.setter
     def num_memory_steps(self, value):
         """Reset the number of steps."""
+        if self.storage == "memmap":
+            raise ValueError(
+                "The number of steps of a memory-mapped buffer cannot be changed."
+            )
         self._num_memory_steps = value
         other = ExperienceReplay.from_other(self, num_memory_steps=value)
         self.memory = other.memory
         self.valid = other.valid
+        self._valid_list = other._valid_list
+        self._valid_position = other._valid_position
+        self._num_valid = other._num_valid
         self.data_count = other.data_count
         self.weights = other.weights
 
@@ -2,21 +2,30 @@ from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
 
 import torch.nn as nn
 from numpy import ndarray
-from torch import Tensor
+from torch import Tensor, dtype
 from torch.utils import data
 
-from rllib.dataset.datatypes import Observation
+from rllib.dataset.datatypes import Index, Observation
 from rllib.dataset.transforms import AbstractTransform
 
+from .tensor_memory import TensorMemory
+
 T = TypeVar("T", bound="ExperienceReplay")
 
 class ExperienceReplay(data.Dataset):
     max_len: int
-    memory: ndarray
+    memory: Union[ndarray, TensorMemory]
+    storage: str
+    path: Optional[str]
+    _mapped_tensors: Dict[str, Tuple[Tuple[int, ...], dtype]]
+    _header: Tensor
     valid: Tensor
+    _valid_list: ndarray
+    _valid_position: ndarray
+    _num_valid: int
     weights: Tensor
     transformations: List[AbstractTransform]
-    data_count: int
+    _data_count: int
     _num_memory_steps: int
     zero_observation: Optional[Observation]
     raw: bool
@@ -25,7 +34,11 @@ class ExperienceReplay(data.Dataset):
         max_len: int,
         transformations: Optional[Union[List[AbstractTransform], nn.ModuleList]] = ...,
         num_memory_steps: int = ...,
+        storage: str = ...,
+        path: Optional[str] = ...,
     ) -> None: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    def __setstate__(self, state: Dict[str, Any]) -> None: ...
     @classmethod
     def from_other(
         cls: Type[T], other: T, num_memory_steps: Optional[int] = ...
@@ -33,11 +46,23 @@ class ExperienceReplay(data.Dataset):
     def split(self, ratio: float = ..., *args: Any, **kwargs: Any) -> Tuple[T, T]: ...
     def __len__(self) -> int: ...
     def __getitem__(self, item: int) -> Tuple[Dict[str, Tensor], int, Tensor]: ...
+    def _build_memory(self) -> Union[ndarray, TensorMemory]: ...
+    def _gather(self, indexes: Index) -> Observation: ...
+    def _build_tensor(
+        self, name: str, shape: Tuple[int, ...], dtype: Optional[dtype] = ...
+    ) -> Tensor: ...
+    def _reset_valid_list(self) -> None: ...
+    def _restore_valid_list(self) -> None: ...
+    def _set_valid(self, idx: int, value: Union[int, Tensor]) -> None: ...
+    def _sample_valid_indexes(self, batch_size: int) -> ndarray: ...
+    def _get_weights(self, indexes: Index) -> Tensor: ...
     def _init_observation(self, observation: Observation) -> None: ...
     def _get_consecutive_observations(
-        self, start_idx: int, num_memory_steps: int
+        self, start_idx: Index, num_memory_steps: int
     ) -> Observation: ...
-    def _get_observation(self, idx: int) -> Observation: ...
+    def _get_observation(self, idx: Index) -> Observation: ...
+    def get_chunk(self, data_count: int = ...) -> Dict[str, Any]: ...
+    def add_chunk(self, chunk: Dict[str, Any]) -> None: ...
     def reset(self) -> None: ...
     def end_episode(self) -> None: ...
     def append(self, observation: Observation) -> None: ...
@@ -49,6 +74,12 @@ class ExperienceReplay(data.Dataset):
     @property
     def all_raw(self) -> Observation: ...
     @property
+    def data_count(self) -> int: ...
+    @data_count.setter
+    def data_count(self, value: int) -> None: ...
+    @property
+    def copy_storage(self) -> str: ...
+    @property
     def is_full(self) -> bool: ...
     @property
     def ptr(self) -> int: ...
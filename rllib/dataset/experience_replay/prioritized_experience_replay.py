@@ -2,12 +2,12 @@
 
 import numpy as np
 import torch
-from torch.utils.data._utils.collate import default_collate
 
 from rllib.dataset.datatypes import Observation
 from rllib.util.parameter_decay import Constant, ParameterDecay
 
 from .experience_replay import ExperienceReplay
+from .segment_tree import MinTree, SumTree
 
 
 class PrioritizedExperienceReplay(ExperienceReplay):
@@ -22,9 +22,14 @@ class PrioritizedExperienceReplay(ExperienceReplay):
     where \alpha is a parameter.
 
     The IS weights are given by:
-    ..math :: w_i = (N P(i)) ^ \beta,
+    ..math :: w_i = (N P(i)) ^ {-\beta} / \max_j w_j,
     where \beta is a parameter.
 
+    The priorities are stored in a sum-tree, to sample and update them in
+    O(log N), and in a min-tree, to compute the maximum IS weight in O(1).
+    The batches are sampled with stratified sampling and the IS weights are only
+    computed for the sampled indexes.
+
     Parameters
     ----------
     max_len: int.
@@ -67,8 +72,9 @@ class PrioritizedExperienceReplay(ExperienceReplay):
         self.epsilon = epsilon
 
         self.max_priority = max_priority
-        self._priorities = torch.zeros(self.max_len)
-        self.weights = torch.zeros(self.max_len)
+        self._build_trees()
+        # Observations of a reopened memory-mapped buffer get the maximum priority.
+        self._set_priorities(self._valid_list[: self._num_valid], self.max_priority)
 
     @classmethod
     def from_other(cls, other, num_memory_steps=None):
@@ -83,9 +89,11 @@ class PrioritizedExperienceReplay(ExperienceReplay):
             num_memory_steps=num_memory_steps
             if num_memory_steps
             else other.num_memory_steps,
+            storage=other.copy_storage,
         )
 
-        for observation in other.memory:
+        for i in range(len(other)):
+            observation = other.memory[i]
             if isinstance(observation, Observation):
                 new.append(observation)
         return new
@@ -93,25 +101,80 @@ class PrioritizedExperienceReplay(ExperienceReplay):
     @property
     def priorities(self):
         """Get list of priorities."""
-        return self._priorities
+        return torch.tensor(self._sum_tree.values, dtype=torch.get_default_dtype())
 
     @priorities.setter
     def priorities(self, value):
         """Set list of priorities."""
-        self._priorities = value
-        self._update_weights()
+        self._set_priorities(np.arange(self.max_len), value)
 
     @property
     def probabilities(self):
         """Get list of probabilities."""
-        num = len(self)
-        return self._priorities[:num] / torch.sum(self._priorities[:num])
-
-    def sample_batch(self, batch_size):
-        """Get a batch of data."""
-        probs = self.probabilities.numpy()
-        indices = np.random.choice(len(self), batch_size, p=probs / np.sum(probs))
-        return default_collate([self[i] for i in indices])
+        priorities = self.priorities[: len(self)]
+        return priorities / torch.sum(priorities)
+
+    def _build_trees(self):
+        """Build the trees that store the priorities."""
+        self._sum_tree = SumTree(self.max_len)
+        self._min_tree = MinTree(self.max_len)
+
+    def _set_priorities(self, indexes, priorities):
+        """Set the priorities at `indexes' in the sum and min trees."""
+        if isinstance(priorities, torch.Tensor):
+            priorities = priorities.detach().cpu().numpy()
+        self._sum_tree[indexes] = priorities
+        self._min_tree[indexes] = priorities
+
+    def _set_valid(self, idx, value):
+        """Set the valid flag of `idx'. Invalid indexes are never sampled."""
+        super()._set_valid(idx, value)
+        if not value:
+            self._clear_priorities(idx)
+
+    def _clear_priorities(self, indexes):
+        """Clear the priorities at `indexes' so that they are never sampled."""
+        self._sum_tree[indexes] = 0.0
+        self._min_tree[indexes] = np.inf
+
+    def _sample_valid_indexes(self, batch_size):
+        """Sample `batch_size' indexes proportionally to their priorities."""
+        if self._num_valid == 0:
+            raise ValueError("There are no valid indexes to sample.")
+        return self._sum_tree.sample(batch_size)
+
+    def _get_weights(self, indexes):
+        """Get the importance sampling weights of the observations at `indexes'."""
+        ratio = self._sum_tree[indexes] / self._min_tree.reduce()
+        return torch.tensor(ratio, dtype=torch.get_default_dtype()) ** -self.beta()
+
+    def reset(self):
+        """Reset memory to empty."""
+        super().reset()
+        self._build_trees()
+
+    def _get_priorities(self, indexes):
+        """Get the priorities at `indexes'."""
+        return self._sum_tree[indexes]
+
+    def get_chunk(self, data_count=0):
+        """Get the transitions appended since the buffer had `data_count' of them.
+
+        The chunk also stores the priorities of its slots and the maximum priority.
+        The priorities of the slots of previous chunks that were updated afterwards
+        are only saved once the chunks are compacted.
+        """
+        chunk = super().get_chunk(data_count)
+        chunk["priorities"] = np.array(self._get_priorities(chunk["indexes"]))
+        chunk["max_priority"] = self.max_priority
+        return chunk
+
+    def add_chunk(self, chunk):
+        """Write a chunk into the buffer and restore the priorities of its slots."""
+        super().add_chunk(chunk)
+        mask = chunk["valid"].bool().numpy()
+        self._set_priorities(chunk["indexes"][mask], chunk["priorities"][mask])
+        self.max_priority = chunk["max_priority"]
 
     def append(self, observation):
         """Append new observation to the dataset.
@@ -125,19 +188,12 @@ class PrioritizedExperienceReplay(ExperienceReplay):
         TypeError
             If the new observation is not of type Observation.
         """
-        self._priorities[self.ptr] = self.max_priority
+        ptr = self.ptr
         super().append(observation)
-        self._update_weights()
+        self._set_priorities(ptr, self.max_priority)
 
     def update(self, indexes, td_error):
         """Update experience replay sampling distribution with set of weights."""
-        self._priorities[indexes] = (td_error + self.epsilon) ** self.alpha()
+        self._set_priorities(indexes, (td_error + self.epsilon) ** self.alpha())
         self.alpha.update()
         self.beta.update()
-        self._update_weights()
-
-    def _update_weights(self):
-        """Update priorities and weights."""
-        num = len(self)
-        weights = torch.pow(self.probabilities * num, -self.beta())
-        self.weights[:num] = weights
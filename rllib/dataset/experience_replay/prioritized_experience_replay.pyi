@@ -1,18 +1,21 @@
-from typing import Any, Union
+from typing import Any, Dict, Union
 
+from numpy import ndarray
 from torch import Tensor
 
+from rllib.dataset.datatypes import Index
 from rllib.util.parameter_decay import ParameterDecay
 
 from .experience_replay import ExperienceReplay
+from .segment_tree import MinTree, SumTree
 
 class PrioritizedExperienceReplay(ExperienceReplay):
     alpha: ParameterDecay
     beta: ParameterDecay
     epsilon: Tensor
     max_priority: float
-    _priorities: Tensor
-    priors: Tensor
+    _sum_tree: SumTree
+    _min_tree: MinTree
     def __init__(
         self,
         alpha: Union[float, ParameterDecay] = ...,
@@ -22,7 +25,14 @@ class PrioritizedExperienceReplay(ExperienceReplay):
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
-    def _update_weights(self) -> None: ...
+    def _build_trees(self) -> None: ...
+    def _get_priorities(self, indexes: Index) -> ndarray: ...
+    def get_chunk(self, data_count: int = ...) -> Dict[str, Any]: ...
+    def add_chunk(self, chunk: Dict[str, Any]) -> None: ...
+    def _clear_priorities(self, indexes: Index) -> None: ...
+    def _set_priorities(
+        self, indexes: Index, priorities: Union[float, ndarray, Tensor]
+    ) -> None: ...
     @property
     def priorities(self) -> Tensor: ...
     @priorities.setter
@@ -0,0 +1,166 @@
+"""Implementation of Segment Trees for Prioritized Experience Replay Buffers."""
+
+import numpy as np
+
+
+class SegmentTree(object):
+    """Array-based binary segment tree with batched updates.
+
+    The leaves store `capacity' values and every inner node stores the reduction of
+    its two children with `operation'.
+    Node 1 is the root and the children of node i are 2i and 2i + 1.
+
+    Writing a batch of B values costs O(B log(capacity)) and is vectorized across
+    the batch, one tree level at a time.
+
+    Parameters
+    ----------
+    capacity: int.
+        Number of leaves of the tree.
+    operation: callable.
+        Element-wise binary reduction, e.g., np.add or np.minimum.
+    neutral_element: float.
+        Neutral element of the operation, used to initialize the tree.
+    """
+
+    def __init__(self, capacity, operation, neutral_element):
+        self.capacity = capacity
+        self.operation = operation
+        self.neutral_element = neutral_element
+        self._num_leaves = 1
+        while self._num_leaves < capacity:
+            self._num_leaves *= 2
+        self.tree = np.full(2 * self._num_leaves, neutral_element, dtype=np.float64)
+
+    def __len__(self):
+        """Return the number of leaves of the tree."""
+        return self.capacity
+
+    def __getitem__(self, idx):
+        """Get the value of the leaves at `idx'."""
+        return self.tree[self._num_leaves + np.asarray(idx)]
+
+    def __setitem__(self, idx, value):
+        """Set the value of the leaves at `idx' and update their ancestors."""
+        idx = self._num_leaves + np.atleast_1d(np.asarray(idx, dtype=np.int64))
+        if idx.size == 0:
+            return
+        self.tree[idx] = value
+        idx = np.unique(idx // 2)
+        while idx[0] > 0:  # All the nodes in `idx' are at the same level.
+            self.tree[idx] = self.operation(self.tree[2 * idx], self.tree[2 * idx + 1])
+            idx = np.unique(idx // 2)
+
+    @property
+    def values(self):
+        """Return the values of all the leaves."""
+        return self.tree[self._num_leaves : self._num_leaves + self.capacity]
+
+    def reduce(self):
+        """Return the reduction of all the leaves."""
+        return self.tree[1]
+
+    def reset(self):
+        """Reset all the leaves to the neutral element."""
+        self.tree[:] = self.neutral_element
+
+
+class SumTree(SegmentTree):
+    """Segment tree that stores partial sums.
+
+    Examples
+    --------
+    >>> tree = SumTree(4)
+    >>> tree[[0, 1, 2, 3]] = [1.0, 0.0, 2.0, 1.0]
+    >>> tree.reduce()
+    4.0
+    >>> tree.find_prefix_sum([0.5, 1.0, 3.5]).tolist()
+    [0, 2, 3]
+    """
+
+    def __init__(self, capacity):
+        super().__init__(capacity, operation=np.add, neutral_element=0.0)
+
+    def _mass(self, node):
+        """Return the total mass of the sub-trees rooted at `node'."""
+        return self.tree[node]
+
+    def find_prefix_sum(self, prefix_sum):
+        """Find the leaves where the cumulative sums reach `prefix_sum'.
+
+        For every entry, it returns the smallest index i such that
+        sum(values[: i + 1]) > prefix_sum. Leaves with zero value are never
+        returned, even with round-off errors.
+        The descent is vectorized across the entries of `prefix_sum'.
+        """
+        prefix_sum = np.atleast_1d(np.asarray(prefix_sum, dtype=np.float64)).copy()
+        idx = np.ones(prefix_sum.shape, dtype=np.int64)
+        while idx[0] < self._num_leaves:
+            left = 2 * idx
+            left_mass = self._mass(left)
+            go_right = (prefix_sum >= left_mass) & (self._mass(left + 1) > 0)
+            prefix_sum -= left_mass * go_right
+            idx = left + go_right
+        return idx - self._num_leaves
+
+    def sample(self, batch_size):
+        """Sample leaves proportionally to their values with stratified sampling.
+
+        The total mass is split in `batch_size' segments of equal mass and one leaf
+        is sampled from each segment.
+        """
+        segments = np.arange(batch_size) + np.random.rand(batch_size)
+        return self.find_prefix_sum(segments * self._mass(1) / batch_size)
+
+
+class MinTree(SegmentTree):
+    """Segment tree that stores partial minima.
+
+    Examples
+    --------
+    >>> tree = MinTree(3)
+    >>> tree[[0, 1, 2]] = [3.0, 1.0, 2.0]
+    >>> tree.reduce()
+    1.0
+    """
+
+    def __init__(self, capacity):
+        super().__init__(capacity, operation=np.minimum, neutral_element=np.inf)
+
+
+class LogSumExpTree(SumTree):
+    """Segment tree that stores partial sums of exponentiated values in log-space.
+
+    The leaves store log-weights and every inner node stores the log-sum-exp of its
+    children, so that no weight ever needs to be exponentiated explicitly.
+    The prefix sums are expressed as fractions of the total mass, hence sampling
+    requires no normalization.
+
+    Examples
+    --------
+    >>> tree = LogSumExpTree(4)
+    >>> tree[[0, 1, 2, 3]] = np.log([1.0, 0.0, 2.0, 1.0])
+    >>> np.exp(tree.reduce())
+    4.0
+    >>> tree.find_prefix_sum([0.1, 0.5, 0.9]).tolist()
+    [0, 2, 3]
+    """
+
+    def __init__(self, capacity):
+        SegmentTree.__init__(
+            self, capacity, operation=np.logaddexp, neutral_element=-np.inf
+        )
+
+    def _mass(self, node):
+        """Return the mass of the sub-trees rooted at `node' relative to the total."""
+        return np.exp(self.tree[node] - self.tree[1])
+
+    def rescale(self, offset):
+        """Subtract `offset' from every log-weight.
+
+        The relative masses are unchanged, as log-sum-exp commutes with shifts.
+        It is an O(capacity) operation that keeps the log-weights in a range with
+        full floating point precision.
+        """
+        finite = np.isfinite(self.tree)
+        self.tree[finite] -= offset
@@ -0,0 +1,37 @@
+from typing import Callable, Union
+
+from numpy import ndarray
+
+from rllib.dataset.datatypes import Array, Index
+
+class SegmentTree(object):
+    capacity: int
+    operation: Callable[[ndarray, ndarray], ndarray]
+    neutral_element: float
+    _num_leaves: int
+    tree: ndarray
+    def __init__(
+        self,
+        capacity: int,
+        operation: Callable[[ndarray, ndarray], ndarray],
+        neutral_element: float,
+    ) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, idx: Index) -> Union[float, ndarray]: ...
+    def __setitem__(self, idx: Index, value: Union[float, Array]) -> None: ...
+    @property
+    def values(self) -> ndarray: ...
+    def reduce(self) -> float: ...
+    def reset(self) -> None: ...
+
+class SumTree(SegmentTree):
+    def __init__(self, capacity: int) -> None: ...
+    def _mass(self, node: Index) -> Union[float, ndarray]: ...
+    def find_prefix_sum(self, prefix_sum: Union[float, Array]) -> ndarray: ...
+    def sample(self, batch_size: int) -> ndarray: ...
+
+class MinTree(SegmentTree):
+    def __init__(self, capacity: int) -> None: ...
+
+class LogSumExpTree(SumTree):
+    def rescale(self, offset: float) -> None: ...
@@ -0,0 +1,126 @@
+"""Implementation of an Experience Replay Buffer of simulated rollouts."""
+
+import math
+
+import numpy as np
+import torch
+from torch.utils import data
+
+from rllib.dataset.datatypes import Observation
+
+from .tensor_memory import TensorMemory
+
+
+class SimulatedExperienceReplay(data.Dataset):
+    """An Experience Replay buffer of rollouts simulated with a model.
+
+    Each entry is a rollout of `num_model_steps' simulated transitions, stored in
+    preallocated per-field tensors, see `TensorMemory'. The rollouts are appended
+    in batches, e.g., each time that the model is learned, and the older ones are
+    erased once the buffer is full, like on a queue.
+
+    Parameters
+    ----------
+    max_len: int.
+        Number of rollouts of the buffer.
+    refresh_ratio: float, optional (default=1.0).
+        Fraction of the buffer that is simulated again at each refresh.
+
+    Methods
+    -------
+    append(observation) -> None:
+        append a batch of simulated rollouts to the dataset.
+    is_full: bool
+        check if buffer is full.
+    num_refresh: int
+        number of rollouts to simulate at the next refresh.
+    sample_batch(batch_size):
+        Get a batch of rollouts.
+    reset():
+        Reset the memory to zero.
+
+    References
+    ----------
+    Sutton, R. S. (1990).
+    Integrated architectures for learning, planning, and reacting based on
+    approximating dynamic programming. ICML.
+
+    Janner, M., Fu, J., Zhang, M., & Levine, S. (2019).
+    When to trust your model: Model-based policy optimization. NeuRIPS.
+    """
+
+    def __init__(self, max_len, refresh_ratio=1.0):
+        super().__init__()
+        assert 0.0 < refresh_ratio <= 1.0
+        self.max_len = max_len
+        self.refresh_ratio = refresh_ratio
+        self.memory = TensorMemory(max_len)
+        self._ptr = 0
+        self.is_full = False
+
+    def __len__(self):
+        """Return the current size of the buffer."""
+        if self.is_full:
+            return self.max_len
+        else:
+            return self._ptr
+
+    def __getitem__(self, idx):
+        """Return the rollout(s) at `idx'."""
+        return self.memory[idx]
+
+    @property
+    def num_refresh(self):
+        """Return the number of rollouts to simulate at the next refresh.
+
+        It fills the empty part of the buffer, and at least `refresh_ratio' of it.
+        """
+        return max(
+            self.max_len - len(self), math.ceil(self.refresh_ratio * self.max_len)
+        )
+
+    def reset(self):
+        """Reset memory to empty."""
+        self._ptr = 0
+        self.is_full = False
+
+    def append(self, observation):
+        """Append a batch of simulated rollouts to the dataset.
+
+        Parameters
+        ----------
+        observation: Observation
+            Stacked rollouts, with dimensions [num_rollouts x num_model_steps x ...]
+            as returned by `SimulationAlgorithm.simulate(stack_obs=True)'. The
+            fields without the batch dimension, e.g. the NaN ones, are broadcast.
+        """
+        num_rollouts = observation.done.shape[0]
+        fields = [
+            x if x.ndim >= observation.done.ndim else x.expand(num_rollouts, *x.shape)
+            for x in observation
+        ]
+        if num_rollouts > self.max_len:
+            fields = [x[-self.max_len :] for x in fields]
+            num_rollouts = self.max_len
+        if self.memory.columns is None:
+            self.memory[self._ptr] = Observation(*[x[0] for x in fields])
+
+        indexes = (self._ptr + torch.arange(num_rollouts)) % self.max_len
+        self.memory[indexes] = Observation(*fields)
+        self.is_full = self.is_full or self._ptr + num_rollouts >= self.max_len
+        self._ptr = (self._ptr + num_rollouts) % self.max_len
+
+    def sample_batch(self, batch_size):
+        """Get a batch of rollouts, sampled uniformly.
+
+        Returns
+        -------
+        observation: Observation
+            Rollouts with dimensions [batch_size x num_model_steps x ...].
+        indexes: Tensor
+            Indexes of the rollouts.
+        weights: Tensor
+            Importance sampling weights, all ones.
+        """
+        indexes = torch.tensor(np.random.choice(len(self), batch_size))
+        return self.memory[indexes], indexes, torch.ones(batch_size)
@@ -0,0 +1,23 @@
+from typing import Tuple, Union
+
+from torch import Tensor
+from torch.utils import data
+
+from rllib.dataset.datatypes import Observation
+
+from .tensor_memory import TensorMemory
+
+class SimulatedExperienceReplay(data.Dataset):
+    max_len: int
+    refresh_ratio: float
+    memory: TensorMemory
+    _ptr: int
+    is_full: bool
+    def __init__(self, max_len: int, refresh_ratio: float = ...) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, idx: Union[int, slice, Tensor]) -> Observation: ...
+    @property
+    def num_refresh(self) -> int: ...
+    def reset(self) -> None: ...
+    def append(self, observation: Observation) -> None: ...
+    def sample_batch(self, batch_size: int) -> Tuple[Observation, Tensor, Tensor]: ...
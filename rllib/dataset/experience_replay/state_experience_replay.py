@@ -1,10 +1,14 @@
 """Implementation of an Experience Replay Buffer."""
 
+import os
+
 import numpy as np
 import torch
 from torch.utils import data
 from torch.utils.data._utils.collate import default_collate
 
+from .tensor_memory import memmap_tensor
+
 
 class StateExperienceReplay(data.Dataset):
     """A State distribution Experience Replay buffer.
@@ -16,6 +20,12 @@ class StateExperienceReplay(data.Dataset):
     ----------
     max_len: int.
         buffer size of experience replay algorithm.
+    dim_state: Tuple.
+        Dimension of the states.
+    path: str, optional.
+        If given, the states, the pointer and the full flag are stored in
+        memory-mapped files in this directory, and a buffer that already exists in
+        `path' is reopened with its data.
 
     Methods
     -------
@@ -42,15 +52,59 @@ class StateExperienceReplay(data.Dataset):
 
     """
 
-    def __init__(self, max_len, dim_state):
+    def __init__(self, max_len, dim_state, path=None):
         super().__init__()
         self.max_len = max_len
         self.dim_state = dim_state
-        self.memory = torch.empty(
-            (self.max_len,) + self.dim_state, dtype=torch.get_default_dtype()
-        )
-        self._ptr = 0
-        self.is_full = False
+        self.path = path
+        self._map_tensors()
+
+    def _map_tensors(self):
+        """Build the memory and the header with the pointer and the full flag."""
+        shape = (self.max_len,) + self.dim_state
+        if self.path is None:
+            self.memory = torch.empty(shape, dtype=torch.get_default_dtype())
+            self._header = torch.zeros(2, dtype=torch.long)
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            self.memory = memmap_tensor(
+                os.path.join(self.path, "memory.dat"), shape, torch.get_default_dtype()
+            )
+            self._header = memmap_tensor(
+                os.path.join(self.path, "header.dat"), (2,), torch.long
+            )
+
+    def __getstate__(self):
+        """Get the state to pickle, without the memory-mapped tensors."""
+        state = self.__dict__.copy()
+        if self.path is not None:
+            state.pop("memory")
+            state.pop("_header")
+        return state
+
+    def __setstate__(self, state):
+        """Set the pickled state and map the memory-mapped tensors again."""
+        self.__dict__.update(state)
+        if self.path is not None:
+            self._map_tensors()
+
+    @property
+    def _ptr(self):
+        """Return the pointer where the next state will be written."""
+        return self._header[0].item()
+
+    @_ptr.setter
+    def _ptr(self, value):
+        self._header[0] = value
+
+    @property
+    def is_full(self):
+        """Flag that checks if memory in buffer is full."""
+        return bool(self._header[1])
+
+    @is_full.setter
+    def is_full(self, value):
+        self._header[1] = value
 
     def __len__(self):
         """Return the current size of the buffer."""
@@ -77,9 +131,6 @@ class StateExperienceReplay(data.Dataset):
 
     def reset(self):
         """Reset memory to empty."""
-        self.memory = torch.empty(
-            (self.max_len,) + self.dim_state, dtype=torch.get_default_dtype()
-        )
         self._ptr = 0
         self.is_full = False
 
@@ -0,0 +1,30 @@
+from typing import Any, Dict, Optional, Tuple
+
+from torch import Tensor
+from torch.utils import data
+
+class StateExperienceReplay(data.Dataset):
+    max_len: int
+    dim_state: Tuple[int, ...]
+    path: Optional[str]
+    memory: Tensor
+    _header: Tensor
+    def __init__(
+        self, max_len: int, dim_state: Tuple[int, ...], path: Optional[str] = ...
+    ) -> None: ...
+    def _map_tensors(self) -> None: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    def __setstate__(self, state: Dict[str, Any]) -> None: ...
+    @property
+    def _ptr(self) -> int: ...
+    @_ptr.setter
+    def _ptr(self, value: int) -> None: ...
+    @property
+    def is_full(self) -> bool: ...
+    @is_full.setter
+    def is_full(self, value: bool) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, idx: int) -> Tensor: ...
+    def reset(self) -> None: ...
+    def append(self, state: Tensor) -> None: ...
+    def sample_batch(self, batch_size: int) -> Tensor: ...
@@ -0,0 +1,154 @@
+"""Implementation of columnar memories for Experience Replay Buffers."""
+
+import json
+import os
+from dataclasses import fields
+
+import numpy as np
+import torch
+
+from rllib.dataset.datatypes import Observation
+from rllib.util.neural_networks.utilities import to_torch
+
+
+def memmap_tensor(filename, shape, dtype):
+    """Get a tensor that is backed by the memory-mapped file `filename'.
+
+    If the file exists, its content is mapped. Otherwise, it is created with zeros.
+    Writes to the tensor are written to the file by the operating system, even if
+    the process crashes.
+
+    Parameters
+    ----------
+    filename: str.
+        Name of the file.
+    shape: Tuple.
+        Shape of the tensor.
+    dtype: torch.dtype.
+        Data type of the tensor.
+    """
+    np_dtype = torch.zeros((), dtype=dtype).numpy().dtype
+    mode = "r+" if os.path.exists(filename) else "w+"
+    return torch.from_numpy(
+        np.memmap(filename, dtype=np_dtype, mode=mode, shape=tuple(shape))
+    )
+
+
+class TensorMemory(object):
+    """A memory that stores observations in preallocated per-field tensors.
+
+    Each field of an Observation is stored in its own contiguous column of shape
+    (max_len, *field_shape).
+    The columns are allocated lazily, with the shape and dtype of the first
+    observation that is written to the memory.
+
+    Indexing with an integer returns a single observation, whereas indexing with a
+    slice, an array or a tensor of indexes gathers every field with one indexing
+    operation and returns the stacked observation.
+
+    Parameters
+    ----------
+    max_len: int.
+        Number of observations that the memory holds.
+
+    Examples
+    --------
+    >>> memory = TensorMemory(max_len=4)
+    >>> memory[0] = Observation.random_example(dim_state=(3,), dim_action=(2,))
+    >>> memory[torch.tensor([0, 0, 1])].state.shape
+    torch.Size([3, 3])
+    """
+
+    def __init__(self, max_len):
+        self.max_len = max_len
+        self.columns = None
+
+    def _allocate(self, observation):
+        """Allocate the columns with the shapes and dtypes of `observation'."""
+        self.columns = Observation(
+            *[
+                torch.zeros((self.max_len,) + x.shape, dtype=x.dtype)
+                for x in map(to_torch, observation)
+            ]
+        )
+
+    def __len__(self):
+        """Return the number of observations that the memory holds."""
+        return self.max_len
+
+    def __getitem__(self, idx):
+        """Gather the observation(s) at `idx'."""
+        if self.columns is None:
+            raise IndexError("Memory has not been written yet.")
+        return Observation(*[column[idx] for column in self.columns])
+
+    def __setitem__(self, idx, observation):
+        """Write the observation(s) at `idx'.
+
+        The values are copied into the columns, so the memory never keeps a
+        reference to `observation'.
+        """
+        if self.columns is None:
+            self._allocate(observation)
+        for column, value in zip(self.columns, observation):
+            column[idx] = to_torch(value)
+
+
+class MemmapMemory(TensorMemory):
+    """A TensorMemory whose columns are memory-mapped files in a directory.
+
+    The shapes and dtypes of the columns are stored in a `layout.json' file, so
+    that a memory that already exists in `path' is reopened instead of allocated.
+    Only the path is pickled, the data stays on disk.
+
+    Parameters
+    ----------
+    max_len: int.
+        Number of observations that the memory holds.
+    path: str.
+        Directory where the columns are stored.
+    """
+
+    def __init__(self, max_len, path):
+        super().__init__(max_len)
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._layout_file):
+            self._open()
+
+    @property
+    def _layout_file(self):
+        return os.path.join(self.path, "layout.json")
+
+    def _allocate(self, observation):
+        """Create the column files with the shapes and dtypes of `observation'."""
+        layout = {
+            field.name: [list(value.shape), str(value.dtype).split(".")[-1]]
+            for field, value in zip(fields(Observation), map(to_torch, observation))
+        }
+        with open(self._layout_file, "w") as file:
+            json.dump(layout, file)
+        self._open()
+
+    def _open(self):
+        """Map the column files described in the layout file."""
+        with open(self._layout_file, "r") as file:
+            layout = json.load(file)
+        self.columns = Observation(
+            **{
+                name: memmap_tensor(
+                    os.path.join(self.path, f"{name}.dat"),
+                    (self.max_len,) + tuple(shape),
+                    getattr(torch, dtype),
+                )
+                for name, (shape, dtype) in layout.items()
+            }
+        )
+
+    def __getstate__(self):
+        """Get the state to pickle, without the data."""
+        return {"max_len": self.max_len, "path": self.path}
+
+    def __setstate__(self, state):
+        """Reopen the memory from the pickled state."""
+        self.__init__(**state)
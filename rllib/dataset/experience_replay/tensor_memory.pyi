@@ -0,0 +1,25 @@
+from typing import Any, Dict, Optional, Tuple
+
+from torch import Tensor, dtype
+
+from rllib.dataset.datatypes import Index, Observation
+
+class TensorMemory(object):
+    max_len: int
+    columns: Optional[Observation]
+    def __init__(self, max_len: int) -> None: ...
+    def _allocate(self, observation: Observation) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, idx: Index) -> Observation: ...
+    def __setitem__(self, idx: Index, observation: Observation) -> None: ...
+
+class MemmapMemory(TensorMemory):
+    path: str
+    def __init__(self, max_len: int, path: str) -> None: ...
+    @property
+    def _layout_file(self) -> str: ...
+    def _open(self) -> None: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    def __setstate__(self, state: Dict[str, Any]) -> None: ...
+
+def memmap_tensor(filename: str, shape: Tuple[int, ...], dtype: dtype) -> Tensor: ...
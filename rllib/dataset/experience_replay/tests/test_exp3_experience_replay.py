@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+import torch
+
+from rllib.dataset import EXP3ExperienceReplay
+from rllib.dataset.datatypes import Observation
+
+
+@pytest.fixture(params=[0, 2])
+def num_memory_steps(request):
+    return request.param
+
+
+def create_memory(num_memory_steps, max_len=50, num_transitions=80, **kwargs):
+    memory = EXP3ExperienceReplay(
+        max_len=max_len, num_memory_steps=num_memory_steps, **kwargs
+    )
+    for i in range(num_transitions):
+        memory.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+        if i % 10 == 9:
+            memory.end_episode()
+    return memory
+
+
+def test_positional_arguments():
+    memory = EXP3ExperienceReplay(0.1, 0.2, 0.01, 10.0, 100, drift_threshold=20.0)
+    assert memory.max_len == 100
+    assert memory.alpha() == 0.1
+    assert memory.beta() == 0.2
+    assert memory.drift_threshold == 20.0
+
+
+def test_sample_batch(num_memory_steps):
+    memory = create_memory(num_memory_steps, alpha=0.1, beta=0.1)
+    observation, idx, weight = memory.sample_batch(32)
+    for attribute in observation:
+        assert attribute.shape[:2] == (32, max(1, num_memory_steps))
+    assert torch.all(memory.valid[idx] == 1)
+    # All the log-weights are equal, so the distribution is uniform.
+    torch.testing.assert_close(weight, torch.ones(32))
+
+
+def test_probabilities(num_memory_steps):
+    memory = create_memory(num_memory_steps, alpha=0.1, beta=0.2)
+    _, idx, _ = memory.sample_batch(16)
+    memory.update(idx, torch.rand(16))
+
+    probabilities = memory.probabilities
+    np.testing.assert_allclose(probabilities.sum().item(), 1.0, rtol=1e-5)
+    assert torch.all(probabilities[memory.valid[: len(memory)] == 0] == 0)
+
+    valid = memory.valid_indexes
+    log_weights = memory.priorities[valid]
+    expected = 0.8 * torch.softmax(log_weights, dim=0) + 0.2 / len(valid)
+    torch.testing.assert_close(probabilities[valid], expected)
+
+    _, idx, weight = memory.sample_batch(16)
+    torch.testing.assert_close(weight, 1 / (probabilities[idx] * len(valid)))
+
+
+def test_update(num_memory_steps):
+    memory = create_memory(num_memory_steps, alpha=0.1, beta=0.2)
+    idx = memory.valid_indexes[:3]
+    idx = torch.cat((idx, idx[:1]))
+    td = torch.tensor([1.0, 2.0, 3.0, 4.0])
+    old_log_weights = memory.priorities[idx[:3]]
+    probabilities = memory.probabilities[idx]
+    memory.update(idx, td)
+
+    delta = 0.1 * td / probabilities
+    expected = old_log_weights + torch.stack((delta[0] + delta[3], delta[1], delta[2]))
+    torch.testing.assert_close(memory.priorities[idx[:3]], expected)
+
+
+def test_rescale(num_memory_steps):
+    memory = create_memory(num_memory_steps, alpha=10.0, drift_threshold=20.0)
+    for _ in range(5):
+        _, idx, _ = memory.sample_batch(8)
+        memory.update(idx, torch.ones(8))
+        assert abs(memory._log_weight_tree.reduce()) <= 20.0
+        np.testing.assert_allclose(memory.probabilities.sum(), 1.0, rtol=1e-5)
+    assert memory.max_priority <= 20.0
+
+
+def test_reset(num_memory_steps):
+    memory = create_memory(num_memory_steps)
+    memory.reset()
+    assert torch.all(memory.priorities == -np.inf)
+
+
+def test_chunk(num_memory_steps):
+    memory = create_memory(num_memory_steps, alpha=10.0, drift_threshold=20.0)
+    chunk = memory.get_chunk()
+    for _ in range(10):
+        memory.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+    memory.end_episode()
+    # Only the new slots are updated, the rescale shifts the old ones too.
+    idx = np.arange(chunk["data_count"], memory.data_count) % 50
+    idx = idx[memory.valid[idx].bool().numpy()][:4]
+    memory.update(idx, np.ones(4))
+    assert memory._log_weight_offset != 0.0
+    new_chunk = memory.get_chunk(chunk["data_count"])
+
+    new = EXP3ExperienceReplay(
+        max_len=50, num_memory_steps=num_memory_steps, alpha=10.0
+    )
+    new.add_chunk(chunk)
+    new.add_chunk(new_chunk)
+    torch.testing.assert_close(new.probabilities, memory.probabilities)
+    assert new.max_priority == memory.max_priority
@@ -1,5 +1,6 @@
 import numpy as np
 import pytest
+import torch
 
 from rllib.dataset import ExperienceReplay
 from rllib.dataset.datatypes import Observation
@@ -337,3 +338,27 @@ class TestExperienceReplay(object):
             assert weight == 1.0
             for attribute in Observation(**observation):
                 assert attribute.shape[0] == max(1, num_memory_steps)
+
+    def test_valid_list(self, discrete, max_len, num_memory_steps):
+        num_episodes = 3
+        episode_length = 200
+        memory = create_er_from_episodes(
+            discrete, max_len, num_memory_steps, num_episodes, episode_length
+        )
+        valid_indexes = torch.nonzero(memory.valid, as_tuple=False).squeeze(1)
+        torch.testing.assert_close(torch.sort(memory.valid_indexes)[0], valid_indexes)
+
+    def test_sample_batch_windows(self, discrete, max_len, num_memory_steps):
+        num_episodes = 3
+        episode_length = 200
+        memory = create_er_from_episodes(
+            discrete, max_len, num_memory_steps, num_episodes, episode_length
+        )
+        observation, idx, weight = memory.sample_batch(batch_size=16)
+        for i, index in enumerate(idx.tolist()):
+            observation_i, idx_i, weight_i = memory[index]
+            assert idx_i == index
+            for attribute, attribute_i in zip(
+                observation, Observation(**observation_i)
+            ):
+                torch.testing.assert_close(attribute[i], attribute_i, equal_nan=True)
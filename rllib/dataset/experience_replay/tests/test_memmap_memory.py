@@ -0,0 +1,120 @@
+import pickle
+
+import pytest
+import torch
+
+from rllib.dataset import (
+    BootstrapExperienceReplay,
+    ExperienceReplay,
+    PrioritizedExperienceReplay,
+    StateExperienceReplay,
+)
+from rllib.dataset.datatypes import Observation
+from rllib.dataset.experience_replay.tensor_memory import MemmapMemory
+
+
+@pytest.fixture(params=[0, 2])
+def num_memory_steps(request):
+    return request.param
+
+
+def fill(memory, num_transitions=45):
+    for i in range(num_transitions):
+        memory.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+        if i % 10 == 9:
+            memory.end_episode()
+
+
+def test_reopen(tmp_path, num_memory_steps):
+    memory = ExperienceReplay(
+        max_len=30, num_memory_steps=num_memory_steps, storage="memmap", path=tmp_path
+    )
+    fill(memory)
+    assert isinstance(memory.memory, MemmapMemory)
+
+    new = ExperienceReplay(
+        max_len=30, num_memory_steps=num_memory_steps, storage="memmap", path=tmp_path
+    )
+    assert new.data_count == memory.data_count
+    assert new.ptr == memory.ptr
+    torch.testing.assert_close(new.valid, memory.valid)
+    torch.testing.assert_close(
+        torch.sort(new.valid_indexes)[0], torch.sort(memory.valid_indexes)[0]
+    )
+    assert new.all_raw == memory.all_raw
+
+    observation, idx, weight = new.sample_batch(8)
+    assert observation.state.shape == (8, max(1, num_memory_steps), 3)
+    new.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+
+
+def test_pickle(tmp_path):
+    memory = ExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    fill(memory)
+    new = pickle.loads(pickle.dumps(memory))
+    assert new.all_raw == memory.all_raw
+    new.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+    assert memory._header[0] == new.data_count
+
+
+def test_reset(tmp_path):
+    memory = ExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    fill(memory)
+    memory.reset()
+    new = ExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    assert new.data_count == 0
+    assert len(new.valid_indexes) == 0
+
+
+def test_copies(tmp_path):
+    memory = ExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    fill(memory)
+    train, test = memory.split()
+    assert train.storage == test.storage == "tensor"
+    with pytest.raises(ValueError):
+        memory.num_memory_steps = 3
+
+
+def test_path_error():
+    with pytest.raises(ValueError):
+        ExperienceReplay(max_len=30, storage="memmap")
+
+
+def test_prioritized(tmp_path):
+    memory = PrioritizedExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    fill(memory)
+    memory.update(memory.valid_indexes, torch.rand(len(memory.valid_indexes)))
+
+    new = PrioritizedExperienceReplay(max_len=30, storage="memmap", path=tmp_path)
+    torch.testing.assert_close(
+        new.priorities[new.valid_indexes],
+        new.max_priority * torch.ones(len(new.valid_indexes)),
+    )
+    _, idx, _ = new.sample_batch(16)
+    assert torch.all(new.valid[idx] == 1)
+
+
+def test_bootstrap(tmp_path):
+    memory = BootstrapExperienceReplay(
+        max_len=30, num_bootstraps=4, storage="memmap", path=tmp_path
+    )
+    fill(memory)
+    new = BootstrapExperienceReplay(
+        max_len=30, num_bootstraps=4, storage="memmap", path=tmp_path
+    )
+    torch.testing.assert_close(new.weights, memory.weights)
+
+
+def test_state_experience_replay(tmp_path):
+    memory = StateExperienceReplay(max_len=10, dim_state=(3,), path=tmp_path)
+    memory.append(torch.randn(4, 3))
+    memory.append(torch.randn(8, 3))
+    assert memory.is_full
+
+    new = StateExperienceReplay(max_len=10, dim_state=(3,), path=tmp_path)
+    assert new.is_full
+    assert new._ptr == memory._ptr
+    torch.testing.assert_close(new.memory, memory.memory)
+
+    new = pickle.loads(pickle.dumps(memory))
+    torch.testing.assert_close(new.memory, memory.memory)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import torch
+
+from rllib.dataset import PrioritizedExperienceReplay
+from rllib.dataset.datatypes import Observation
+
+
+@pytest.fixture(params=[0, 2])
+def num_memory_steps(request):
+    return request.param
+
+
+@pytest.fixture(params=[30, 100])
+def max_len(request):
+    return request.param
+
+
+def create_memory(max_len, num_memory_steps, num_transitions=60, beta=0.4):
+    memory = PrioritizedExperienceReplay(
+        max_len=max_len, num_memory_steps=num_memory_steps, beta=beta
+    )
+    for i in range(num_transitions):
+        memory.append(Observation.random_example(dim_state=(3,), dim_action=(2,)))
+        if i % 10 == 9:
+            memory.end_episode()
+    return memory
+
+
+def test_sample_batch(max_len, num_memory_steps):
+    memory = create_memory(max_len, num_memory_steps)
+    observation, idx, weight = memory.sample_batch(32)
+    for attribute in observation:
+        assert attribute.shape[:2] == (32, max(1, num_memory_steps))
+    assert idx.shape == (32,)
+    assert weight.shape == (32,)
+    assert torch.all(memory.valid[idx] == 1)
+    torch.testing.assert_close(weight, torch.ones(32))
+
+
+def test_update(max_len, num_memory_steps):
+    memory = create_memory(max_len, num_memory_steps)
+    _, idx, _ = memory.sample_batch(16)
+    td_error = torch.rand(16)
+    memory.update(idx, td_error)
+
+    priorities = (td_error + memory.epsilon) ** memory.alpha()
+    # Duplicate indexes keep the last written priority.
+    for i, priority in zip(idx.tolist(), priorities):
+        assert memory.priorities[i] in priorities
+    assert torch.all(memory.priorities[memory.valid == 0] == 0)
+
+    _, idx, weight = memory.sample_batch(64)
+    expected_weight = (
+        memory.priorities[idx] / memory.priorities[memory.valid == 1].min()
+    ) ** -memory.beta()
+    torch.testing.assert_close(weight, expected_weight)
+    assert torch.all(weight <= 1.0 + 1e-6)
+
+
+def test_probabilities(max_len, num_memory_steps):
+    memory = create_memory(max_len, num_memory_steps)
+    memory.priorities = torch.arange(max_len).float() * memory.valid
+    np.testing.assert_allclose(memory.probabilities.sum().item(), 1.0, rtol=1e-5)
+
+    np.random.seed(0)
+    _, idx, _ = memory.sample_batch(1000)
+    counts = torch.bincount(idx, minlength=max_len)[: len(memory)].float()
+    assert torch.all(counts[memory.probabilities == 0] == 0)
+
+
+def test_reset(max_len, num_memory_steps):
+    memory = create_memory(max_len, num_memory_steps)
+    memory.reset()
+    assert torch.all(memory.priorities == 0)
+    with pytest.raises(ValueError):
+        memory.sample_batch(4)
+
+
+def test_chunk(max_len, num_memory_steps):
+    memory = create_memory(max_len, num_memory_steps)
+    _, idx, _ = memory.sample_batch(16)
+    memory.update(idx, torch.rand(16))
+
+    new = PrioritizedExperienceReplay(
+        max_len=max_len, num_memory_steps=num_memory_steps
+    )
+    new.add_chunk(memory.get_chunk())
+    torch.testing.assert_close(new.probabilities, memory.probabilities)
+    torch.testing.assert_close(new.priorities, memory.priorities)
+    assert new.max_priority == memory.max_priority
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from rllib.dataset.experience_replay.segment_tree import MinTree, SumTree
+
+
+@pytest.fixture(params=[1, 7, 64])
+def capacity(request):
+    return request.param
+
+
+def test_sum_tree(capacity):
+    tree = SumTree(capacity)
+    values = np.random.rand(capacity)
+    tree[np.arange(capacity)] = values
+    np.testing.assert_allclose(tree.values, values)
+    np.testing.assert_allclose(tree.reduce(), values.sum())
+
+    tree[[0, 0]] = [3.0, 2.0]  # last write wins.
+    values[0] = 2.0
+    np.testing.assert_allclose(tree.reduce(), values.sum())
+
+
+def test_min_tree(capacity):
+    tree = MinTree(capacity)
+    values = np.random.rand(capacity)
+    tree[np.arange(capacity)] = values
+    np.testing.assert_allclose(tree.reduce(), values.min())
+
+    tree[np.argmin(values)] = np.inf
+    if capacity > 1:
+        np.testing.assert_allclose(tree.reduce(), np.sort(values)[1])
+
+
+def test_find_prefix_sum(capacity):
+    tree = SumTree(capacity)
+    values = np.random.rand(capacity)
+    values[::2] = 0.0
+    tree[np.arange(capacity)] = values
+    if tree.reduce() == 0:
+        return
+    prefix_sum = np.random.rand(100) * tree.reduce()
+    idx = tree.find_prefix_sum(prefix_sum)
+    np.testing.assert_array_equal(
+        idx, np.searchsorted(np.cumsum(values), prefix_sum, side="right")
+    )
+    assert np.all(values[tree.find_prefix_sum([0.0, tree.reduce()])] > 0)
+
+
+def test_sample():
+    tree = SumTree(4)
+    tree[[0, 1, 2, 3]] = [1.0, 0.0, 3.0, 0.0]
+    idx = tree.sample(10000)
+    assert set(np.unique(idx)) == {0, 2}
+    np.testing.assert_allclose(np.mean(idx == 2), 0.75, atol=1e-3)
@@ -0,0 +1,62 @@
+import torch
+
+from rllib.dataset import SimulatedExperienceReplay
+from rllib.dataset.datatypes import Observation
+
+
+def get_rollouts(num_rollouts, num_steps=3, start=0):
+    state = torch.arange(start, start + num_rollouts).float()
+    state = state.reshape(-1, 1, 1).expand(num_rollouts, num_steps, 2)
+    return Observation(
+        state=state,
+        action=torch.randn(num_rollouts, num_steps, 1),
+        reward=torch.randn(num_rollouts, num_steps, 1),
+        next_state=state + 1,
+        done=torch.zeros(num_rollouts, num_steps),
+        next_action=torch.full((num_steps,), float("nan")),
+    )
+
+
+def test_append():
+    memory = SimulatedExperienceReplay(max_len=10, refresh_ratio=0.3)
+    assert len(memory) == 0
+    assert memory.num_refresh == 10
+
+    memory.append(get_rollouts(6))
+    assert len(memory) == 6
+    assert not memory.is_full
+    assert memory.num_refresh == 4
+
+    memory.append(get_rollouts(6, start=6))
+    assert len(memory) == 10
+    assert memory.is_full
+    assert memory.num_refresh == 3
+    # The oldest rollouts are overwritten.
+    torch.testing.assert_close(
+        memory[torch.arange(10)].state[:, 0, 0],
+        torch.tensor([10, 11, 2, 3, 4, 5, 6, 7, 8, 9]).float(),
+    )
+
+    memory.append(get_rollouts(25, start=20))
+    torch.testing.assert_close(
+        memory[torch.arange(10)].state[:, 0, 0], torch.arange(35, 45).roll(2).float()
+    )
+
+    memory.reset()
+    assert len(memory) == 0
+
+
+def test_sample_batch():
+    memory = SimulatedExperienceReplay(max_len=10)
+    rollouts = get_rollouts(4)
+    memory.append(rollouts)
+
+    observation, indexes, weights = memory.sample_batch(7)
+    assert observation.state.shape == (7, 3, 2)
+    assert observation.reward.shape == (7, 3, 1)
+    assert torch.all(indexes < 4)
+    torch.testing.assert_close(weights, torch.ones(7))
+    torch.testing.assert_close(observation.action, rollouts.action[indexes])
+    # The fields without batch dimension are broadcast.
+    assert observation.next_action.shape == (7, 3)
+    assert torch.isnan(observation.next_action).all()
@@ -0,0 +1,114 @@
+import pytest
+import torch
+
+from rllib.dataset import ExperienceReplay, PrioritizedExperienceReplay
+from rllib.dataset.datatypes import Observation
+from rllib.dataset.experience_replay.tensor_memory import TensorMemory
+
+
+def get_observation(discrete, dim_state=4, dim_action=2):
+    if discrete:
+        return Observation.random_example(
+            dim_state=(), dim_action=(), num_states=dim_state, num_actions=dim_action
+        )
+    else:
+        return Observation.random_example(
+            dim_state=(dim_state,), dim_action=(dim_action,)
+        )
+
+
+def fill_memories(discrete, num_memory_steps, max_len=50, num_transitions=120):
+    object_memory = ExperienceReplay(max_len, num_memory_steps=num_memory_steps)
+    tensor_memory = ExperienceReplay(
+        max_len, num_memory_steps=num_memory_steps, storage="tensor"
+    )
+    for i in range(num_transitions):
+        observation = get_observation(discrete)
+        object_memory.append(observation)
+        tensor_memory.append(observation)
+        if i % 17 == 16:
+            object_memory.end_episode()
+            tensor_memory.end_episode()
+    return object_memory, tensor_memory
+
+
+class TestTensorMemory(object):
+    @pytest.fixture(scope="class", params=[True, False])
+    def discrete(self, request):
+        return request.param
+
+    @pytest.fixture(scope="class", params=[0, 1, 4])
+    def num_memory_steps(self, request):
+        return request.param
+
+    def test_set_get(self, discrete):
+        memory = TensorMemory(max_len=10)
+        observation = get_observation(discrete)
+        memory[3] = observation
+        assert memory[3] == observation
+        assert memory[3].state is not observation.state
+        assert memory.columns.state.shape == (10,) + observation.state.shape
+
+    def test_gather(self, discrete):
+        memory = TensorMemory(max_len=10)
+        observations = [get_observation(discrete) for _ in range(10)]
+        for i, observation in enumerate(observations):
+            memory[i] = observation
+
+        indexes = torch.tensor([7, 2, 2])
+        batch = memory[indexes]
+        for attribute, observation in zip(batch.state, indexes):
+            torch.testing.assert_close(attribute, observations[observation].state)
+        assert batch.reward.shape == (3,) + observations[0].reward.shape
+
+    def test_not_allocated(self):
+        with pytest.raises(IndexError):
+            TensorMemory(max_len=10)[0]
+
+    def test_storage_error(self):
+        with pytest.raises(ValueError):
+            ExperienceReplay(max_len=10, storage="other")
+
+    def test_equivalence(self, discrete, num_memory_steps):
+        object_memory, tensor_memory = fill_memories(discrete, num_memory_steps)
+
+        assert len(object_memory) == len(tensor_memory)
+        torch.testing.assert_close(object_memory.valid, tensor_memory.valid)
+        for i in object_memory.valid_indexes.tolist():
+            obs_object, idx_object, _ = object_memory[i]
+            obs_tensor, idx_tensor, _ = tensor_memory[i]
+            assert idx_object == idx_tensor
+            assert Observation(**obs_object) == Observation(**obs_tensor)
+
+        assert object_memory.all_raw == tensor_memory.all_raw
+
+    def test_sample_batch(self, discrete, num_memory_steps):
+        _, memory = fill_memories(discrete, num_memory_steps)
+        observation, idx, weight = memory.sample_batch(32)
+        for attribute in observation:
+            assert attribute.shape[:2] == (32, max(1, num_memory_steps))
+        assert idx.shape == (32,)
+        assert weight.shape == (32,)
+
+    def test_num_memory_steps(self, discrete, num_memory_steps):
+        _, memory = fill_memories(discrete, num_memory_steps)
+        memory.num_memory_steps = 2
+        assert isinstance(memory.memory, TensorMemory)
+        observation, *_ = memory.sample_batch(8)
+        assert observation.state.shape[:2] == (8, 2)
+
+    def test_split(self, discrete):
+        _, memory = fill_memories(discrete, 0)
+        train, test = memory.split(ratio=0.5)
+        assert train.storage == test.storage == "tensor"
+        assert len(train.valid_indexes) + len(test.valid_indexes) == len(memory)
+
+    def test_from_other(self, discrete, num_memory_steps):
+        memory = PrioritizedExperienceReplay(
+            max_len=50, num_memory_steps=num_memory_steps, storage="tensor"
+        )
+        for _ in range(20):
+            memory.append(get_observation(discrete))
+        new = PrioritizedExperienceReplay.from_other(memory)
+        assert new.storage == "tensor"
+        assert len(new) == len(memory)
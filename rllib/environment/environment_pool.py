@@ -0,0 +1,261 @@
+"""Pool of environments that are stepped in persistent subprocesses."""
+
+from multiprocessing.connection import wait
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from .gym_environment import GymEnvironment
+
+
+def _worker(index, env_name, seed, kwargs, pipe, buffers):
+    """Step an environment with the actions written in the shared buffers.
+
+    The states, rewards, and done flags are written in the shared buffers, only the
+    info dictionaries, or the errors, are sent through the pipe.
+    """
+    environment = GymEnvironment(env_name, seed=seed, **kwargs)
+    states, actions, rewards, dones = [buffer.numpy() for buffer in buffers]
+    while True:
+        command = pipe.recv()
+        if command == "step":
+            action = actions[index]
+            if environment.discrete_action:
+                action = action.item()
+            try:
+                next_state, reward, done, info = environment.step(action)
+                states[index], rewards[index], dones[index] = next_state, reward, done
+                pipe.send((True, info))
+            except Exception as e:  # The error is raised in the main process.
+                pipe.send((False, e))
+        elif command == "reset":
+            try:
+                states[index] = environment.reset()
+                pipe.send((True, None))
+            except Exception as e:
+                pipe.send((False, e))
+        else:  # close
+            environment.close()
+            pipe.close()
+            break
+
+
+class _PoolEnvironment(object):
+    """View of a single environment of an EnvironmentPool."""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+
+    def __getattr__(self, name):
+        """Get the attributes of the environment specification."""
+        return getattr(self.pool.environment, name)
+
+    def reset(self):
+        """Reset the environment."""
+        return self.pool.reset([self.index])[0]
+
+    def step(self, action):
+        """Step the environment."""
+        next_states, rewards, dones, infos = self.pool.step(
+            np.expand_dims(action, 0), [self.index]
+        )
+        return next_states[0], rewards[0], dones[0], infos[0]
+
+
+class EnvironmentPool(object):
+    """Pool of GymEnvironments that run in persistent subprocesses.
+
+    The actions, states, rewards, and done flags are exchanged through buffers in
+    shared memory, so that only commands and info dictionaries go through pipes.
+    The environments are stepped in parallel, either synchronously with `step', or
+    asynchronously with `step_async' and `step_ready', which returns the results of
+    the environments as soon as they are ready. An environment with a pending
+    asynchronous step can not be stepped or reset until `step_ready' returns it.
+    The errors of the environments are raised in the main process.
+
+    Indexing the pool returns a view of a single environment.
+
+    Parameters
+    ----------
+    env_name: str
+        environment name, e.g., of a MuJoCo environment.
+    num_envs: int
+        number of environments.
+    seed: int, optional
+        random seed, the environment i is seeded with seed + i.
+    kwargs: dict.
+        Keyword arguments of the environments.
+
+    Examples
+    --------
+    >>> pool = EnvironmentPool("Pendulum-v1", num_envs=2, seed=0)
+    >>> states = pool.reset()
+    >>> next_states, rewards, dones, infos = pool.step(np.zeros((2, 1)))
+    >>> next_states.shape, rewards.shape
+    ((2, 3), (2, 1))
+    >>> pool.close()
+    """
+
+    def __init__(self, env_name, num_envs, seed=None, **kwargs):
+        self.environment = GymEnvironment(env_name, seed=seed, **kwargs)
+        self.num_envs = num_envs
+
+        state_dtype = torch.long if self.environment.discrete_state else torch.double
+        action_dtype = torch.long if self.environment.discrete_action else torch.double
+        self._buffers = [
+            torch.zeros((num_envs,) + self.environment.dim_state, dtype=state_dtype),
+            torch.zeros((num_envs,) + self.environment.dim_action, dtype=action_dtype),
+            torch.zeros((num_envs,) + self.environment.dim_reward, dtype=torch.double),
+            torch.zeros(num_envs, dtype=torch.bool),
+        ]
+        for buffer in self._buffers:
+            buffer.share_memory_()
+        self._states, self._actions, self._rewards, self._dones = [
+            buffer.numpy() for buffer in self._buffers
+        ]
+
+        self._pipes, self._processes = [], []
+        for i in range(num_envs):
+            pipe, worker_pipe = mp.Pipe()
+            process = mp.Process(
+                target=_worker,
+                args=(
+                    i,
+                    env_name,
+                    None if seed is None else seed + i,
+                    kwargs,
+                    worker_pipe,
+                    self._buffers,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_pipe.close()
+            self._pipes.append(pipe)
+            self._processes.append(process)
+        self._waiting = set()
+
+    def __len__(self):
+        """Return the number of environments."""
+        return self.num_envs
+
+    def __getitem__(self, index):
+        """Return a view of the environment at `index'."""
+        return _PoolEnvironment(self, index)
+
+    def _indexes(self, indexes):
+        """Return the list of indexes, all the environments if it is None.
+
+        Raises
+        ------
+        RuntimeError
+            If some of the environments have a pending asynchronous step.
+        """
+        indexes = list(range(self.num_envs)) if indexes is None else list(indexes)
+        pending = self._waiting.intersection(indexes)
+        if len(pending):
+            raise RuntimeError(
+                f"The environments {sorted(pending)} have pending steps, "
+                f"call `step_ready' until they are ready."
+            )
+        return indexes
+
+    def _receive(self, indexes):
+        """Receive the replies of the environments at `indexes'.
+
+        The replies of all the environments are read before an error of a worker is
+        raised in the main process.
+        """
+        results, error = [], None
+        for i in indexes:
+            success, result = self._pipes[i].recv()
+            if not success and error is None:
+                error = result
+            results.append(result)
+        self._waiting.difference_update(indexes)
+        if error is not None:
+            raise error
+        return results
+
+    def reset(self, indexes=None):
+        """Reset the environments at `indexes', by default all of them.
+
+        Returns
+        -------
+        states: ndarray
+            States of the environments.
+        """
+        indexes = self._indexes(indexes)
+        for i in indexes:
+            self._pipes[i].send("reset")
+        self._receive(indexes)
+        return self._states[indexes].copy()
+
+    def step_async(self, actions, indexes=None):
+        """Start a step of the environments at `indexes' without waiting for it."""
+        indexes = self._indexes(indexes)
+        self._actions[indexes] = actions
+        for i in indexes:
+            self._pipes[i].send("step")
+            self._waiting.add(i)
+
+    def step_ready(self, timeout=None):
+        """Wait until some of the stepped environments are ready.
+
+        Parameters
+        ----------
+        timeout: float, optional.
+            Maximum number of seconds to wait, by default until one is ready.
+
+        Returns
+        -------
+        indexes: List[int]
+            Indexes of the ready environments, empty if no step is pending.
+        next_states: ndarray
+        rewards: ndarray
+        dones: ndarray
+        infos: List[dict]
+        """
+        if len(self._waiting) == 0:
+            pipes = []
+        else:
+            pipes = wait([self._pipes[i] for i in self._waiting], timeout=timeout)
+        indexes = sorted(self._pipes.index(pipe) for pipe in pipes)
+        infos = self._receive(indexes)
+        return (
+            indexes,
+            self._states[indexes].copy(),
+            self._rewards[indexes].copy(),
+            self._dones[indexes].copy(),
+            infos,
+        )
+
+    def step(self, actions, indexes=None):
+        """Step the environments at `indexes' in parallel and wait for all of them.
+
+        Returns
+        -------
+        next_states: ndarray
+        rewards: ndarray
+        dones: ndarray
+        infos: List[dict]
+        """
+        indexes = self._indexes(indexes)
+        self.step_async(actions, indexes)
+        infos = self._receive(indexes)
+        return (
+            self._states[indexes].copy(),
+            self._rewards[indexes].copy(),
+            self._dones[indexes].copy(),
+            infos,
+        )
+
+    def close(self):
+        """Close the environments and terminate the subprocesses."""
+        for pipe in self._pipes:
+            pipe.send("close")
+        for process in self._processes:
+            process.join()
+        self.environment.close()
@@ -0,0 +1,57 @@
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from torch import Tensor
+
+from rllib.dataset.datatypes import Action, State
+
+from .gym_environment import GymEnvironment
+
+def _worker(
+    index: int,
+    env_name: str,
+    seed: Optional[int],
+    kwargs: Dict[str, Any],
+    pipe: Connection,
+    buffers: List[Tensor],
+) -> None: ...
+
+class _PoolEnvironment(object):
+    pool: EnvironmentPool
+    index: int
+    def __init__(self, pool: EnvironmentPool, index: int) -> None: ...
+    def __getattr__(self, name: str) -> Any: ...
+    def reset(self) -> State: ...
+    def step(self, action: Action) -> Tuple[State, np.ndarray, bool, dict]: ...
+
+class EnvironmentPool(object):
+    environment: GymEnvironment
+    num_envs: int
+    _buffers: List[Tensor]
+    _states: np.ndarray
+    _actions: np.ndarray
+    _rewards: np.ndarray
+    _dones: np.ndarray
+    _pipes: List[Connection]
+    _processes: List[BaseProcess]
+    _waiting: Set[int]
+    def __init__(
+        self, env_name: str, num_envs: int, seed: Optional[int] = ..., **kwargs: Any
+    ) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, index: int) -> _PoolEnvironment: ...
+    def _indexes(self, indexes: Optional[List[int]]) -> List[int]: ...
+    def _receive(self, indexes: List[int]) -> List[Optional[dict]]: ...
+    def reset(self, indexes: Optional[List[int]] = ...) -> np.ndarray: ...
+    def step_async(
+        self, actions: np.ndarray, indexes: Optional[List[int]] = ...
+    ) -> None: ...
+    def step_ready(
+        self, timeout: Optional[float] = ...
+    ) -> Tuple[List[int], np.ndarray, np.ndarray, np.ndarray, List[dict]]: ...
+    def step(
+        self, actions: np.ndarray, indexes: Optional[List[int]] = ...
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[dict]]: ...
+    def close(self) -> None: ...
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from rllib.environment import EnvironmentPool, GymEnvironment
+
+
+@pytest.fixture(params=["Pendulum-v1", "CartPole-v0", "Taxi-v3"])
+def env_name(request):
+    return request.param
+
+
+def random_actions(environment, num_envs):
+    return np.stack([environment.action_space.sample() for _ in range(num_envs)])
+
+
+def test_step(env_name):
+    num_envs = 3
+    pool = EnvironmentPool(env_name, num_envs=num_envs, seed=0)
+    environments = [GymEnvironment(env_name, seed=i) for i in range(num_envs)]
+
+    states = pool.reset()
+    for i, environment in enumerate(environments):
+        np.testing.assert_allclose(states[i], environment.reset(), rtol=1e-6)
+
+    for _ in range(5):
+        actions = random_actions(pool.environment, num_envs)
+        next_states, rewards, dones, infos = pool.step(actions)
+        assert len(infos) == num_envs
+        for i, environment in enumerate(environments):
+            action = actions[i].item() if environment.discrete_action else actions[i]
+            next_state, reward, done, _ = environment.step(action)
+            np.testing.assert_allclose(next_states[i], next_state, rtol=1e-6)
+            np.testing.assert_allclose(rewards[i], reward, rtol=1e-6)
+            assert dones[i] == done
+    pool.close()
+
+
+def test_step_ready():
+    pool = EnvironmentPool("Pendulum-v1", num_envs=4, seed=0)
+    pool.reset()
+    pool.step_async(np.zeros((2, 1)), indexes=[1, 3])
+
+    ready = []
+    while len(ready) < 2:
+        indexes, next_states, rewards, dones, infos = pool.step_ready()
+        assert next_states.shape == (len(indexes), 3)
+        ready += indexes
+    assert sorted(ready) == [1, 3]
+
+    next_state, reward, done, info = pool[0].step(np.zeros(1))
+    assert next_state.shape == (3,)
+    assert pool[0].dim_state == pool.environment.dim_state
+    pool.close()
+
+
+def test_step_ready_without_pending_steps():
+    pool = EnvironmentPool("Pendulum-v1", num_envs=2, seed=0)
+    pool.reset()
+    indexes, next_states, rewards, dones, infos = pool.step_ready()
+    assert indexes == [] and infos == []
+    assert next_states.shape == (0, 3)
+    pool.close()
+
+
+def test_pending_steps():
+    pool = EnvironmentPool("Pendulum-v1", num_envs=2, seed=0)
+    pool.reset()
+    pool.step_async(np.zeros((1, 1)), indexes=[1])
+    with pytest.raises(RuntimeError):
+        pool.step(np.zeros((2, 1)))
+    with pytest.raises(RuntimeError):
+        pool[1].reset()
+    pool.step(np.zeros((1, 1)), indexes=[0])  # Other environments can be stepped.
+    assert pool.step_ready()[0] == [1]
+    pool.step(np.zeros((2, 1)))
+    pool.close()
+
+
+def test_worker_error():
+    pool = EnvironmentPool("CartPole-v0", num_envs=2, seed=0)
+    pool.reset()
+    with pytest.raises(AssertionError):  # CartPole asserts that the action is valid.
+        pool.step(np.array([0, 5]))
+    pool.reset()
+    pool.step(np.array([0, 1]))
+    pool.close()
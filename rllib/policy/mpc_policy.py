@@ -18,9 +18,14 @@ class MPCPolicy(AbstractPolicy):
     solver_frequency: int
         How often to call the MPC solver.
 
+    time_budget: float, optional.
+        Wall-clock seconds per call to the solver, see `MPCSolver'.
+
     """
 
-    def __init__(self, mpc_solver, solver_frequency=1, *args, **kwargs):
+    def __init__(
+        self, mpc_solver, solver_frequency=1, time_budget=None, *args, **kwargs
+    ):
         super().__init__(
             dim_state=mpc_solver.dynamical_model.dim_state,
             dim_action=mpc_solver.dynamical_model.dim_action,
@@ -31,6 +36,8 @@ class MPCPolicy(AbstractPolicy):
         self.solver_frequency = solver_frequency
         self.action_sequence = None
         self.solver = mpc_solver
+        if time_budget is not None:
+            self.solver.time_budget = time_budget
         if solver_frequency > self.solver.num_model_steps:
             raise ValueError(
                 f"""Solver num model steps has to be larger than the solver frequency.
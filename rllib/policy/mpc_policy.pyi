@@ -16,6 +16,7 @@ class MPCPolicy(AbstractPolicy):
         self,
         mpc_solver: MPCSolver,
         solver_frequency: int = ...,
+        time_budget: Optional[float] = ...,
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
@@ -0,0 +1,183 @@
+"""Incremental checkpoints of agents."""
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import torch.nn as nn
+from torch.optim.optimizer import Optimizer
+
+from rllib.dataset.experience_replay import ExperienceReplay
+from rllib.util.utilities import get_random_state, set_random_state
+
+
+class Checkpointer(object):
+    """Incremental checkpoints of the attributes of an agent.
+
+    A checkpoint with name `name' is stored in the `checkpoint' sub-directory as:
+        - `{name}_modules.pt': state dicts of the networks and optimizers.
+        - `{name}_data.pt': the other attributes, e.g., the counters.
+        - `{name}_random_state.pt': numpy and torch random states.
+        - `replay/{key}/{start}.pt': append-only chunks with the transitions that
+          were appended to the experience replay `key' since the last checkpoint,
+          see `ExperienceReplay.get_chunk'.
+
+    Hence, the cost of a checkpoint scales with the number of new transitions and
+    not with the size of the replay buffers. Once the chunks of a buffer cover more
+    than twice its length, they are compacted into a single chunk.
+    Memory-mapped buffers already live on disk, so only their path is saved.
+
+    Parameters
+    ----------
+    background: bool, optional (default=False).
+        Write the files in a background thread. The attributes are copied when
+        `save' is called and the files are written in order.
+    """
+
+    def __init__(self, background=False):
+        self.background = background
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._futures = []
+        self._data_counts = dict()
+        self._first_counts = dict()
+
+    @staticmethod
+    def _is_replay(value):
+        """Check if `value' is a replay buffer whose data is saved in chunks."""
+        return isinstance(value, ExperienceReplay) and value.storage != "memmap"
+
+    def _replay_job(self, replay_dir, memory):
+        """Get the chunk of `memory' to save and whether it replaces the others."""
+        data_count = self._data_counts.get(replay_dir)
+        if data_count == memory.data_count:
+            return None
+        compact = (
+            data_count is None  # Stale chunks of other runs are removed.
+            or memory.data_count < data_count  # The buffer was reset.
+            or memory.data_count - self._first_counts[replay_dir] > 2 * memory.max_len
+        )
+        chunk = memory.get_chunk(0 if compact else data_count)
+        if compact:
+            self._first_counts[replay_dir] = chunk["start"]
+        self._data_counts[replay_dir] = memory.data_count
+        path = os.path.join(replay_dir, f"{chunk['start']:012d}.pt")
+        return path, chunk, compact
+
+    def save(self, state, directory, name="last", save_replay=True):
+        """Save a checkpoint of the attributes in `state'.
+
+        Parameters
+        ----------
+        state: dict.
+            Attributes to save, the networks and optimizers are saved with their
+            state dicts.
+        directory: str.
+            Directory where the `checkpoint' sub-directory is created.
+        name: str, optional (default="last").
+            Name of the checkpoint.
+        save_replay: bool, optional (default=True).
+            Flag that indicates if the replay buffers are saved.
+        """
+        self._raise_errors()
+        directory = os.path.join(directory, "checkpoint")
+        modules, data, jobs = {}, {}, []
+        for key, value in state.items():
+            if isinstance(value, nn.Module) or isinstance(value, Optimizer):
+                modules[key] = value.state_dict()
+            elif self._is_replay(value):
+                if save_replay:
+                    job = self._replay_job(
+                        os.path.join(directory, "replay", key), value
+                    )
+                    jobs += [] if job is None else [job]
+            else:
+                data[key] = value
+
+        if self.background:  # The agent keeps training while the files are written.
+            modules, data = copy.deepcopy(modules), copy.deepcopy(data)
+        jobs += [
+            (os.path.join(directory, f"{name}_modules.pt"), modules, False),
+            (os.path.join(directory, f"{name}_data.pt"), data, False),
+            (
+                os.path.join(directory, f"{name}_random_state.pt"),
+                get_random_state(),
+                False,
+            ),
+        ]
+        if self.background:
+            self._futures.append(self._executor.submit(self._write, jobs))
+        else:
+            self._write(jobs)
+
+    @staticmethod
+    def _write(jobs):
+        """Write the files of the jobs atomically, in order."""
+        for path, obj, replace_others in jobs:
+            directory, filename = os.path.split(path)
+            os.makedirs(directory, exist_ok=True)
+            torch.save(obj, f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            if replace_others:
+                for other in os.listdir(directory):
+                    if other != filename:
+                        os.remove(os.path.join(directory, other))
+
+    def load(self, state, directory, name="last"):
+        """Load a checkpoint into the attributes in `state'.
+
+        The networks, optimizers, and replay buffers are loaded in place and the
+        random state is restored.
+
+        Returns
+        -------
+        data: dict.
+            The other attributes, which the caller sets.
+        """
+        self.wait()
+        directory = os.path.join(directory, "checkpoint")
+        modules = self._load(os.path.join(directory, f"{name}_modules.pt"))
+        data = self._load(os.path.join(directory, f"{name}_data.pt"))
+        for key, value in state.items():
+            if isinstance(value, nn.Module) or isinstance(value, Optimizer):
+                value.load_state_dict(modules[key])
+            elif self._is_replay(value):
+                self._load_replay(os.path.join(directory, "replay", key), value)
+        set_random_state(self._load(os.path.join(directory, f"{name}_random_state.pt")))
+        return data
+
+    def _load_replay(self, replay_dir, memory):
+        """Rebuild `memory' by applying its chunks in order.
+
+        The temporary files of writes that were interrupted are skipped.
+        """
+        if not os.path.exists(replay_dir):
+            return
+        memory.reset()
+        filenames = [f for f in os.listdir(replay_dir) if f.endswith(".pt")]
+        for i, filename in enumerate(sorted(filenames)):
+            chunk = self._load(os.path.join(replay_dir, filename))
+            if i == 0:
+                self._first_counts[replay_dir] = chunk["start"]
+            memory.add_chunk(chunk)
+        self._data_counts[replay_dir] = memory.data_count
+
+    @staticmethod
+    def _load(path):
+        """Load a file saved with torch.save."""
+        return torch.load(path, weights_only=False)
+
+    def _raise_errors(self):
+        """Raise the errors of the background writes that finished."""
+        pending = []
+        for future in self._futures:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        self._futures = pending
+
+    def wait(self):
+        """Wait until all the background writes finish."""
+        for future in self._futures:
+            future.result()
+        self._futures = []
@@ -0,0 +1,34 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from rllib.dataset.experience_replay import ExperienceReplay
+
+class Checkpointer(object):
+    background: bool
+    _executor: Optional[ThreadPoolExecutor]
+    _futures: List[Future]
+    _data_counts: Dict[str, int]
+    _first_counts: Dict[str, int]
+    def __init__(self, background: bool = ...) -> None: ...
+    @staticmethod
+    def _is_replay(value: Any) -> bool: ...
+    def _replay_job(
+        self, replay_dir: str, memory: ExperienceReplay
+    ) -> Optional[Tuple[str, Dict[str, Any], bool]]: ...
+    def save(
+        self,
+        state: Dict[str, Any],
+        directory: str,
+        name: str = ...,
+        save_replay: bool = ...,
+    ) -> None: ...
+    @staticmethod
+    def _write(jobs: List[Tuple[str, Any, bool]]) -> None: ...
+    def load(
+        self, state: Dict[str, Any], directory: str, name: str = ...
+    ) -> Dict[str, Any]: ...
+    def _load_replay(self, replay_dir: str, memory: ExperienceReplay) -> None: ...
+    @staticmethod
+    def _load(path: str) -> Any: ...
+    def _raise_errors(self) -> None: ...
+    def wait(self) -> None: ...
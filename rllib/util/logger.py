@@ -1,9 +1,12 @@
 """Implementation of a Logger class."""
 import json
+import numbers
 import os
 import shutil
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 import numpy as np
 import torch
@@ -20,6 +23,62 @@ def safe_make_dir(dir_name):
     return dir_name
 
 
+class StatisticColumn(object):
+    """Column with the values of a statistic and their running aggregates.
+
+    The values are stored in an array that doubles its capacity when it is full, so
+    appending a value is O(1) amortized. The aggregates are O(1) lookups.
+
+    Examples
+    --------
+    >>> column = StatisticColumn()
+    >>> for value in [1.0, 3.0, 2.0]:
+    ...     column.append(value)
+    >>> column.last, column.max, column.mean, column.window_mean(2)
+    (2.0, 3.0, 2.0, 2.5)
+    """
+
+    def __init__(self, capacity=16):
+        self._data = np.zeros(capacity)
+        self._size = 0
+        self._sum = 0.0
+        self.min = float("inf")
+        self.max = -float("inf")
+
+    def __len__(self):
+        """Return the number of values."""
+        return self._size
+
+    def append(self, value):
+        """Append a value and update the aggregates."""
+        if self._size == len(self._data):
+            self._data = np.concatenate((self._data, np.zeros(self._size)))
+        self._data[self._size] = value
+        self._size += 1
+        self._sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def values(self):
+        """Return an array with the values."""
+        return self._data[: self._size]
+
+    @property
+    def last(self):
+        """Return the last value."""
+        return self._data[self._size - 1].item()
+
+    @property
+    def mean(self):
+        """Return the mean of the values."""
+        return self._sum / self._size
+
+    def window_mean(self, window):
+        """Return the mean of the last `window' values."""
+        return self.values[-window:].mean().item()
+
+
 class Logger(object):
     """Class that implements a logger of statistics.
 
@@ -32,10 +91,17 @@ class Logger(object):
         The folder is runs/`name'/`comment_date'.
     tensorboard: bool, optional.
         Flag that indicates whether or not to save the results in the tensorboard.
+
+    Notes
+    -----
+    The numeric end-of-episode statistics are indexed in a `StatisticColumn' per
+    key, so that `get', `get_column' and `__str__' do not scan all the episodes.
     """
 
     def __init__(self, name, comment="", tensorboard=False):
         self.statistics = list()
+        self.columns = defaultdict(StatisticColumn)
+        self._unindexed_keys = set()
         self.current = dict()
         self.all = defaultdict(list)
 
@@ -68,12 +134,12 @@ class Logger(object):
         """Return parameter string of logger."""
         str_ = ""
         for key in sorted(self.keys):
-            values = self.get(key)
+            column = self.get_column(key)
             str_ += " ".join(key.split("_")).title().ljust(17)
-            str_ += f"Last: {values[-1]:.2g}".ljust(15)
-            str_ += f"Avg: {np.mean(values):.2g}".ljust(15)
-            str_ += f"MAvg: {np.mean(values[-10:]):.2g}".ljust(15)
-            str_ += f"Range: ({np.min(values):.2g},{np.max(values):.2g})\n"
+            str_ += f"Last: {column.last:.2g}".ljust(15)
+            str_ += f"Avg: {column.mean:.2g}".ljust(15)
+            str_ += f"MAvg: {column.window_mean(10):.2g}".ljust(15)
+            str_ += f"Range: ({column.min:.2g},{column.max:.2g})\n"
 
         return str_
 
@@ -83,7 +149,32 @@ class Logger(object):
         It collects all end-of-episode data stored in statistic and returns a list with
         such values.
         """
-        return [statistic[key] for statistic in self.statistics if key in statistic]
+        if key in self._unindexed_keys:
+            return [statistic[key] for statistic in self.statistics if key in statistic]
+        return self.get_column(key).values.tolist()
+
+    def get_column(self, key):
+        """Return the column with the end-of-episode statistics of a specific key."""
+        if key in self._unindexed_keys:
+            raise TypeError(f"The statistics of {key} are not numeric.")
+        return self.columns.get(key, StatisticColumn())
+
+    def _add_statistics(self, data):
+        """Add the statistics of an episode and index them."""
+        for key, value in data.items():
+            if not isinstance(value, numbers.Real):
+                self._unindexed_keys.add(key)
+            elif key not in self._unindexed_keys:
+                self.columns[key].append(value)
+        self.statistics.append(data)
+
+    def _build_columns(self):
+        """Build the columns of the statistics."""
+        statistics, self.statistics = self.statistics, list()
+        self.columns = defaultdict(StatisticColumn)
+        self._unindexed_keys = set()
+        for data in statistics:
+            self._add_statistics(data)
 
     def update(self, **kwargs):
         """Update the statistics for the current episode.
@@ -146,7 +237,7 @@ class Logger(object):
                         f"average/{key}", value, global_step=self.episode
                     )
 
-        self.statistics.append(data)
+        self._add_statistics(data)
         self.current = dict()
         self.episode += 1
 
@@ -168,6 +259,7 @@ class Logger(object):
 
         with open(f"{log_dir}/statistics.json", "r") as f:
             self.statistics = json.load(f)
+        self._build_columns()
         with open(f"{log_dir}/all.json", "r") as f:
             self.all = json.load(f)
         for key in self.all.keys():
@@ -211,3 +303,228 @@ class Logger(object):
             self.load_from_json()  # If json files in log_dir, then load them.
         except FileNotFoundError:
             pass
+
+
+class StreamingLogger(Logger):
+    """Logger that streams the statistics to append-only files.
+
+    The values passed to `update' are buffered in preallocated arrays. When the
+    buffer is full, or when the statistics are exported, the buffered values and the
+    finished episodes are appended, in a background thread, to:
+        - `all.jsonl': one line {key: values} per flush.
+        - `statistics.jsonl': one line per episode.
+    and to the tensorboard. Hence, exporting costs O(new values) and not O(history).
+
+    Only the last `window' values of each key are kept in `all', and only the last
+    `window' episodes are kept in `statistics'. The numeric end-of-episode statistics
+    are kept for all the episodes in the columns, so `get' and `get_column' return
+    the whole history of numeric keys, but only the last `window' values of the
+    non-numeric keys.
+
+    Parameters
+    ----------
+    name: str
+        Name of logger. This create a folder at runs/`name'.
+    comment: str, optional.
+        This is useful to separate equivalent runs.
+        The folder is runs/`name'/`comment_date'.
+    tensorboard: bool, optional.
+        Flag that indicates whether or not to save the results in the tensorboard.
+    buffer_size: int, optional.
+        Number of values that are buffered before they are flushed.
+    window: int, optional.
+        Number of values of each key, and of episodes, that are kept in memory.
+    background: bool, optional.
+        Flag that indicates whether or not to write the files in a background thread.
+    """
+
+    def __init__(
+        self,
+        name,
+        comment="",
+        tensorboard=False,
+        buffer_size=1024,
+        window=100,
+        background=True,
+    ):
+        super().__init__(name, comment=comment, tensorboard=tensorboard)
+        self.window = window
+        self.statistics = deque(maxlen=window)
+        self.all = defaultdict(partial(deque, maxlen=window))
+
+        self._key_names = []
+        self._key_ids = dict()
+        self._buffer_size = buffer_size
+        self._buffer_ptr = 0
+        self._buffer = {
+            "key": np.zeros(buffer_size, dtype=np.int64),
+            "value": np.zeros(buffer_size),
+            "mean": np.zeros(buffer_size),
+            "count": np.zeros(buffer_size, dtype=np.int64),
+            "episode": np.zeros(buffer_size, dtype=np.int64),
+        }
+        self._pending_statistics = []
+
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._future = None
+
+    def __len__(self):
+        """Return the number of episodes."""
+        return self.episode
+
+    def _build_columns(self):
+        """Build the columns of the statistics, keeping the last episodes."""
+        super()._build_columns()
+        self.statistics = deque(self.statistics, maxlen=self.window)
+
+    @staticmethod
+    def _to_scalar(value):
+        """Convert a value to a python scalar, averaging arrays."""
+        if isinstance(value, (float, int)):
+            return 0.0 if value != value else value  # Fast path, nan to zero.
+        if isinstance(value, torch.Tensor):
+            value = value.detach().cpu().numpy()
+        value = np.nan_to_num(value)
+        if isinstance(value, np.ndarray):
+            return float(np.mean(value))
+        return value.item() if isinstance(value, np.generic) else value
+
+    def update(self, **kwargs):
+        """Update the statistics for the current episode.
+
+        Parameters
+        ----------
+        kwargs: dict
+            Any kwargs passed to update is converted to a scalar and averaged
+            over the course of an episode.
+        """
+        for key, value in kwargs.items():
+            value = self._to_scalar(value)
+            if key not in self._key_ids:
+                self.keys.add(key)
+                self._key_ids[key] = len(self._key_names)
+                self._key_names.append(key)
+
+            count, old_value = self.current.get(key, (0, 0.0))
+            count += 1
+            mean = old_value + (value - old_value) / count
+            self.current[key] = (count, mean)
+            self.all[key].append(value)
+
+            ptr = self._buffer_ptr
+            self._buffer["key"][ptr] = self._key_ids[key]
+            self._buffer["value"][ptr] = value
+            self._buffer["mean"][ptr] = mean
+            self._buffer["count"][ptr] = count
+            self._buffer["episode"][ptr] = self.episode
+            self._buffer_ptr += 1
+            if self._buffer_ptr == self._buffer_size:
+                self.flush()
+
+    def end_episode(self, **kwargs):
+        """Finalize collected data and add final fixed values.
+
+        Parameters
+        ----------
+        kwargs : dict
+            Any kwargs passed to end_episode overwrites tracked data if present.
+            This can be used to store fixed values that are tracked per episode
+            and do not need to be averaged.
+        """
+        data = {key: value[1] for key, value in self.current.items()}
+        data.update(kwargs)
+
+        for key, value in data.items():
+            self.keys.add(key)
+            if isinstance(value, float) or isinstance(value, int):
+                self.all[key].append(value)
+
+        self._add_statistics(data)
+        self._pending_statistics.append((self.episode, data))
+        self.current = dict()
+        self.episode += 1
+
+    def flush(self, wait=False):
+        """Write the buffered values and the finished episodes.
+
+        Parameters
+        ----------
+        wait: bool, optional.
+            Flag that indicates whether or not to wait until the files are written.
+        """
+        size = self._buffer_ptr
+        buffer = {name: array[:size].copy() for name, array in self._buffer.items()}
+        job = partial(
+            self._write,
+            log_dir=self.log_dir,
+            writer=self.writer,
+            key_names=list(self._key_names),
+            buffer=buffer,
+            statistics=self._pending_statistics,
+        )
+        self._buffer_ptr = 0
+        self._pending_statistics = []
+
+        if self._future is not None:
+            self._future.result()  # Raise the errors of the previous write.
+        if self._executor is None:
+            job()
+            self._future = None
+        else:
+            self._future = self._executor.submit(job)
+            if wait:
+                self._future.result()
+
+    @staticmethod
+    def _write(log_dir, writer, key_names, buffer, statistics):
+        """Append the values and the episode statistics to the files."""
+        values = defaultdict(list)
+        for key, value in zip(buffer["key"], buffer["value"]):
+            values[key_names[key]].append(float(value))
+        if len(values):
+            with open(f"{log_dir}/all.jsonl", "a") as f:
+                f.write(json.dumps(values) + "\n")
+        if len(statistics):
+            with open(f"{log_dir}/statistics.jsonl", "a") as f:
+                for _, data in statistics:
+                    f.write(json.dumps(data) + "\n")
+
+        if writer is None:
+            return
+        for key, mean, count, episode in zip(
+            buffer["key"], buffer["mean"], buffer["count"], buffer["episode"]
+        ):
+            writer.add_scalar(
+                f"episode_{episode}/{key_names[key]}", mean, global_step=count
+            )
+        for episode, data in statistics:
+            for key, value in data.items():
+                if isinstance(value, float) or isinstance(value, int):
+                    writer.add_scalar(f"average/{key}", value, global_step=episode)
+
+    def export_to_json(self):
+        """Append the new statistics to the json lines files."""
+        self.flush()
+
+    def load_from_json(self, log_dir=None):
+        """Load the statistics from the json lines files."""
+        log_dir = log_dir if log_dir is not None else self.log_dir
+        self.flush(wait=True)
+
+        with open(f"{log_dir}/statistics.jsonl", "r") as f:
+            self.statistics = [json.loads(line) for line in f]
+        for statistic in self.statistics:
+            self.keys.update(statistic.keys())
+        self.episode = len(self.statistics)
+        self._build_columns()
+        self.all = defaultdict(partial(deque, maxlen=self.window))
+        with open(f"{log_dir}/all.jsonl", "r") as f:
+            for line in f:
+                for key, values in json.loads(line).items():
+                    self.all[key].extend(values)
+        self.keys.update(self.all.keys())
+
+    def change_log_dir(self, new_log_dir):
+        """Change log directory, once the pending values are written."""
+        self.flush(wait=True)
+        super().change_log_dir(new_log_dir)
@@ -1,14 +1,34 @@
 """Implementation of a Logger class."""
 
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import tensorboardX
 
 def safe_make_dir(dir_name: str) -> str: ...
 
+class StatisticColumn(object):
+    _data: np.ndarray
+    _size: int
+    _sum: float
+    min: float
+    max: float
+    def __init__(self, capacity: int = ...) -> None: ...
+    def __len__(self) -> int: ...
+    def append(self, value: float) -> None: ...
+    @property
+    def values(self) -> np.ndarray: ...
+    @property
+    def last(self) -> float: ...
+    @property
+    def mean(self) -> float: ...
+    def window_mean(self, window: int) -> float: ...
+
 class Logger(object):
     statistics: List[Dict[str, float]]  # statistic[i_episode] = Summary(i_episode)
+    columns: Dict[str, StatisticColumn]
+    _unindexed_keys: set
     current: Dict[str, Tuple[int, float]]  # Dict[key, (count, value)]
     all: Dict[str, List[float]]
     writer: Optional[tensorboardX.SummaryWriter]
@@ -23,6 +43,9 @@ class Logger(object):
     def __getitem__(self, item: int) -> Dict[str, float]: ...
     def __str__(self) -> str: ...
     def get(self, key: str) -> List[float]: ...
+    def get_column(self, key: str) -> StatisticColumn: ...
+    def _add_statistics(self, data: Dict[str, float]) -> None: ...
+    def _build_columns(self) -> None: ...
     def update(self, **kwargs: Any) -> None: ...
     def end_episode(self, **kwargs: Any) -> None: ...
     def save_hparams(self, hparams: Dict) -> None: ...
@@ -31,3 +54,37 @@ class Logger(object):
     def log_hparams(self, hparams: Dict, metrics: Optional[Dict] = ...) -> None: ...
     def delete_directory(self) -> None: ...
     def change_log_dir(self, new_log_dir: str) -> None: ...
+
+class StreamingLogger(Logger):
+    statistics: Deque[Dict[str, float]]  # type: ignore
+    all: Dict[str, Deque[float]]
+    window: int
+    _key_names: List[str]
+    _key_ids: Dict[str, int]
+    _buffer_size: int
+    _buffer_ptr: int
+    _buffer: Dict[str, np.ndarray]
+    _pending_statistics: List[Tuple[int, Dict[str, float]]]
+    _executor: Optional[ThreadPoolExecutor]
+    _future: Optional[Future]
+    def __init__(
+        self,
+        name: str,
+        comment: str = ...,
+        tensorboard: bool = ...,
+        buffer_size: int = ...,
+        window: int = ...,
+        background: bool = ...,
+    ) -> None: ...
+    def _build_columns(self) -> None: ...
+    @staticmethod
+    def _to_scalar(value: Any) -> float: ...
+    def flush(self, wait: bool = ...) -> None: ...
+    @staticmethod
+    def _write(
+        log_dir: str,
+        writer: Optional[tensorboardX.SummaryWriter],
+        key_names: List[str],
+        buffer: Dict[str, np.ndarray],
+        statistics: List[Tuple[int, Dict[str, float]]],
+    ) -> None: ...
@@ -1,5 +1,6 @@
 """Implementation of different Neural Networks with pytorch."""
 
+import math
 from functools import reduce
 
 import torch
@@ -8,7 +9,12 @@ import torch.nn as nn
 
 from rllib.util.utilities import safe_cholesky
 
-from .utilities import inverse_softplus, parse_layers, update_parameters
+from .utilities import (
+    inverse_softplus,
+    parse_layers,
+    parse_nonlinearity,
+    update_parameters,
+)
 
 
 class FeedForwardNN(nn.Module):
@@ -244,7 +250,7 @@ class Ensemble(HeteroGaussianNN):
         - 'set_head': set a single head with .set_head() and return its output.
         This is useful for Thompson's Sampling (for example).
         - 'set_head_idx': set a head with .set_head_idx() and return its output.
-        Crucially, it has to have the same batch_size as the predicted state-actions.
+        Crucially, it has to broadcast with the batch shape of the state-actions.
     """
 
     num_heads: int
@@ -329,8 +335,10 @@ class Ensemble(HeteroGaussianNN):
             mean = out.gather(-1, head_idx).squeeze(-1)
             scale = torch.diag_embed(scale.gather(-1, head_idx).squeeze(-1))
         elif self.prediction_strategy == "set_head_idx":  # TS-INF
-            mean = out.gather(-1, self.head_idx)
-            scale = torch.diag_embed(scale.gather(-1, self.head_idx))
+            head_idx = self.head_indexes.unsqueeze(-1).unsqueeze(-1)
+            head_idx = head_idx.expand_as(out[..., :1])
+            mean = out.gather(-1, head_idx).squeeze(-1)
+            scale = torch.diag_embed(scale.gather(-1, head_idx).squeeze(-1))
         elif self.prediction_strategy == "multi_head":
             mean = out.transpose(-1, -2)
             scale = torch.diag_embed(scale.transpose(-1, -2))
@@ -425,3 +433,244 @@ class FelixNet(FeedForwardNN):
             self._scale(x) + self._init_scale_transformed
         ).clamp(self._min_scale, self._max_scale)
         return mean, torch.diag_embed(scale)
+
+
+class EnsembleLinear(nn.Module):
+    """Linear layers of `num_heads' independent networks with stacked weights.
+
+    The weights have shape [num_heads x in_features x out_features] and the layers
+    are evaluated with a single batched matrix multiplication. Each layer is
+    initialized as a nn.Linear layer.
+
+    Parameters
+    ----------
+    in_features: int
+        input dimension.
+    out_features: int
+        output dimension.
+    num_heads: int
+        number of independent layers.
+    bias: bool, optional
+        flag that indicates if the layers have a bias term or not.
+    """
+
+    def __init__(self, in_features, out_features, num_heads, bias=True):
+        super().__init__()
+        self.in_features = in_features
+        self.out_features = out_features
+        self.num_heads = num_heads
+        self.weight = nn.Parameter(torch.empty(num_heads, in_features, out_features))
+        if bias:
+            self.bias = nn.Parameter(torch.empty(num_heads, 1, out_features))
+        else:
+            self.register_parameter("bias", None)
+        self.reset_parameters()
+
+    def reset_parameters(self):
+        """Initialize the parameters as nn.Linear does."""
+        bound = 1 / math.sqrt(self.in_features) if self.in_features > 0 else 0
+        nn.init.uniform_(self.weight, -bound, bound)
+        if self.bias is not None:
+            nn.init.uniform_(self.bias, -bound, bound)
+
+    @classmethod
+    def from_linear(cls, layers):
+        """Stack the parameters of a list of nn.Linear layers."""
+        out = cls(
+            layers[0].in_features,
+            layers[0].out_features,
+            num_heads=len(layers),
+            bias=layers[0].bias is not None,
+        )
+        out.load_state_dict(
+            out.stack_state_dicts([layer.state_dict() for layer in layers])
+        )
+        return out
+
+    @staticmethod
+    def stack_state_dicts(state_dicts):
+        """Stack the state dicts of nn.Linear layers into a single state dict."""
+        return {
+            key: torch.stack(
+                [
+                    state_dict[key].T if key == "weight" else state_dict[key][None]
+                    for state_dict in state_dicts
+                ]
+            )
+            for key in state_dicts[0]
+        }
+
+    def forward(self, x):
+        """Execute forward computation of the layers.
+
+        Parameters
+        ----------
+        x: torch.Tensor.
+            Tensor of size [num_heads x batch_size x in_features].
+
+        Returns
+        -------
+        out: torch.Tensor.
+            Tensor of size [num_heads x batch_size x out_features].
+        """
+        batch_shape = x.shape[1:-1]
+        x = x.reshape(self.num_heads, -1, self.in_features)
+        if self.bias is None:
+            out = torch.bmm(x, self.weight)
+        else:
+            out = torch.baddbmm(self.bias, x, self.weight)
+        return out.reshape(self.num_heads, *batch_shape, self.out_features)
+
+    def extra_repr(self):
+        """Get the representation of the layers."""
+        return (
+            f"in_features={self.in_features}, out_features={self.out_features}, "
+            f"num_heads={self.num_heads}, bias={self.bias is not None}"
+        )
+
+
+class EnsembleFeedForwardNN(nn.Module):
+    """Ensemble of `num_heads' independent Feed-Forward Neural Networks.
+
+    Contrary to `Ensemble', the heads do not share the hidden layers. The weights of
+    all the networks are stacked in EnsembleLinear layers, so that each layer costs
+    a single batched matrix multiplication instead of one per network.
+
+    Parameters
+    ----------
+    in_dim: Tuple[int]
+        input dimension of neural network.
+    out_dim: Tuple[int]
+        output dimension of neural network.
+    num_heads: int
+        number of networks of the ensemble.
+    layers: list of int, optional
+        list of width of neural network layers, each separated with a non-linearity.
+    biased_head: bool, optional
+        flag that indicates if head of NN has a bias term or not.
+    """
+
+    def __init__(
+        self,
+        in_dim,
+        out_dim,
+        num_heads,
+        layers=(),
+        non_linearity="Tanh",
+        biased_head=True,
+        squashed_output=False,
+    ):
+        super().__init__()
+        if len(in_dim) > 1:
+            raise NotImplementedError("Only implemented for flat inputs.")
+        self.kwargs = {
+            "in_dim": in_dim,
+            "out_dim": out_dim,
+            "num_heads": num_heads,
+            "layers": layers,
+            "non_linearity": non_linearity,
+            "biased_head": biased_head,
+            "squashed_output": squashed_output,
+        }
+        self.num_heads = num_heads
+
+        non_linearity = parse_nonlinearity(non_linearity)
+        hidden_layers, in_dim = [], in_dim[0]
+        for layer in layers:
+            hidden_layers.append(EnsembleLinear(in_dim, layer, num_heads))
+            hidden_layers.append(non_linearity())
+            in_dim = layer
+        self.hidden_layers = nn.Sequential(*hidden_layers)
+        self.embedding_dim = in_dim + 1 if biased_head else in_dim
+        self.output_shape = out_dim
+        self.head = EnsembleLinear(
+            in_dim,
+            reduce(lambda x, y: x * y, list(out_dim)),
+            num_heads,
+            bias=biased_head,
+        )
+        self.squashed_output = squashed_output
+
+    @classmethod
+    def from_feedforward(cls, other, num_heads):
+        """Initialize an ensemble with the architecture of a feed-forward network."""
+        kwargs = {
+            key: other.kwargs[key]
+            for key in ["in_dim", "out_dim", "layers", "non_linearity", "biased_head"]
+        }
+        return cls(
+            **kwargs,
+            num_heads=num_heads,
+            squashed_output=other.kwargs["squashed_output"],
+        )
+
+    @classmethod
+    def from_members(cls, networks):
+        """Initialize an ensemble with the parameters of feed-forward networks."""
+        out = cls.from_feedforward(networks[0], num_heads=len(networks))
+        out.load_state_dict(
+            cls.stack_state_dicts([network.state_dict() for network in networks])
+        )
+        return out
+
+    @staticmethod
+    def stack_state_dicts(state_dicts):
+        """Stack the state dicts of feed-forward networks into a single state dict.
+
+        The parameters of the linear layers `{name}.weight' and `{name}.bias' of the
+        networks are stacked as in EnsembleLinear.
+        """
+        layer_names = sorted({key.rsplit(".", 1)[0] for key in state_dicts[0]})
+        state_dict = {}
+        for name in layer_names:
+            stacked = EnsembleLinear.stack_state_dicts(
+                [
+                    {
+                        key: state_dict_[f"{name}.{key}"]
+                        for key in ["weight", "bias"]
+                        if f"{name}.{key}" in state_dict_
+                    }
+                    for state_dict_ in state_dicts
+                ]
+            )
+            state_dict.update({f"{name}.{k}": v for k, v in stacked.items()})
+        return state_dict
+
+    def forward(self, x):
+        """Execute forward computation of the Neural Networks.
+
+        Parameters
+        ----------
+        x: torch.Tensor.
+            Tensor of size [batch_size x in_dim] where the NNs are evaluated.
+
+        Returns
+        -------
+        out: torch.Tensor.
+            Tensor of size [batch_size x out_dim x num_heads].
+        """
+        x = x.unsqueeze(0).expand(self.num_heads, *x.shape)
+        out = self.head(self.hidden_layers(x))
+        if self.squashed_output:
+            out = torch.tanh(out)
+        out = out.reshape(*out.shape[:-1], *self.output_shape)
+        return out.movedim(0, -1)
+
+    @torch.jit.export
+    def last_layer_embeddings(self, x):
+        """Get last layer embeddings of the Neural Networks.
+
+        Parameters
+        ----------
+        x: torch.Tensor.
+            Tensor of size [batch_size x in_dim] where the NNs are evaluated.
+
+        Returns
+        -------
+        out: torch.Tensor.
+            Tensor of size [batch_size x embedding_dim x num_heads].
+        """
+        out = self.hidden_layers(x.unsqueeze(0).expand(self.num_heads, *x.shape))
+        if self.head.bias is not None:
+            out = torch.cat((out, torch.ones(out.shape[:-1] + (1,))), dim=-1)
+        return out.movedim(0, -1)
@@ -1,6 +1,6 @@
 """Implementation of different Neural Networks with pytorch."""
 
-from typing import Any, Dict, Optional, Sequence, Tuple, Type, TypeVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 
 import torch.nn as nn
 from torch import Tensor
@@ -81,3 +81,54 @@ class FelixNet(FeedForwardNN):
         self, in_dim: Tuple, out_dim: Tuple, initial_scale: float = ...
     ) -> None: ...
     def forward(self, *args: Tensor, **kwargs: Any) -> Tuple[Tensor, Tensor]: ...
+
+class EnsembleLinear(nn.Module):
+    in_features: int
+    out_features: int
+    num_heads: int
+    weight: nn.Parameter
+    bias: Optional[nn.Parameter]
+    def __init__(
+        self, in_features: int, out_features: int, num_heads: int, bias: bool = ...
+    ) -> None: ...
+    def reset_parameters(self) -> None: ...
+    @classmethod
+    def from_linear(cls, layers: Sequence[nn.Linear]) -> EnsembleLinear: ...
+    @staticmethod
+    def stack_state_dicts(
+        state_dicts: List[Dict[str, Tensor]],
+    ) -> Dict[str, Tensor]: ...
+    def forward(self, x: Tensor) -> Tensor: ...
+
+class EnsembleFeedForwardNN(nn.Module):
+    kwargs: Dict
+    num_heads: int
+    embedding_dim: int
+    hidden_layers: nn.Sequential
+    head: EnsembleLinear
+    squashed_output: bool
+    output_shape: Tuple[int]
+    def __init__(
+        self,
+        in_dim: Tuple[int],
+        out_dim: Tuple[int],
+        num_heads: int,
+        layers: Sequence[int] = ...,
+        non_linearity: str = ...,
+        biased_head: bool = ...,
+        squashed_output: bool = ...,
+    ) -> None: ...
+    @classmethod
+    def from_feedforward(
+        cls, other: FeedForwardNN, num_heads: int
+    ) -> EnsembleFeedForwardNN: ...
+    @classmethod
+    def from_members(
+        cls, networks: Sequence[FeedForwardNN]
+    ) -> EnsembleFeedForwardNN: ...
+    @staticmethod
+    def stack_state_dicts(
+        state_dicts: List[Dict[str, Tensor]],
+    ) -> Dict[str, Tensor]: ...
+    def forward(self, x: Tensor) -> Tensor: ...
+    def last_layer_embeddings(self, x: Tensor) -> Tensor: ...
@@ -9,6 +9,8 @@ from rllib.util.neural_networks.neural_networks import (
     CategoricalNN,
     DeterministicNN,
     Ensemble,
+    EnsembleFeedForwardNN,
+    EnsembleLinear,
     FelixNet,
     HeteroGaussianNN,
     HomoGaussianNN,
@@ -338,6 +340,26 @@ class TestEnsembleNN(object):
         assert o.has_rsample
         assert not o.has_enumerate_support
 
+    def test_set_head_idx(self, out_dim, num_heads, deterministic):
+        in_dim = (4,)
+        net = Ensemble(
+            in_dim, out_dim, num_heads=num_heads, deterministic=deterministic
+        )
+        t = torch.randn((num_heads, 8) + in_dim)
+
+        net.set_prediction_strategy("set_head_idx")
+        net.set_head_idx(torch.arange(num_heads).unsqueeze(-1))
+        mean, scale = net(t)
+        assert mean.shape == (num_heads, 8) + out_dim
+        assert scale.shape == (num_heads, 8) + out_dim + out_dim
+
+        net.set_prediction_strategy("set_head")
+        for i in range(num_heads):
+            net.set_head(i)
+            head_mean, head_scale = net(t[i])
+            torch.testing.assert_close(mean[i], head_mean)
+            torch.testing.assert_close(scale[i], head_scale)
+
     def test_layers(self, out_dim, num_heads, layers, deterministic):
         in_dim = (4,)
         net = Ensemble(in_dim, out_dim, layers=layers, num_heads=num_heads)
@@ -411,6 +433,50 @@ class TestEnsembleNN(object):
         assert not o.has_enumerate_support
 
 
+class TestEnsembleFeedForwardNN(object):
+    def test_output_shape(self, in_dim, out_dim, layers, num_heads, batch_size):
+        net = EnsembleFeedForwardNN(in_dim, out_dim, num_heads=num_heads, layers=layers)
+        if batch_size is None:
+            t = torch.randn(in_dim)
+            o = net(t)
+            assert o.shape == torch.Size(out_dim + (num_heads,))
+        else:
+            t = torch.randn((batch_size, 2) + in_dim)
+            o = net(t)
+            assert o.shape == torch.Size((batch_size, 2) + out_dim + (num_heads,))
+
+        embeddings = net.last_layer_embeddings(t)
+        assert embeddings.shape == t.shape[:-1] + (net.embedding_dim, num_heads)
+
+    def test_layers(self, in_dim, out_dim, layers, num_heads):
+        net = EnsembleFeedForwardNN(in_dim, out_dim, num_heads=num_heads, layers=layers)
+        members = [DeterministicNN(in_dim, out_dim, layers) for _ in range(num_heads)]
+        assert count_vars(net) == sum(count_vars(member) for member in members)
+
+    def test_from_members(self, in_dim, out_dim, layers, non_linearity, batch_size):
+        members = [
+            DeterministicNN(in_dim, out_dim, layers, non_linearity=non_linearity)
+            for _ in range(3)
+        ]
+        net = EnsembleFeedForwardNN.from_members(members)
+        t = torch.randn(in_dim if batch_size is None else (batch_size,) + in_dim)
+
+        out = torch.stack([member(t) for member in members], dim=-1)
+        torch.testing.assert_close(net(t), out)
+
+        embeddings = [member.last_layer_embeddings(t) for member in members]
+        torch.testing.assert_close(
+            net.last_layer_embeddings(t), torch.stack(embeddings, dim=-1)
+        )
+
+    def test_ensemble_linear(self, num_heads):
+        layers = [torch.nn.Linear(4, 3) for _ in range(num_heads)]
+        net = EnsembleLinear.from_linear(layers)
+        x = torch.randn(num_heads, 8, 4)
+        out = torch.stack([layer(x_) for layer, x_ in zip(layers, x)])
+        torch.testing.assert_close(net(x), out)
+
+
 class TestFelixNet(object):
     @pytest.fixture(scope="class")
     def net(self):
@@ -20,6 +20,7 @@ from rllib.util.neural_networks.utilities import (
     inverse_softplus,
     one_hot_encode,
     random_tensor,
+    reverse_scan,
     update_parameters,
     zero_bias,
 )
@@ -30,6 +31,21 @@ def test_inverse_softplus():
     torch.testing.assert_allclose(t, inverse_softplus(nn.functional.softplus(t)))
 
 
+@pytest.mark.parametrize("length", [1, 2, 5, 8, 13])
+def test_reverse_scan(length):
+    tensor, discount = torch.randn(2, length, 3), torch.rand(2, length, 3)
+    expected = torch.zeros_like(tensor)
+    y = torch.zeros(2, 3)
+    for t in reversed(range(length)):
+        y = tensor[:, t] + discount[:, t] * y
+        expected[:, t] = y
+    torch.testing.assert_close(reverse_scan(tensor, discount, dim=1), expected)
+    torch.testing.assert_close(
+        reverse_scan(tensor.transpose(1, -1), 0.9, dim=-1),
+        reverse_scan(tensor, 0.9, dim=1).transpose(1, -1),
+    )
+
+
 def test_zero_bias():
     in_dim = (4,)
     out_dim = (2,)
@@ -431,6 +431,46 @@ def reverse_cumprod(tensor, dim=-1):
     return torch.flip(torch.cumprod(torch.flip(tensor, (dim,)), dim), (dim,))
 
 
+def reverse_scan(tensor, discount, dim=-1):
+    r"""Return the reversed discounted cumsum along a dimension.
+
+    It solves the linear recurrence, with y_{T} = 0,
+    .. math:: y_t = x_t + a_t y_{t+1},
+    with a parallel (Hillis-Steele) scan of log2(T) tensor operations, instead of a
+    loop over the T steps. All the operations are differentiable.
+
+    Parameters
+    ----------
+    tensor: Tensor
+        Values x_t of the recurrence.
+    discount: Tensor or float
+        Discounts a_t of the recurrence, which broadcast with `tensor'.
+    dim: int, optional (default=-1).
+        Dimension of the recurrence.
+
+    Returns
+    -------
+    output: Tensor
+        Tensor y with the shape of `tensor'.
+    """
+    discount = torch.as_tensor(discount, dtype=tensor.dtype).expand_as(tensor)
+    # Flip the dimension, so that the recurrence is y_t = x_t + a_t y_{t-1}.
+    value = torch.flip(tensor, (dim,)).movedim(dim, 0)
+    discount = torch.flip(discount, (dim,)).movedim(dim, 0)
+
+    # After each iteration, y_t = value_t + discount_t y_{t - 2 offset}.
+    offset = 1
+    while offset < value.shape[0]:
+        value = torch.cat(
+            (value[:offset], value[offset:] + discount[offset:] * value[:-offset])
+        )
+        discount = torch.cat(
+            (discount[:offset], discount[offset:] * discount[:-offset])
+        )
+        offset *= 2
+    return torch.flip(value.movedim(0, dim), (dim,))
+
+
 def get_batch_size(tensor, base_size):
     """Get the batch size of a tensor if it is a discrete or continuous tensor.
 
@@ -58,6 +58,9 @@ class OneHotEncode(nn.Module):
 def one_hot_encode(tensor: Tensor, num_classes: int) -> Tensor: ...
 def reverse_cumsum(tensor: Tensor, dim: int = ...) -> Tensor: ...
 def reverse_cumprod(tensor: Tensor, dim: int = ...) -> Tensor: ...
+def reverse_scan(
+    tensor: Tensor, discount: Union[Tensor, float], dim: int = ...
+) -> Tensor: ...
 def get_batch_size(tensor: Tensor, base_shape: Union[Size, Tuple]) -> Tuple[int]: ...
 def random_tensor(
     discrete: bool, dim: int, batch_size: Optional[int] = ...
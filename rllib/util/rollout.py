@@ -1,14 +1,27 @@
 """Helper functions to conduct a rollout with policies or agents."""
 
+from contextlib import contextmanager, nullcontext
+from functools import partial
+
+import numpy as np
 import torch
 from gym.wrappers.monitoring.video_recorder import VideoRecorder
+from torch.utils.checkpoint import checkpoint
 from tqdm import tqdm
 
 from rllib.dataset.datatypes import Observation
-from rllib.util.neural_networks.utilities import broadcast_to_tensor, to_torch
+from rllib.dataset.utilities import stack_list_of_tuples
+from rllib.environment.environment_pool import EnvironmentPool
+from rllib.model.utilities import PredictionStrategy
+from rllib.util.neural_networks.utilities import (
+    broadcast_to_tensor,
+    repeat_along_dimension,
+    to_torch,
+)
 from rllib.util.training.utilities import Evaluate
 from rllib.util.utilities import (
     get_entropy_and_log_p,
+    sample_action,
     sample_model,
     tensor_to_distribution,
 )
@@ -49,7 +62,7 @@ def step_env(environment, state, action, action_scale, pi=None, render=False):
     return observation, state, done, info
 
 
-def step_model(
+def _sample_transition(
     dynamical_model,
     reward_model,
     termination_model,
@@ -59,7 +72,19 @@ def step_model(
     action_scale=1.0,
     pi=None,
 ):
-    """Perform a single step in an dynamical model."""
+    """Sample the transition of a single step in a dynamical model.
+
+    The reward of the particles that terminated before the step is zero.
+
+    Returns
+    -------
+    next_state: State
+    reward: Reward
+    done: Tensor
+        Boolean flags of the particles that terminated before or at the step.
+    entropy: Tensor
+    log_prob_action: Tensor
+    """
     # Sample a next state
     next_state = sample_model(dynamical_model, state, action)
 
@@ -68,22 +93,43 @@ def step_model(
 
     if done is None:
         done = torch.zeros_like(reward).bool()
-    broadcast_done = broadcast_to_tensor(done, target_tensor=reward)
-    reward *= (~broadcast_done).float()
+    reward = reward * (~broadcast_to_tensor(done, target_tensor=reward)).float()
 
     # Check for termination.
     if termination_model is not None:
         done_ = sample_model(termination_model, state, action, next_state).bool()
-        done = done + done_  # "+" is a boolean "or".
+        done = done | done_
 
+    entropy, log_prob_action = torch.tensor(0.0), torch.tensor(1.0)
     if pi is not None:
         try:
             entropy, log_prob_action = get_entropy_and_log_p(pi, action, action_scale)
         except RuntimeError:
-            entropy, log_prob_action = 0.0, 1.0
-    else:
-        entropy, log_prob_action = 0.0, 1.0
+            pass
+    return next_state, reward, done, entropy, log_prob_action
+
 
+def step_model(
+    dynamical_model,
+    reward_model,
+    termination_model,
+    state,
+    action,
+    done=None,
+    action_scale=1.0,
+    pi=None,
+):
+    """Perform a single step in an dynamical model."""
+    next_state, reward, done, entropy, log_prob_action = _sample_transition(
+        dynamical_model,
+        reward_model,
+        termination_model,
+        state,
+        action,
+        done=done,
+        action_scale=action_scale,
+        pi=pi,
+    )
     observation = Observation(
         state=state,
         action=action,
@@ -97,6 +143,90 @@ def step_model(
     return observation, next_state, done
 
 
+def _scatter_live(value, live, padding=None):
+    """Scatter the values of the live particles into a padded batch."""
+    if padding is None:
+        padding = value.new_zeros(live.shape + value.shape[1:])
+    else:
+        padding = padding.clone()
+    padding[live] = value
+    return padding
+
+
+def step_model_compact(
+    dynamical_model,
+    reward_model,
+    termination_model,
+    state,
+    done,
+    action=None,
+    policy=None,
+):
+    """Perform a single step in a dynamical model only with the live particles.
+
+    The particles that terminated before the step are dropped from the batch, so
+    that the policy and the models are only evaluated at the live particles.
+    In the padded output, the terminated particles stay at their state, with zero
+    action, reward, and entropy.
+
+    Parameters
+    ----------
+    state: State
+        States of all the particles.
+    done: Tensor
+        Boolean flags of the particles that terminated before the step.
+    action: Action, optional.
+        Actions of all the particles, if None they are sampled from `policy'.
+    policy: AbstractPolicy, optional.
+        Policy that interacts with the model.
+    """
+    live = ~done
+    if torch.all(live):
+        pi, action, action_scale = _policy_step(policy, state, action)
+        return step_model(
+            dynamical_model=dynamical_model,
+            reward_model=reward_model,
+            termination_model=termination_model,
+            state=state,
+            action=action,
+            action_scale=action_scale,
+            done=done,
+            pi=pi,
+        )
+
+    pi, action, action_scale = _policy_step(
+        policy, state[live], None if action is None else action[live]
+    )
+    observation, next_state, live_done = step_model(
+        dynamical_model=dynamical_model,
+        reward_model=reward_model,
+        termination_model=termination_model,
+        state=state[live],
+        action=action,
+        action_scale=action_scale,
+        done=done[live],
+        pi=pi,
+    )
+    next_state = _scatter_live(next_state, live, padding=state)
+    done = _scatter_live(live_done, live, padding=done)
+
+    def scatter(value):
+        if value.ndim == 0:  # Entropy and log-probabilities without a policy.
+            return value
+        return _scatter_live(value, live)
+
+    observation = Observation(
+        state=state,
+        action=scatter(observation.action),
+        reward=scatter(observation.reward),
+        next_state=next_state,
+        done=done.float(),
+        entropy=scatter(observation.entropy),
+        log_prob_action=scatter(observation.log_prob_action),
+    ).to_torch()
+    return observation, next_state, done
+
+
 def record(environment, agent, path, num_episodes=1, max_steps=1000):
     """Record an episode."""
     recorder = VideoRecorder(environment, path=path)
@@ -221,6 +351,195 @@ def rollout_agent(
     agent.end_interaction()
 
 
+def step_envs(environments, indexes, states, actions, action_scale, pi=None):
+    """Perform a single step in several environments with a batch of actions.
+
+    The environments of an `EnvironmentPool' are stepped in parallel.
+    The entropies and log-probabilities of the actions are computed with one call
+    to the batched distribution `pi'.
+
+    Parameters
+    ----------
+    environments: List[AbstractEnvironment] or EnvironmentPool
+        Environments to step.
+    indexes: List[int]
+        Indexes of the environments to step.
+
+    Returns
+    -------
+    observations: List[Observation]
+        Observation of each environment.
+    next_states: list
+        Next state of each environment.
+    dones: List[bool]
+        Termination flag of each environment.
+    infos: List[dict]
+        Information of each environment.
+    """
+    entropy = torch.zeros(len(indexes))
+    log_prob_action = torch.ones(len(indexes))
+    if pi is not None:
+        try:
+            with torch.no_grad():
+                entropy, log_prob_action = get_entropy_and_log_p(
+                    pi, to_torch(actions), action_scale
+                )
+        except RuntimeError:
+            pass
+
+    if isinstance(environments, EnvironmentPool):
+        next_states, rewards, dones, infos = environments.step(actions, indexes)
+    else:
+        next_states, rewards, dones, infos = [], [], [], []
+        for i, action in zip(indexes, actions):
+            try:
+                next_state, reward, done, info = environments[i].step(action)
+            except TypeError:
+                next_state, reward, done, info = environments[i].step(action.item())
+            next_states.append(next_state)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+
+    observations = [
+        Observation(
+            state=states[j],
+            action=actions[j],
+            reward=rewards[j],
+            next_state=next_states[j],
+            done=dones[j],
+            entropy=entropy[j],
+            log_prob_action=log_prob_action[j],
+        ).to_torch()
+        for j in range(len(indexes))
+    ]
+    return observations, next_states, dones, infos
+
+
+def _is_stateful(policy):
+    """Check if a policy, or the policy it derives from, overrides `reset'."""
+    from rllib.policy.abstract_policy import AbstractPolicy  # Circular import.
+
+    while hasattr(policy, "base_policy"):
+        policy = policy.base_policy
+    return type(policy).reset is not AbstractPolicy.reset
+
+
+def rollout_agent_batched(
+    environments,
+    agent,
+    num_episodes=1,
+    max_steps=1000,
+    print_frequency=0,
+    callback_frequency=0,
+    callbacks=None,
+):
+    """Conduct a rollout of an agent in several environments in lockstep.
+
+    At every step, the agent acts on the batch of states of all the environments
+    whose episode is running, so the policy is evaluated once per step.
+    When an episode finishes, its environment is reset if more episodes remain.
+
+    The transitions of each environment are buffered and, once its episode finishes,
+    they are fed to the agent with `start_episode', `observe', and `end_episode'.
+    Hence, the agent sees complete episodes, as with `rollout_agent', and its memory
+    is consistent. All the environments must share the same goal.
+
+    As the counters of the agent are only updated once an episode finishes, the agent
+    must not be in its exploration phase, which depends on the counters. The policy
+    acts on the batch of all the running episodes, so it must not keep an internal
+    state that is reset at the start of each episode.
+
+    Parameters
+    ----------
+    environments: List[AbstractEnvironment] or EnvironmentPool
+        Copies of the environment with which the agent interacts. The
+        environments of a pool are stepped in parallel subprocesses.
+    agent: AbstractAgent
+        Agent that interacts with the environments.
+    num_episodes: int, optional (default=1)
+        Total number of episodes.
+    max_steps: int.
+        Maximum number of steps per episode.
+    print_frequency: int, optional.
+        Print agent stats every `print_frequency' episodes if > 0.
+    callback_frequency: int, optional.
+        Plot agent callbacks every `plot_frequency' episodes if > 0.
+    callbacks: List[Callable[[AbstractAgent, AbstractEnvironment,int], None]], optional.
+        List of functions for evaluating/plotting the agent.
+
+    Raises
+    ------
+    ValueError
+        If the agent is in its exploration phase or its policy is stateful.
+    """
+    if agent.total_steps < agent.exploration_steps or (
+        agent.total_episodes < agent.exploration_episodes
+    ):
+        raise ValueError(
+            "The agent observes the episodes once they finish, so its exploration "
+            "cut-offs would be overshot. Run the exploration with `rollout_agent'."
+        )
+    if _is_stateful(agent.policy):
+        raise ValueError(
+            f"The policy {agent.policy.__class__.__name__} is reset at the start of "
+            f"each episode, so it can not act on a batch of running episodes."
+        )
+    callbacks = list() if callbacks is None else callbacks
+    num_started, num_finished = 0, 0
+    states, trajectories = [None] * len(environments), [None] * len(environments)
+
+    def start(i):
+        nonlocal num_started
+        states[i] = environments[i].reset()
+        trajectories[i] = []
+        num_started += 1
+
+    def finish(i):
+        nonlocal num_finished
+        agent.start_episode()
+        for observation, info in trajectories[i]:
+            agent.observe(observation)
+            agent.logger.update(**info)
+        if callback_frequency and agent.total_episodes % callback_frequency == 0:
+            for callback in callbacks:
+                callback(agent, environments[i], agent.total_episodes)
+        agent.end_episode()
+        if print_frequency and num_finished % print_frequency == 0:
+            print(agent)
+        num_finished += 1
+        trajectories[i] = None
+
+    for i in range(min(len(environments), num_episodes)):
+        start(i)
+    agent.set_goal(environments[0].goal)
+
+    progress_bar = tqdm(total=num_episodes)
+    while num_finished < num_episodes:
+        running = [
+            i for i, trajectory in enumerate(trajectories) if trajectory is not None
+        ]
+        actions = agent.act(np.stack([states[i] for i in running]))
+        observations, next_states, dones, infos = step_envs(
+            environments=environments,
+            indexes=running,
+            states=[states[i] for i in running],
+            actions=actions,
+            action_scale=agent.policy.action_scale,
+            pi=agent.pi,
+        )
+        for j, i in enumerate(running):
+            trajectories[i].append((observations[j], infos[j]))
+            states[i] = next_states[j]
+            if dones[j] or len(trajectories[i]) >= max_steps:
+                finish(i)
+                progress_bar.update()
+                if num_started < num_episodes:
+                    start(i)
+    progress_bar.close()
+    agent.end_interaction()
+
+
 def rollout_policy(
     environment, policy, num_episodes=1, max_steps=1000, render=False, memory=None
 ):
@@ -278,6 +597,95 @@ def rollout_policy(
     return trajectories
 
 
+def _policy_step(policy, state, action=None):
+    """Get the policy distribution at `state' and sample an action if not given."""
+    if policy is not None:
+        pi = tensor_to_distribution(policy(state), **policy.dist_params)
+        action_scale = policy.action_scale
+    else:
+        pi, action_scale = None, 1.0
+
+    if action is None:
+        # Sample an action
+        if pi.has_rsample:
+            action = pi.rsample()
+        else:
+            action = pi.sample()
+        if not policy.discrete_action:
+            action = policy.action_scale * action.clamp_(-1.0, 1.0)
+    return pi, action, action_scale
+
+
+@contextmanager
+def _set_requires_grad(parameters, requires_grad):
+    """Set the `requires_grad' flags of `parameters' and restore them at exit."""
+    old_requires_grad = [parameter.requires_grad for parameter in parameters]
+    for parameter, flag in zip(parameters, requires_grad):
+        parameter.requires_grad_(flag)
+    try:
+        yield
+    finally:
+        for parameter, flag in zip(parameters, old_requires_grad):
+            parameter.requires_grad_(flag)
+
+
+def _checkpoint_contexts(*modules):
+    """Get the contexts of `checkpoint', which recompute with the forward flags.
+
+    The models are usually frozen only while they are called, see DisableGradient,
+    so their parameters would require gradients in the recomputation otherwise.
+    """
+    parameters = [p for m in modules if m is not None for p in m.parameters()]
+    requires_grad = [parameter.requires_grad for parameter in parameters]
+    return nullcontext(), _set_requires_grad(parameters, requires_grad)
+
+
+def _rollout_segment(
+    dynamical_model,
+    reward_model,
+    termination_model,
+    policy,
+    state,
+    done,
+    initial_action,
+    num_steps,
+    compact,
+):
+    """Simulate up to `num_steps' steps of `rollout_model' from `state'."""
+    trajectory = list()
+    for i in range(num_steps):
+        action = initial_action if i == 0 else None
+        if compact:
+            observation, next_state, done = step_model_compact(
+                dynamical_model=dynamical_model,
+                reward_model=reward_model,
+                termination_model=termination_model,
+                state=state,
+                done=done,
+                action=action,
+                policy=policy,
+            )
+        else:
+            pi, action, action_scale = _policy_step(policy, state, action)
+            observation, next_state, done = step_model(
+                dynamical_model=dynamical_model,
+                reward_model=reward_model,
+                termination_model=termination_model,
+                state=state,
+                action=action,
+                action_scale=action_scale,
+                done=done,
+                pi=pi,
+            )
+        trajectory.append(observation)
+
+        state = next_state
+        if torch.all(done):
+            break
+
+    return trajectory, state, done
+
+
 def rollout_model(
     dynamical_model,
     reward_model,
@@ -287,6 +695,9 @@ def rollout_model(
     termination_model=None,
     max_steps=1000,
     memory=None,
+    compact=False,
+    num_heads=None,
+    checkpoint_steps=None,
 ):
     """Conduct a rollout of a policy interacting with a model.
 
@@ -308,6 +719,17 @@ def rollout_model(
         Maximum number of steps per episode.
     memory: ExperienceReplay, optional.
         Memory where to store the simulated transitions.
+    compact: bool, optional (default=False).
+        Drop the terminated particles from the batch, see `step_model_compact'.
+    num_heads: int, optional.
+        If given, simulate all the heads of ensemble models jointly, see
+        `rollout_heads'.
+    checkpoint_steps: int, optional.
+        If given and gradients are enabled, the rollout is split in segments of
+        `checkpoint_steps' steps with `torch.utils.checkpoint'. Only the states
+        between segments and the transitions are stored for the backward pass, and
+        the activations of the policy and the models are recomputed in it.
+        Smaller segments use less memory at the cost of more recomputation.
 
     Returns
     -------
@@ -317,52 +739,306 @@ def rollout_model(
     Notes
     -----
     It will try to do the re-parametrization trick with the policy and models.
+    With `checkpoint_steps', the recomputation in the backward pass replays the
+    random numbers and the frozen parameters of the forward pass, but the models
+    must keep the same prediction strategy until then.
 
     TODO: Parallelize it!.
     """
+    if num_heads is not None:
+        # The heads are only set in the forward pass, not in the recomputation.
+        assert checkpoint_steps is None, "Heads can not be checkpointed."
+        return rollout_heads(
+            rollout_model,
+            num_heads,
+            dynamical_model=dynamical_model,
+            reward_model=reward_model,
+            policy=policy,
+            initial_state=initial_state,
+            initial_action=initial_action,
+            termination_model=termination_model,
+            max_steps=max_steps,
+            memory=memory,
+            compact=compact,
+        )
     trajectory = list()
     state = initial_state
     done = torch.full(state.shape[:-1], False, dtype=torch.bool)
 
     assert max_steps > 0
-    for i in range(max_steps):
-        if policy is not None:
-            pi = tensor_to_distribution(policy(state), **policy.dist_params)
-            action_scale = policy.action_scale
+    assert policy is not None or max_steps == 1
+    if checkpoint_steps is None or not torch.is_grad_enabled():
+        checkpoint_steps = max_steps
+    action = initial_action
+    for i in range(0, max_steps, checkpoint_steps):
+        segment_args = (
+            dynamical_model,
+            reward_model,
+            termination_model,
+            policy,
+            state,
+            done,
+            action,
+            min(checkpoint_steps, max_steps - i),
+            compact,
+        )
+        if checkpoint_steps < max_steps:
+            segment, state, done = checkpoint(
+                _rollout_segment,
+                *segment_args,
+                use_reentrant=False,
+                context_fn=partial(_checkpoint_contexts, *segment_args[:4]),
+            )
         else:
-            assert max_steps == 1
-            pi, action_scale = None, 1.0
+            segment, state, done = _rollout_segment(*segment_args)
+        trajectory += segment
+        if memory is not None:
+            for observation in segment:
+                memory.append(observation)
 
-        if i == 0 and initial_action is not None:
-            action = initial_action
+        action = None
+        if torch.all(done):
+            break
+
+    return trajectory
+
+
+def _write_step(columns, fields, i, max_steps, preallocate):
+    """Write the fields of step `i' in the columns, which are created if None."""
+    if columns is None and preallocate:
+        columns = [x.new_empty((max_steps,) + x.shape) for x in fields]
+    elif columns is None:
+        columns = [[] for _ in fields]
+    for column, value in zip(columns, fields):
+        if preallocate:
+            column[i] = value
         else:
-            # Sample an action
-            if pi.has_rsample:
-                action = pi.rsample()
-            else:
-                action = pi.sample()
-            if not policy.discrete_action:
-                action = policy.action_scale * action.clamp_(-1.0, 1.0)
+            column.append(value)
+    return columns
+
+
+def rollout_model_stacked(
+    dynamical_model,
+    reward_model,
+    policy,
+    initial_state,
+    initial_action=None,
+    termination_model=None,
+    max_steps=1000,
+    memory=None,
+    compact=False,
+    num_heads=None,
+    checkpoint_steps=None,
+):
+    """Conduct a rollout of a policy interacting with a model into stacked tensors.
+
+    It simulates the same transitions as `rollout_model', but the fields of each
+    step are written directly into the output tensors, without building an
+    Observation per step and stacking them afterwards.
+    When gradients are disabled, the (max_steps, *batch_shape, ...) output tensors
+    are preallocated at the first step and written in place. Otherwise, the tensors
+    of each field are stacked once at the end, as in-place writes would copy the
+    whole output for every step in the backward pass.
+
+    Parameters
+    ----------
+    dynamical_model: AbstractModel
+        Dynamical Model with which the policy interacts.
+    reward_model: AbstractModel.
+        Reward Model with which the policy interacts.
+    policy: AbstractPolicy
+        Policy that interacts with the environment.
+    initial_state: State
+        Starting states for the interaction.
+    initial_action: Action.
+        Starting action for the interaction.
+    termination_model: AbstractModel.
+        Termination condition to finish the rollout.
+    max_steps: int.
+        Maximum number of steps per episode.
+    memory: ExperienceReplay, optional.
+        Memory where to store the simulated transitions.
+    compact: bool, optional (default=False).
+        Drop the terminated particles from the batch, see `step_model_compact'.
+    num_heads: int, optional.
+        If given, simulate all the heads of ensemble models jointly, see
+        `rollout_heads'.
+    checkpoint_steps: int, optional.
+        If given and gradients are enabled, the transitions are simulated with
+        `rollout_model' in checkpointed segments, and then stacked.
 
-        observation, next_state, done = step_model(
+    Returns
+    -------
+    observation: Observation
+        Observation whose fields have shape (num_steps, *batch_shape, ...), where
+        num_steps is smaller than max_steps if all the particles terminate earlier.
+    """
+    if num_heads is not None:
+        # The heads are only set in the forward pass, not in the recomputation.
+        assert checkpoint_steps is None, "Heads can not be checkpointed."
+        return rollout_heads(
+            rollout_model_stacked,
+            num_heads,
             dynamical_model=dynamical_model,
             reward_model=reward_model,
+            policy=policy,
+            initial_state=initial_state,
+            initial_action=initial_action,
             termination_model=termination_model,
-            state=state,
-            action=action,
-            action_scale=action_scale,
+            max_steps=max_steps,
+            memory=memory,
+            compact=compact,
+        )
+    if checkpoint_steps is not None and torch.is_grad_enabled():
+        trajectory = rollout_model(
+            dynamical_model=dynamical_model,
+            reward_model=reward_model,
+            policy=policy,
+            initial_state=initial_state,
+            initial_action=initial_action,
+            termination_model=termination_model,
+            max_steps=max_steps,
+            memory=memory,
+            compact=compact,
+            checkpoint_steps=checkpoint_steps,
+        )
+        return stack_list_of_tuples(trajectory, dim=0)
+    state = initial_state
+    done = torch.full(state.shape[:-1], False, dtype=torch.bool)
+    preallocate = not torch.is_grad_enabled()
+    columns = None
+
+    assert max_steps > 0
+    assert policy is not None or max_steps == 1
+    for i in range(max_steps):
+        action = initial_action if i == 0 else None
+        if compact:
+            observation, next_state, done = step_model_compact(
+                dynamical_model=dynamical_model,
+                reward_model=reward_model,
+                termination_model=termination_model,
+                state=state,
+                done=done,
+                action=action,
+                policy=policy,
+            )
+            fields = (
+                observation.state,
+                observation.action,
+                observation.reward,
+                observation.next_state,
+                observation.done,
+                observation.entropy,
+                observation.log_prob_action,
+            )
+            columns = _write_step(columns, fields, i, max_steps, preallocate)
+            state = next_state
+            if torch.all(done):
+                break
+            continue
+
+        pi, action, action_scale = _policy_step(policy, state, action)
+        next_state, reward, done, entropy, log_prob_action = _sample_transition(
+            dynamical_model,
+            reward_model,
+            termination_model,
+            state,
+            action,
             done=done,
+            action_scale=action_scale,
             pi=pi,
         )
-        trajectory.append(observation)
-        if memory is not None:
-            memory.append(observation)
+        fields = (state, action, reward, next_state, done.float())
+        fields += (entropy, log_prob_action)
+        columns = _write_step(columns, fields, i, max_steps, preallocate)
 
         state = next_state
         if torch.all(done):
             break
 
-    return trajectory
+    num_steps = i + 1
+    if preallocate:
+        columns = [column[:num_steps] for column in columns]
+    else:
+        columns = [torch.stack(column) for column in columns]
+    nan = torch.full((num_steps,), float("nan"))
+    state, action, reward, next_state, done, entropy, log_prob_action = columns
+    observation = Observation(
+        state=state,
+        action=action,
+        reward=reward,
+        next_state=next_state,
+        done=done,
+        next_action=nan,
+        log_prob_action=log_prob_action,
+        entropy=entropy,
+        state_scale_tril=nan,
+        next_state_scale_tril=nan,
+        reward_scale_tril=nan,
+    )
+    if memory is not None:
+        for t in range(num_steps):
+            memory.append(Observation(*[x[t] for x in observation]))
+    return observation
+
+
+def rollout_heads(
+    rollout_function,
+    num_heads,
+    dynamical_model,
+    reward_model,
+    initial_state,
+    initial_action=None,
+    termination_model=None,
+    compact=False,
+    **kwargs,
+):
+    """Rollout all the heads of ensemble models in a single batched simulation.
+
+    The initial states and actions are tiled along a new leading dimension, with
+    one entry per head, and each particle is predicted by its own head with the
+    `set_head_idx' prediction strategy. Hence, every step evaluates all the heads
+    with one forward pass of each model, instead of one rollout per head.
+
+    Parameters
+    ----------
+    rollout_function: callable.
+        Either `rollout_model' or `rollout_model_stacked'.
+    num_heads: int.
+        Number of heads of the ensemble models.
+    compact: bool, optional (default=False).
+        It is not supported, as the head of each particle is fixed.
+
+    Other Parameters
+    ----------------
+    See `rollout_model'.
+
+    Returns
+    -------
+    trajectory: Trajectory or Observation
+        The output of `rollout_function', whose tensors have a leading head
+        dimension, after the time dimension in stacked observations.
+    """
+    assert not compact, "The particles of each head can not be dropped."
+    initial_state = repeat_along_dimension(initial_state, number=num_heads, dim=0)
+    if initial_action is not None:
+        initial_action = repeat_along_dimension(initial_action, num_heads, dim=0)
+    head_idx = torch.arange(num_heads).reshape(-1, *[1] * (initial_state.ndim - 2))
+
+    models = [dynamical_model, reward_model]
+    if termination_model is not None:
+        models.append(termination_model)
+    with PredictionStrategy(*models, prediction_strategy="set_head_idx"):
+        for model in models:
+            model.set_head_idx(head_idx)
+        return rollout_function(
+            dynamical_model=dynamical_model,
+            reward_model=reward_model,
+            initial_state=initial_state,
+            initial_action=initial_action,
+            termination_model=termination_model,
+            **kwargs,
+        )
 
 
 def rollout_actions(
@@ -372,6 +1048,7 @@ def rollout_actions(
     initial_state,
     termination_model=None,
     memory=None,
+    compact=False,
 ):
     """Conduct a rollout of an action sequence interacting with a model.
 
@@ -391,6 +1068,8 @@ def rollout_actions(
         Termination condition to finish the rollout.
     memory: ExperienceReplay, optional.
         Memory where to store the simulated transitions.
+    compact: bool, optional (default=False).
+        Drop the terminated particles from the batch, see `step_model_compact'.
 
     Returns
     -------
@@ -406,16 +1085,25 @@ def rollout_actions(
     done = torch.full(state.shape[:-1], False, dtype=torch.bool)
 
     for action in action_sequence:  # Normalized actions
-
-        observation, next_state, done = step_model(
-            dynamical_model=dynamical_model,
-            reward_model=reward_model,
-            termination_model=termination_model,
-            state=state,
-            action=action,
-            action_scale=1.0,
-            done=done,
-        )
+        if compact:
+            observation, next_state, done = step_model_compact(
+                dynamical_model=dynamical_model,
+                reward_model=reward_model,
+                termination_model=termination_model,
+                state=state,
+                done=done,
+                action=action.expand(*done.shape, action.shape[-1]),
+            )
+        else:
+            observation, next_state, done = step_model(
+                dynamical_model=dynamical_model,
+                reward_model=reward_model,
+                termination_model=termination_model,
+                state=state,
+                action=action,
+                action_scale=1.0,
+                done=done,
+            )
         trajectory.append(observation)
         if memory is not None:
             memory.append(observation)
@@ -425,3 +1113,117 @@ def rollout_actions(
             break
 
     return trajectory
+
+
+def rollout_returns(
+    dynamical_model,
+    reward_model,
+    initial_state,
+    action_sequence=None,
+    policy=None,
+    initial_action=None,
+    num_steps=None,
+    termination_model=None,
+    gamma=1.0,
+    terminal_reward=None,
+    compact=False,
+    return_actions=False,
+):
+    r"""Compute the discounted returns of a rollout without storing the trajectory.
+
+    The particles follow either an action sequence or a policy. Only the running
+    returns, states, and done flags are kept, so no Observation is built:
+    .. math:: G = \sum_{t=0}^{T-1} \gamma^t r_t + \gamma^T V(s_T) (1 - d_T).
+
+    Parameters
+    ----------
+    dynamical_model: AbstractModel
+        Dynamical Model with which the particles interact.
+    reward_model: AbstractModel.
+        Reward Model with which the particles interact.
+    initial_state: State
+        Starting states for the interaction.
+    action_sequence: Action, optional.
+        Action Sequence with dimensions [horizon x batch_shape x dim action].
+    policy: AbstractPolicy, optional.
+        Policy that selects the actions if no action sequence is given.
+    initial_action: Action, optional.
+        Starting action for the interaction with the policy.
+    num_steps: int, optional.
+        Number of steps, by default the horizon of the action sequence.
+    termination_model: AbstractModel, optional.
+        Termination condition to finish the rollout.
+    gamma: float, optional (default=1.0).
+        Discount factor.
+    terminal_reward: AbstractValueFunction, optional.
+        Value function to bootstrap the value of the final states.
+    compact: bool, optional (default=False).
+        Drop the terminated particles from the batch, see `step_model_compact'.
+    return_actions: bool, optional (default=False).
+        Also return the actions, e.g., the ones that the policy selected.
+
+    Returns
+    -------
+    returns: Tensor
+        Discounted returns with dimensions [batch_shape x dim reward].
+    actions: Tensor, optional.
+        If `return_actions', actions with dimensions [num_steps x batch_shape x dim
+        action]. The actions after the particles terminate are zero.
+    """
+    if num_steps is None:
+        num_steps = len(action_sequence)
+    state = initial_state
+    done = torch.full(state.shape[:-1], False, dtype=torch.bool)
+    returns, discount = 0.0, 1.0
+    actions = []
+
+    for i in range(num_steps):
+        live = ~done if compact and torch.any(done) else None
+        live_state = state if live is None else state[live]
+        if action_sequence is not None:
+            action = action_sequence[i]
+            if live is not None:
+                action = action.expand(*done.shape, action.shape[-1])[live]
+        elif i == 0 and initial_action is not None:
+            action = initial_action
+        else:
+            action = sample_action(policy, live_state)
+
+        if return_actions:
+            action_ = action.expand(*live_state.shape[:-1], action.shape[-1])
+            if live is None:
+                actions.append(action_.masked_fill(done.unsqueeze(-1), 0.0))
+            else:
+                actions.append(_scatter_live(action_, live))
+
+        next_state = sample_model(dynamical_model, live_state, action)
+        reward = sample_model(reward_model, live_state, action, next_state)
+        terminated = None
+        if termination_model is not None:
+            terminated = sample_model(
+                termination_model, live_state, action, next_state
+            ).bool()
+
+        if live is None:
+            not_done = (~broadcast_to_tensor(done, target_tensor=reward)).float()
+            returns = returns + discount * reward * not_done
+            state = next_state
+            if terminated is not None:
+                done = done | terminated
+        else:
+            returns = returns.index_put((live,), returns[live] + discount * reward)
+            state = state.index_put((live,), next_state)
+            done = done.index_put((live,), terminated)
+
+        discount = discount * gamma
+        if torch.all(done):
+            break
+
+    if terminal_reward is not None:
+        final_value = terminal_reward(state)
+        not_done = (~broadcast_to_tensor(done, target_tensor=final_value)).float()
+        returns = returns + discount * final_value * not_done
+    if return_actions:
+        actions += [torch.zeros_like(actions[0])] * (num_steps - len(actions))
+        return returns, torch.stack(actions)
+    return returns
@@ -1,15 +1,17 @@
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Any, Callable, ContextManager, List, Optional, Tuple, Union
 
 from numpy import ndarray
 from torch import Tensor
 from torch.distributions import Distribution
+from torch.nn import Module
 
 from rllib.agent import AbstractAgent
 from rllib.dataset.datatypes import Action, Observation, State, Trajectory
 from rllib.dataset.experience_replay import ExperienceReplay
-from rllib.environment import AbstractEnvironment
+from rllib.environment import AbstractEnvironment, EnvironmentPool
 from rllib.model import AbstractModel
 from rllib.policy import AbstractPolicy
+from rllib.value_function import AbstractValueFunction
 
 def step_env(
     environment: AbstractEnvironment,
@@ -29,6 +31,15 @@ def step_model(
     action_scale: Action = 1.0,
     pi: Optional[Distribution] = ...,
 ) -> Tuple[Observation, Tensor, Tensor]: ...
+def step_model_compact(
+    dynamical_model: AbstractModel,
+    reward_model: AbstractModel,
+    termination_model: Optional[AbstractModel],
+    state: Tensor,
+    done: Tensor,
+    action: Optional[Tensor] = ...,
+    policy: Optional[AbstractPolicy] = ...,
+) -> Tuple[Observation, Tensor, Tensor]: ...
 def record(
     environment: AbstractEnvironment,
     agent: AbstractAgent,
@@ -60,6 +71,26 @@ def rollout_agent(
         List[Callable[[AbstractAgent, AbstractEnvironment, int], None]]
     ] = ...,
 ) -> None: ...
+def step_envs(
+    environments: Union[List[AbstractEnvironment], EnvironmentPool],
+    indexes: List[int],
+    states: List[Union[int, ndarray]],
+    actions: ndarray,
+    action_scale: Action,
+    pi: Optional[Distribution] = ...,
+) -> Tuple[List[Observation], List[Union[int, ndarray]], List[bool], List[dict]]: ...
+def _is_stateful(policy: AbstractPolicy) -> bool: ...
+def rollout_agent_batched(
+    environments: Union[List[AbstractEnvironment], EnvironmentPool],
+    agent: AbstractAgent,
+    num_episodes: int = ...,
+    max_steps: int = ...,
+    print_frequency: int = ...,
+    callback_frequency: int = ...,
+    callbacks: Optional[
+        List[Callable[[AbstractAgent, AbstractEnvironment, int], None]]
+    ] = ...,
+) -> None: ...
 def rollout_policy(
     environment: AbstractEnvironment,
     policy: AbstractPolicy,
@@ -68,6 +99,23 @@ def rollout_policy(
     render: bool = ...,
     memory: Optional[ExperienceReplay] = ...,
 ) -> List[Trajectory]: ...
+def _set_requires_grad(
+    parameters: List[Tensor], requires_grad: List[bool]
+) -> ContextManager[None]: ...
+def _checkpoint_contexts(
+    *modules: Optional[Module],
+) -> Tuple[ContextManager[None], ContextManager[None]]: ...
+def _rollout_segment(
+    dynamical_model: AbstractModel,
+    reward_model: AbstractModel,
+    termination_model: Optional[AbstractModel],
+    policy: Optional[AbstractPolicy],
+    state: State,
+    done: Tensor,
+    initial_action: Optional[Action],
+    num_steps: int,
+    compact: bool,
+) -> Tuple[Trajectory, State, Tensor]: ...
 def rollout_model(
     dynamical_model: AbstractModel,
     reward_model: AbstractModel,
@@ -77,7 +125,34 @@ def rollout_model(
     termination_model: Optional[AbstractModel] = ...,
     max_steps: int = ...,
     memory: Optional[ExperienceReplay] = ...,
+    compact: bool = ...,
+    num_heads: Optional[int] = ...,
+    checkpoint_steps: Optional[int] = ...,
 ) -> Trajectory: ...
+def rollout_model_stacked(
+    dynamical_model: AbstractModel,
+    reward_model: AbstractModel,
+    policy: AbstractPolicy,
+    initial_state: State,
+    initial_action: Optional[Action] = ...,
+    termination_model: Optional[AbstractModel] = ...,
+    max_steps: int = ...,
+    memory: Optional[ExperienceReplay] = ...,
+    compact: bool = ...,
+    num_heads: Optional[int] = ...,
+    checkpoint_steps: Optional[int] = ...,
+) -> Observation: ...
+def rollout_heads(
+    rollout_function: Callable[..., Union[Trajectory, Observation]],
+    num_heads: int,
+    dynamical_model: AbstractModel,
+    reward_model: AbstractModel,
+    initial_state: State,
+    initial_action: Optional[Action] = ...,
+    termination_model: Optional[AbstractModel] = ...,
+    compact: bool = ...,
+    **kwargs: Any,
+) -> Union[Trajectory, Observation]: ...
 def rollout_actions(
     dynamical_model: AbstractModel,
     reward_model: AbstractModel,
@@ -85,4 +160,19 @@ def rollout_actions(
     initial_state: State,
     termination_model: Optional[AbstractModel] = ...,
     memory: Optional[ExperienceReplay] = ...,
+    compact: bool = ...,
 ) -> Trajectory: ...
+def rollout_returns(
+    dynamical_model: AbstractModel,
+    reward_model: AbstractModel,
+    initial_state: State,
+    action_sequence: Optional[Action] = ...,
+    policy: Optional[AbstractPolicy] = ...,
+    initial_action: Optional[Action] = ...,
+    num_steps: Optional[int] = ...,
+    termination_model: Optional[AbstractModel] = ...,
+    gamma: float = ...,
+    terminal_reward: Optional[AbstractValueFunction] = ...,
+    compact: bool = ...,
+    return_actions: bool = ...,
+) -> Union[Tensor, Tuple[Tensor, Tensor]]: ...
@@ -0,0 +1,131 @@
+import os
+
+import pytest
+import torch
+import torch.nn as nn
+
+from rllib.dataset import ExperienceReplay, PrioritizedExperienceReplay
+from rllib.dataset.datatypes import Observation
+from rllib.util.checkpointer import Checkpointer
+
+
+@pytest.fixture(params=[True, False])
+def background(request):
+    return request.param
+
+
+@pytest.fixture(params=["object", "tensor"])
+def storage(request):
+    return request.param
+
+
+@pytest.fixture(params=[0, 2])
+def num_memory_steps(request):
+    return request.param
+
+
+def get_state(storage, num_memory_steps, memory_class=ExperienceReplay):
+    module = nn.Linear(4, 2)
+    return {
+        "module": module,
+        "optimizer": torch.optim.Adam(module.parameters()),
+        "memory": memory_class(
+            max_len=20, num_memory_steps=num_memory_steps, storage=storage
+        ),
+        "counters": {"total_episodes": 0},
+    }
+
+
+def fill(state, num_transitions):
+    for i in range(num_transitions):
+        state["memory"].append(
+            Observation.random_example(dim_state=(4,), dim_action=(2,))
+        )
+        if i % 7 == 6:
+            state["memory"].end_episode()
+    state["counters"]["total_episodes"] += 1
+
+
+def assert_equal_memories(memory, other):
+    assert memory.data_count == other.data_count
+    torch.testing.assert_close(memory.valid, other.valid)
+    torch.testing.assert_close(memory.weights, other.weights)
+    assert sorted(memory.valid_indexes.tolist()) == sorted(other.valid_indexes.tolist())
+    assert memory.all_raw == other.all_raw
+
+
+def test_save_load(tmp_path, background, storage, num_memory_steps):
+    checkpointer = Checkpointer(background=background)
+    state = get_state(storage, num_memory_steps)
+    for num_transitions in [5, 12, 1, 30, 9]:
+        fill(state, num_transitions)
+        checkpointer.save(state, str(tmp_path))
+    checkpointer.wait()
+
+    new_state = get_state(storage, num_memory_steps)
+    data = Checkpointer().load(new_state, str(tmp_path))
+    assert data == {"counters": {"total_episodes": 5}}
+    torch.testing.assert_close(new_state["module"].weight, state["module"].weight)
+    assert_equal_memories(new_state["memory"], state["memory"])
+
+
+def test_interrupted_write(tmp_path, storage):
+    state = get_state(storage, 0)
+    fill(state, 12)
+    Checkpointer().save(state, str(tmp_path))
+    replay_dir = os.path.join(str(tmp_path), "checkpoint", "replay", "memory")
+    with open(os.path.join(replay_dir, f"{99:012d}.pt.tmp"), "wb") as file:
+        file.write(b"truncated")
+
+    new_state = get_state(storage, 0)
+    Checkpointer().load(new_state, str(tmp_path))
+    assert_equal_memories(new_state["memory"], state["memory"])
+
+
+def test_incremental(tmp_path, storage):
+    checkpointer = Checkpointer()
+    state = get_state(storage, 0)
+    replay_dir = os.path.join(str(tmp_path), "checkpoint", "replay", "memory")
+
+    fill(state, 5)
+    checkpointer.save(state, str(tmp_path))
+    fill(state, 3)
+    checkpointer.save(state, str(tmp_path))
+    assert sorted(os.listdir(replay_dir)) == ["000000000000.pt", "000000000005.pt"]
+    chunk = torch.load(os.path.join(replay_dir, "000000000005.pt"), weights_only=False)
+    assert chunk["indexes"].tolist() == [5, 6, 7]
+
+    checkpointer.save(state, str(tmp_path))  # No new transitions, no new chunk.
+    assert len(os.listdir(replay_dir)) == 2
+
+    fill(state, 40)  # The chunks are compacted.
+    checkpointer.save(state, str(tmp_path))
+    assert os.listdir(replay_dir) == ["000000000028.pt"]
+
+    state["memory"].reset()
+    fill(state, 2)
+    checkpointer.save(state, str(tmp_path))
+    assert os.listdir(replay_dir) == ["000000000000.pt"]
+
+
+def test_prioritized(tmp_path, storage):
+    state = get_state(storage, 0, PrioritizedExperienceReplay)
+    fill(state, 25)
+    Checkpointer().save(state, str(tmp_path))
+
+    new_state = get_state(storage, 0, PrioritizedExperienceReplay)
+    Checkpointer().load(new_state, str(tmp_path))
+    memory = new_state["memory"]
+    assert_equal_memories(memory, state["memory"])
+    torch.testing.assert_close(memory.priorities, state["memory"].priorities)
+
+
+def test_best(tmp_path):
+    state = get_state("object", 0)
+    fill(state, 5)
+    Checkpointer().save(state, str(tmp_path), name="best", save_replay=False)
+    assert not os.path.exists(os.path.join(str(tmp_path), "checkpoint", "replay"))
+
+    new_state = get_state("object", 0)
+    Checkpointer().load(new_state, str(tmp_path), name="best")
+    assert len(new_state["memory"]) == 0
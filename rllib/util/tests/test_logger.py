@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+import torch
+
+from rllib.util.logger import Logger, StreamingLogger
+
+
+@pytest.fixture(params=[True, False])
+def background(request):
+    return request.param
+
+
+def fill(logger, num_episodes=5, num_steps=7):
+    for episode in range(num_episodes):
+        for step in range(num_steps):
+            logger.update(
+                loss=torch.tensor([step, episode], dtype=torch.float),
+                reward=float(step),
+                count=np.int64(step),
+            )
+        logger.end_episode(train_return=float(episode))
+
+
+def test_equivalence(background):
+    logger = Logger("test_logger")
+    streaming = StreamingLogger("test_logger", buffer_size=8, background=background)
+    fill(logger)
+    fill(streaming)
+    streaming.flush(wait=True)
+
+    assert logger.statistics == list(streaming.statistics)
+    assert logger.get("train_return") == streaming.get("train_return")
+    assert str(logger) == str(streaming)
+
+    with open(f"{streaming.log_dir}/statistics.jsonl", "r") as f:
+        assert [json.loads(line) for line in f] == logger.statistics
+
+    all_values = {}
+    with open(f"{streaming.log_dir}/all.jsonl", "r") as f:
+        for line in f:
+            for key, values in json.loads(line).items():
+                all_values[key] = all_values.get(key, []) + values
+    assert all_values["reward"] == [float(step) for step in range(7)] * 5
+
+    logger.delete_directory()
+    streaming.delete_directory()
+
+
+def test_bounded_memory():
+    logger = StreamingLogger("test_logger", buffer_size=4, window=3)
+    fill(logger)
+    assert len(logger.all["reward"]) == 3
+    assert logger._buffer_ptr < 4
+    assert len(logger.statistics) == 3
+    assert len(logger) == logger.episode == 5
+    assert len(logger.get("train_return")) == 5
+    logger.delete_directory()
+
+
+def test_load(background):
+    logger = StreamingLogger("test_logger", background=background)
+    fill(logger)
+    logger.export_to_json()
+
+    new = StreamingLogger("test_logger", window=200)
+    new.load_from_json(logger.log_dir)
+    assert new.statistics == logger.statistics
+    assert new.episode == logger.episode
+
+    short = StreamingLogger("test_logger", window=2)
+    short.load_from_json(logger.log_dir)
+    assert list(short.statistics) == list(logger.statistics)[-2:]
+    assert short.episode == logger.episode
+    assert short.get("train_return") == logger.get("train_return")
+    short.delete_directory()
+    assert list(new.all["reward"]) == [float(step) for step in range(7)] * 5
+    assert new.keys == logger.keys
+
+    logger.delete_directory()
+    new.delete_directory()
+
+
+def test_columns():
+    logger = Logger("test_logger")
+    for episode in range(15):
+        logger.update(reward=float(episode % 4))
+        logger.end_episode(train_return=float(episode), info="text")
+
+    column = logger.get_column("train_return")
+    assert len(column) == 15
+    assert column.max == 14.0 and column.min == 0.0
+    assert column.mean == pytest.approx(7.0)
+    assert column.window_mean(10) == pytest.approx(9.5)
+    assert logger.get("train_return") == [float(i) for i in range(15)]
+    assert logger.get("info") == ["text"] * 15
+    with pytest.raises(TypeError):
+        logger.get_column("info")
+    assert len(logger.get_column("eval_return")) == 0
+
+    logger.export_to_json()
+    new = Logger("test_logger")
+    new.load_from_json(logger.log_dir)
+    assert new.get_column("reward").values.tolist() == logger.get("reward")
+
+    logger.delete_directory()
+    new.delete_directory()
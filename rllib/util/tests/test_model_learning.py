@@ -0,0 +1,144 @@
+import pytest
+import torch
+
+from rllib.dataset import BootstrapExperienceReplay
+from rllib.dataset.datatypes import Observation
+from rllib.model import EnsembleModel, NNModel
+from rllib.model.utilities import PredictionStrategy
+from rllib.util.logger import Logger
+from rllib.util.training.model_learning import (
+    calibrate_model,
+    train_ensemble_step,
+    train_model,
+)
+from rllib.util.training.utilities import (
+    TemperatureCalibration,
+    calibration_count,
+    calibration_score,
+    ensemble_model_loss,
+    gaussian_cdf,
+    model_loss,
+    sharpness,
+)
+
+
+@pytest.fixture(params=[True, False])
+def deterministic(request):
+    return request.param
+
+
+def get_data(num_heads, size=64):
+    memory = BootstrapExperienceReplay(max_len=size, num_bootstraps=num_heads)
+    for _ in range(size):
+        observation = Observation.random_example(dim_state=(4,), dim_action=(2,))
+        observation.next_state = observation.state + 0.1 * observation.action.sum()
+        memory.append(observation)
+    return memory
+
+
+def get_discrete_data(num_states, size=64):
+    memory = BootstrapExperienceReplay(max_len=size, num_bootstraps=1)
+    for _ in range(size):
+        memory.append(
+            Observation.random_example(
+                dim_state=(), dim_action=(2,), num_states=num_states
+            )
+        )
+    return memory
+
+
+def get_model(deterministic, num_heads=3):
+    return EnsembleModel(
+        dim_state=(4,),
+        dim_action=(2,),
+        num_heads=num_heads,
+        deterministic=deterministic,
+    )
+
+
+def test_ensemble_model_loss(deterministic):
+    model = get_model(deterministic)
+    observation, _, _ = get_data(3).sample_batch(16)
+    loss = ensemble_model_loss(model, observation)
+    assert loss.shape == (3, 16)
+
+    with PredictionStrategy(model, prediction_strategy="set_head"):
+        for i in range(3):
+            model.set_head(i)
+            torch.testing.assert_close(loss[i], model_loss(model, observation))
+
+
+def test_fused_gradient(deterministic):
+    model = get_model(deterministic)
+    observation, _, mask = get_data(3).sample_batch(16)
+    mask[:, 0] = 0
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.0)
+
+    fused_loss = train_ensemble_step(model, observation, optimizer, mask)
+    grad = model.nn[0].head.weight.grad.clone()
+    loss = train_ensemble_step(model, observation, optimizer, mask, fused=False)
+    torch.testing.assert_close(fused_loss, loss)
+
+    # The masked head gets no gradient, the other ones get the one of their loss.
+    assert torch.all(grad.reshape(4, 3, -1)[:, 0] == 0)
+    assert torch.all(grad.reshape(4, 3, -1)[:, 1:].abs().sum(-1) > 0)
+
+
+def test_train_model(deterministic):
+    model = get_model(deterministic)
+    memory = get_data(3, size=200)
+    observation, _, _ = memory.sample_batch(200)
+    with torch.no_grad():
+        initial_loss = ensemble_model_loss(model, observation).mean()
+
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-2)
+    train_model(model, memory, optimizer, batch_size=32, max_iter=100)
+    with torch.no_grad():
+        assert ensemble_model_loss(model, observation).mean() < initial_loss
+
+
+def test_calibration_count():
+    target, mean, scale = torch.randn(3, 50, 4).unbind(0)
+    chol_std = torch.diag_embed(scale.abs())
+    buckets = torch.linspace(0, 1, 11)
+
+    p_hat = gaussian_cdf(target, mean, chol_std).reshape(-1)
+    count = [(p_hat <= p).double().mean() for p in buckets]
+    torch.testing.assert_close(
+        calibration_count(target, mean, chol_std, buckets), torch.stack(count)
+    )
+
+
+def test_temperature_calibration():
+    model = NNModel(dim_state=(4,), dim_action=(2,), deterministic=False)
+    observation = get_data(1).all_data
+    calibration = TemperatureCalibration(model, observation)
+
+    temperatures = torch.tensor([0.1, 1.0, 3.0])
+    scores = calibration.scores(temperatures)
+    for temperature, score in zip(temperatures, scores):
+        model.temperature = temperature
+        with torch.no_grad():
+            torch.testing.assert_close(score, calibration_score(model, observation))
+            torch.testing.assert_close(
+                calibration.sharpness(temperature), sharpness(model, observation)
+            )
+
+
+def test_calibrate_model():
+    model = NNModel(dim_state=(4,), dim_action=(2,), deterministic=False)
+    memory = get_data(1, size=200)
+    with torch.no_grad():
+        initial_score = calibration_score(model, memory.all_data)
+
+    calibrate_model(model, memory, logger=Logger("calibration"))
+    assert 0.1 <= model.temperature <= 100.0
+    with torch.no_grad():
+        assert calibration_score(model, memory.all_data) < initial_score
+
+
+def test_calibrate_discrete_model():
+    model = NNModel(dim_state=(), dim_action=(2,), num_states=4, deterministic=False)
+    temperature = model.temperature.clone()
+    calibrate_model(model, get_discrete_data(4), logger=Logger("calibration"))
+    assert model.temperature == temperature
@@ -1,10 +1,30 @@
 import pytest
+import torch
 
-from rllib.agent import RandomAgent
-from rllib.environment import GymEnvironment
+from rllib.agent import DQNAgent, RandomAgent
+from rllib.dataset.utilities import stack_list_of_tuples
+from rllib.environment import EnvironmentPool, GymEnvironment
 from rllib.environment.mdps import EasyGridWorld
-from rllib.policy import RandomPolicy
-from rllib.util.rollout import rollout_agent, rollout_policy
+from rllib.model import AbstractModel, EnsembleModel, NNModel
+from rllib.model.utilities import PredictionStrategy
+from rllib.policy import NNPolicy, RandomPolicy
+from rllib.util.neural_networks.utilities import DisableGradient
+from rllib.util.rollout import (
+    rollout_actions,
+    rollout_agent,
+    rollout_agent_batched,
+    rollout_model,
+    rollout_model_stacked,
+    rollout_policy,
+    rollout_returns,
+)
+from rllib.util.value_estimation import discount_sum
+from rllib.value_function import NNValueFunction
+
+
+class StatefulPolicy(NNPolicy):
+    def reset(self):
+        pass
 
 
 @pytest.fixture(
@@ -37,3 +57,291 @@ def test_rollout_easy_grid_world():
 
     policy = agent.policy
     rollout_policy(environment, policy)
+
+
+def test_rollout_agent_batched(environment):
+    environments = [GymEnvironment(environment.name) for _ in range(3)]
+    agent = RandomAgent.default(environment)
+    rollout_agent_batched(environments, agent, num_episodes=5, max_steps=20)
+
+    assert agent.total_episodes == 5
+    assert len(agent.episode_steps) == 5
+    assert sum(agent.episode_steps) == agent.total_steps
+    assert all(0 < steps <= 20 for steps in agent.episode_steps)
+
+
+def test_rollout_agent_batched_memory():
+    environments = [GymEnvironment("CartPole-v0") for _ in range(4)]
+    agent = DQNAgent.default(environments[0], exploration_episodes=2)
+    with pytest.raises(ValueError):  # The exploration is done with rollout_agent.
+        rollout_agent_batched(environments, agent, num_episodes=6, max_steps=15)
+    rollout_agent(environments[0], agent, num_episodes=2, max_steps=15)
+    rollout_agent_batched(environments, agent, num_episodes=6, max_steps=15)
+
+    assert agent.total_episodes == 8
+    assert len(agent.memory) == agent.total_steps
+
+
+def test_rollout_agent_batched_steps():
+    environments = [GymEnvironment("Pendulum-v1") for _ in range(3)]
+    agent = RandomAgent.default(environments[0])
+    total_steps = []
+
+    def callback(agent_, environment, episode):
+        total_steps.append((episode, agent_.total_steps))
+
+    rollout_agent_batched(
+        environments,
+        agent,
+        num_episodes=5,
+        max_steps=10,
+        callback_frequency=1,
+        callbacks=[callback],
+    )
+    # The steps of an episode are counted when the agent observes it.
+    assert total_steps == [(i, 10 * (i + 1)) for i in range(5)]
+
+
+def test_rollout_agent_batched_stateful_policy():
+    environments = [GymEnvironment("Pendulum-v1") for _ in range(2)]
+    agent = RandomAgent.default(environments[0])
+    agent.policy = StatefulPolicy(dim_state=(3,), dim_action=(1,))
+    with pytest.raises(ValueError):
+        rollout_agent_batched(environments, agent, num_episodes=2, max_steps=10)
+
+
+def test_rollout_agent_pool():
+    environments = EnvironmentPool("Pendulum-v1", num_envs=3, seed=0)
+    agent = RandomAgent.default(environments.environment)
+    rollout_agent_batched(environments, agent, num_episodes=4, max_steps=10)
+    environments.close()
+
+    assert agent.total_episodes == 4
+    assert agent.total_steps == 40
+
+
+class RandomTermination(AbstractModel):
+    def __init__(self):
+        super().__init__(dim_state=(), dim_action=(), model_kind="termination")
+
+    def forward(self, state, action, next_state=None):
+        return torch.zeros(state.shape[:-1] + (2,))
+
+
+@pytest.mark.parametrize("termination", [False, True])
+@pytest.mark.parametrize("grad", [False, True])
+def test_rollout_model_stacked(termination, grad):
+    dynamical_model = NNModel(dim_state=(3,), dim_action=(1,), layers=(8,))
+    reward_model = NNModel(
+        dim_state=(3,), dim_action=(1,), model_kind="rewards", layers=(8,)
+    )
+    policy = NNPolicy(dim_state=(3,), dim_action=(1,), layers=(8,))
+    kwargs = dict(
+        dynamical_model=dynamical_model,
+        reward_model=reward_model,
+        policy=policy,
+        initial_state=torch.randn(5, 3),
+        termination_model=RandomTermination() if termination else None,
+        max_steps=20,
+    )
+
+    with torch.set_grad_enabled(grad):
+        torch.manual_seed(0)
+        expected = stack_list_of_tuples(rollout_model(**kwargs))
+        torch.manual_seed(0)
+        observation = rollout_model_stacked(**kwargs)
+
+    assert observation.state.shape[0] == expected.state.shape[0]
+    assert observation.reward.requires_grad == grad
+    for x, y in zip(observation, expected):
+        torch.testing.assert_close(x, y, equal_nan=True)
+
+
+@pytest.mark.parametrize("stacked", [False, True])
+def test_rollout_heads(stacked):
+    dynamical_model = EnsembleModel(
+        dim_state=(3,), dim_action=(1,), num_heads=4, deterministic=True
+    )
+    reward_model = EnsembleModel(
+        dim_state=(3,),
+        dim_action=(1,),
+        num_heads=4,
+        deterministic=True,
+        model_kind="rewards",
+    )
+    kwargs = dict(
+        dynamical_model=dynamical_model,
+        reward_model=reward_model,
+        policy=NNPolicy(dim_state=(3,), dim_action=(1,), deterministic=True),
+        initial_state=torch.randn(5, 3),
+        max_steps=6,
+    )
+    rollout = rollout_model_stacked if stacked else rollout_model
+    with torch.no_grad():
+        observation = rollout(num_heads=4, **kwargs)
+        expected = []
+        with PredictionStrategy(
+            dynamical_model, reward_model, prediction_strategy="set_head"
+        ):
+            for i in range(4):
+                dynamical_model.set_head(i)
+                reward_model.set_head(i)
+                expected.append(rollout(**kwargs))
+    if not stacked:
+        observation = stack_list_of_tuples(observation)
+        expected = [stack_list_of_tuples(trajectory) for trajectory in expected]
+
+    assert observation.state.shape == (6, 4, 5, 3)
+    for i in range(4):
+        for x, y in list(zip(observation, expected[i]))[:5]:
+            torch.testing.assert_close(x[:, i], y)
+
+
+@pytest.mark.parametrize("termination", [False, True])
+@pytest.mark.parametrize("stacked", [False, True])
+def test_rollout_model_checkpoint(termination, stacked):
+    dynamical_model = NNModel(dim_state=(3,), dim_action=(1,), layers=(8,))
+    reward_model = NNModel(
+        dim_state=(3,), dim_action=(1,), model_kind="rewards", layers=(8,)
+    )
+    policy = NNPolicy(dim_state=(3,), dim_action=(1,), layers=(8,))
+    kwargs = dict(
+        dynamical_model=dynamical_model,
+        reward_model=reward_model,
+        policy=policy,
+        initial_state=torch.randn(5, 3),
+        termination_model=RandomTermination() if termination else None,
+        max_steps=10,
+    )
+    rollout = rollout_model_stacked if stacked else rollout_model
+
+    outputs, grads = [], []
+    for checkpoint_steps in [None, 3]:
+        torch.manual_seed(0)
+        with DisableGradient(dynamical_model, reward_model):
+            observation = rollout(checkpoint_steps=checkpoint_steps, **kwargs)
+        if not stacked:
+            observation = stack_list_of_tuples(observation)
+        policy.zero_grad()
+        observation.reward.sum().backward()
+        outputs.append(observation)
+        grads.append([p.grad.clone() for p in policy.parameters()])
+        assert all(p.grad is None for p in dynamical_model.parameters())
+
+    for x, y in zip(*outputs):
+        torch.testing.assert_close(x, y, equal_nan=True)
+    for x, y in zip(*grads):
+        torch.testing.assert_close(x, y)
+
+
+class Drift(AbstractModel):
+    def __init__(self):
+        super().__init__(dim_state=(3,), dim_action=(1,))
+        self.batch_sizes = []
+
+    def forward(self, state, action, next_state=None):
+        self.batch_sizes.append(state.shape[0])
+        next_state = state + 0.5 + 0.1 * action
+        return next_state, torch.zeros(next_state.shape + (3,))
+
+
+class StateTermination(AbstractModel):
+    def __init__(self, threshold):
+        super().__init__(dim_state=(), dim_action=(), model_kind="termination")
+        self.threshold = threshold
+
+    def forward(self, state, action, next_state=None):
+        done = (next_state[..., 0] > self.threshold).float()
+        return torch.stack((1 - done, done), dim=-1).log()
+
+
+def get_compact_kwargs():
+    reward_model = NNModel(
+        dim_state=(3,), dim_action=(1,), model_kind="rewards", layers=(8,)
+    )
+    reward_model.deterministic = True
+    initial_state = torch.randn(32, 3)
+    initial_state[:, 0] = torch.linspace(-2, 2, 32)
+    return dict(
+        dynamical_model=Drift(),
+        reward_model=reward_model,
+        initial_state=initial_state,
+        termination_model=StateTermination(threshold=2.0),
+    )
+
+
+@pytest.mark.parametrize("stacked", [False, True])
+def test_rollout_model_compact(stacked):
+    kwargs = get_compact_kwargs()
+    kwargs.update(
+        policy=NNPolicy(dim_state=(3,), dim_action=(1,), deterministic=True),
+        max_steps=10,
+    )
+    rollout = rollout_model_stacked if stacked else rollout_model
+    with torch.no_grad():
+        expected = rollout(**kwargs)
+        kwargs["dynamical_model"].batch_sizes = []
+        observation = rollout(compact=True, **kwargs)
+    if not stacked:
+        expected = stack_list_of_tuples(expected)
+        observation = stack_list_of_tuples(observation)
+
+    batch_sizes = kwargs["dynamical_model"].batch_sizes
+    assert batch_sizes[0] == 32 and batch_sizes[-1] < 8
+    assert batch_sizes == sorted(batch_sizes, reverse=True)
+    torch.testing.assert_close(observation.done, expected.done)
+    torch.testing.assert_close(observation.reward, expected.reward)
+    live = torch.cat((torch.zeros_like(expected.done[:1]), expected.done[:-1])) == 0
+    for x, y in list(zip(observation, expected))[:4]:
+        torch.testing.assert_close(x[live], y[live])
+    assert torch.all(observation.action[~live] == 0)
+    torch.testing.assert_close(observation.next_state[~live], observation.state[~live])
+
+
+def test_rollout_actions_compact():
+    kwargs = get_compact_kwargs()
+    kwargs.update(action_sequence=torch.zeros(10, 32, 1))
+    with torch.no_grad():
+        expected = stack_list_of_tuples(rollout_actions(**kwargs))
+        observation = stack_list_of_tuples(rollout_actions(compact=True, **kwargs))
+
+    torch.testing.assert_close(observation.done, expected.done)
+    torch.testing.assert_close(observation.reward, expected.reward)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_rollout_returns(compact):
+    kwargs = get_compact_kwargs()
+    action_sequence = torch.randn(10, 32, 1)
+    terminal_reward = NNValueFunction(dim_state=(3,), dim_action=(1,))
+    with torch.no_grad():
+        trajectory = stack_list_of_tuples(
+            rollout_actions(action_sequence=action_sequence, **kwargs), dim=-2
+        )
+        returns = rollout_returns(
+            action_sequence=action_sequence,
+            gamma=0.9,
+            terminal_reward=terminal_reward,
+            compact=compact,
+            **kwargs,
+        )
+        final_value = terminal_reward(trajectory.next_state[..., -1, :])
+
+    expected = discount_sum(trajectory.reward, gamma=0.9)
+    not_done = 1 - trajectory.done[..., -1:]
+    expected += 0.9 ** trajectory.reward.shape[-2] * final_value * not_done
+    torch.testing.assert_close(returns, expected)
+
+    returns, actions = rollout_returns(
+        action_sequence=action_sequence,
+        compact=compact,
+        return_actions=True,
+        **kwargs,
+    )
+    assert actions.shape == action_sequence.shape
+    # The actions of the live particles are kept, the other ones are zero.
+    done = torch.cat((torch.zeros(32, 1), trajectory.done[..., :-1]), -1).T.bool()
+    live = torch.zeros(10, 32, dtype=torch.bool)
+    live[: done.shape[0]] = ~done
+    torch.testing.assert_close(actions[live], action_sequence[live])
+    assert torch.all(actions[~live] == 0)
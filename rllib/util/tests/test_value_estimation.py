@@ -1,6 +1,5 @@
 import numpy as np
 import pytest
-import scipy
 import torch
 import torch.testing
 
@@ -44,7 +43,7 @@ class TestDiscountedCumSum(object):
         if batch:
             rewards = np.tile(np.array(rewards), (5, 1, 1))
             cum_rewards = np.tile(np.array(cum_rewards), (5, 1, 1))
-        assert scipy.allclose(cum_rewards, discount_cumsum(np.array(rewards), gamma))
+        assert np.allclose(cum_rewards, discount_cumsum(np.array(rewards), gamma))
 
         torch.testing.assert_allclose(
             torch.tensor(cum_rewards), discount_cumsum(torch.tensor(rewards), gamma)
@@ -67,6 +66,28 @@ class TestDiscountedCumSum(object):
                 ),
             )
 
+    def test_done_and_discounts(self, gamma):
+        rewards = torch.randn(3, 7, 2, dtype=torch.double, requires_grad=True)
+        discount = gamma * torch.rand(3, 7, dtype=torch.double)
+        done = torch.rand(3, 7) < 0.3
+
+        expected, r = [], 0
+        for t in reversed(range(7)):
+            r = rewards[:, t] + (discount[:, t] * ~done[:, t]).unsqueeze(-1) * r
+            expected.insert(0, r)
+        expected = torch.stack(expected, dim=1)
+
+        returns = discount_cumsum(rewards, discount, done=done)
+        assert returns.dtype is torch.double
+        torch.testing.assert_close(returns, expected)
+        torch.autograd.gradcheck(
+            lambda x: discount_cumsum(x, discount, done=done), (rewards,)
+        )
+        np.testing.assert_allclose(
+            discount_cumsum(rewards.detach().numpy(), discount, done=done),
+            expected.detach().numpy(),
+        )
+
     def test_shape_and_type(self, rewards, gamma):
         np_returns = discount_cumsum(np.atleast_2d(np.array(rewards)).T, gamma)
         assert np_returns.shape == (len(rewards), 1)
@@ -14,10 +14,10 @@ from rllib.util.logger import Logger
 from rllib.util.utilities import tensor_to_distribution
 
 from .utilities import (
-    calibration_score,
+    TemperatureCalibration,
+    ensemble_model_loss,
     get_model_validation_score,
     model_loss,
-    sharpness,
 )
 
 
@@ -33,8 +33,39 @@ def train_nn_step(model, observation, optimizer, weight=1.0, dynamical_model=Non
     return loss
 
 
-def train_ensemble_step(model, observation, optimizer, mask, dynamical_model=None):
-    """Train a model ensemble."""
+def train_fused_ensemble_step(model, observation, optimizer, mask):
+    """Train all the heads of an ensemble with a single forward and backward pass.
+
+    The loss of each head is weighted with its bootstrap mask and averaged over the
+    batch. The losses of the heads are added, so that each head gets the gradient
+    of its own loss and the shared layers get the sum of them.
+    """
+    optimizer.zero_grad()
+    loss = (mask.transpose(0, 1) * ensemble_model_loss(model, observation)).mean(-1)
+    loss.sum().backward()
+    optimizer.step()
+
+    return loss.mean()
+
+
+def train_ensemble_step(
+    model, observation, optimizer, mask, dynamical_model=None, fused=True
+):
+    """Train a model ensemble.
+
+    If `fused', the heads of an EnsembleModel, which share the hidden layers, are
+    trained jointly with `train_fused_ensemble_step'. Otherwise, and for multi-step
+    predictions or independent ensembles, the heads are trained one at a time.
+    """
+    state = observation.state
+    if (
+        fused
+        and isinstance(model, EnsembleModel)
+        and not model.discrete_state
+        and (dynamical_model is None or state.ndim < 3 or state.shape[1] == 1)
+    ):
+        return train_fused_ensemble_step(model, observation, optimizer, mask)
+
     ensemble_loss = 0
 
     model_list = list(range(model.num_heads))
@@ -70,14 +101,25 @@ def train_exact_gp_type2mll_step(model, observation, optimizer):
 
 
 def _train_model_step(
-    model, observation, optimizer, mask, logger, dynamical_model=None
+    model,
+    observation,
+    optimizer,
+    mask,
+    logger,
+    dynamical_model=None,
+    fused_ensemble=True,
 ):
     if not isinstance(observation, Observation):
         observation = Observation(**observation)
     observation.action = observation.action[..., : model.dim_action[0]]
     if isinstance(model, EnsembleModel) or isinstance(model, IndependentEnsembleModel):
         loss = train_ensemble_step(
-            model, observation, optimizer, mask, dynamical_model=dynamical_model
+            model,
+            observation,
+            optimizer,
+            mask,
+            dynamical_model=dynamical_model,
+            fused=fused_ensemble,
         )
     elif isinstance(model, NNModel):
         loss = train_nn_step(
@@ -121,6 +163,7 @@ def train_model(
     logger=None,
     validation_set=None,
     dynamical_model=None,
+    fused_ensemble=True,
 ):
     """Train a Predictive Model.
 
@@ -152,6 +195,8 @@ def train_model(
         Dataset to validate with.
     dynamical_model: AbstractModel, optional.
         Model to propagate predictions with.
+    fused_ensemble: bool, optional (default=True).
+        Train the heads of ensembles jointly, see `train_ensemble_step'.
     """
     if logger is None:
         logger = Logger(f"{model.name}_training", tensorboard=True)
@@ -170,7 +215,13 @@ def train_model(
     for num_iter in tqdm(range(max_iter)):
         observation, idx, mask = train_set.sample_batch(batch_size)
         _train_model_step(
-            model, observation, optimizer, mask, logger, dynamical_model=dynamical_model
+            model,
+            observation,
+            optimizer,
+            mask,
+            logger,
+            dynamical_model=dynamical_model,
+            fused_ensemble=fused_ensemble,
         )
 
         observation, idx, mask = validation_set.sample_batch(batch_size)
@@ -195,93 +246,53 @@ def calibrate_model(
     epsilon=0.0001,
     temperature_range=(0.1, 100.0),
     logger=None,
+    num_temperatures=32,
 ):
     """Calibrate a model by scaling the temperature.
 
-    First, find a suitable temperature by logarithmic search (increasing or decreasing).
-    Then, find a reasonable temperature by binary search.
+    The calibration scores of a log-spaced grid of `num_temperatures' temperatures
+    are evaluated at once, see `TemperatureCalibration', and the grid is refined
+    around the best temperature until its log-spacing is below `epsilon'. Hence,
+    the model only predicts the calibration set once.
+
+    Models with discrete states predict categorical distributions, whose logits are
+    scaled by the temperature. They are not calibrated.
     """
+    if model.discrete_state:
+        return
     if logger is None:
         logger = Logger(f"{model.name}_calibration")
 
     observation = calibration_set.all_data
     observation.action = observation.action[..., : model.dim_action[0]]
+    calibration = TemperatureCalibration(model, observation)
 
-    with torch.no_grad():
-        initial_score = calibration_score(model, observation).item()
-    initial_temperature = model.temperature
-
-    # Increase temperature.
-    model.temperature = initial_temperature.clone()
-    score, temperature = initial_score, initial_temperature.clone()
+    temperature = model.temperature.clone().clamp(*temperature_range)
+    score = calibration.scores(temperature.unsqueeze(0))[0]
+    low, high = np.log(temperature_range[0]), np.log(temperature_range[1])
     for _ in range(max_iter):
-        if model.temperature > 2 * temperature_range[1]:
-            break
-        model.temperature *= 2
-        with torch.no_grad():
-            new_score = calibration_score(model, observation).item()
-        if new_score > score:
+        temperatures = torch.exp(torch.linspace(low, high, num_temperatures))
+        scores = calibration.scores(temperatures)
+        best = torch.argmin(scores)
+        if scores[best] < score:
+            score, temperature = scores[best], temperatures[best]
+
+        spacing = (high - low) / (num_temperatures - 1)
+        if spacing < epsilon:
             break
-        score, temperature = new_score, model.temperature.clone()
-    max_score, max_temperature = score, temperature
-
-    # Decrease temperature.
-    model.temperature = initial_temperature.clone()
-    score, temperature = initial_score, initial_temperature.clone()
-    for _ in range(max_iter):
-        if model.temperature < temperature_range[0] / 2:
-            break
-        model.temperature /= 2
-        with torch.no_grad():
-            new_score = calibration_score(model, observation).item()
-        if new_score > score:
-            break
-        score, temperature = new_score, model.temperature.clone()
-    min_score, min_temperature = score, temperature
-
-    if max_score < min_score:
-        score, temperature = max_score, max_temperature
-    else:
-        score, temperature = min_score, min_temperature
-
-    # Binary search:
-    min_temperature, max_temperature = temperature / 2, 2 * temperature
-    with torch.no_grad():
-        model.temperature = max_temperature
-        max_score = calibration_score(model, observation).item()
-        model.temperature = min_temperature
-        min_score = calibration_score(model, observation).item()
-
-    if min_score > max_score:
-        max_score, min_score = min_score, max_score
-        max_temperature, min_temperature = min_temperature, max_temperature
-
-    for _ in range(max_iter):
-        if max_score - min_score < epsilon:
-            break
-
-        if score < max_score:
-            max_score, max_temperature = score, temperature.clone()
-        else:
-            min_score, min_temperature = score, temperature.clone()
-
-        if min_score > max_score:
-            max_score, min_score = min_score, max_score
-            max_temperature, min_temperature = min_temperature, max_temperature
-
-        temperature = torch.exp(
-            0.5 * (torch.log(min_temperature) + torch.log(max_temperature))
+        low = max(torch.log(temperature).item() - spacing, np.log(temperature_range[0]))
+        high = min(
+            torch.log(temperature).item() + spacing, np.log(temperature_range[1])
         )
-        model.temperature = temperature.clone().clamp(*temperature_range)
-        with torch.no_grad():
-            score = calibration_score(model, observation).item()
-    sharpness_ = sharpness(model, observation).item()
+
+    model.temperature = temperature.clone()
+    sharpness_ = calibration.sharpness(temperature).item()
 
     logger.update(
         **{
             f"{model.model_kind[:3]}-temperature": model.temperature.item(),
             f"{model.model_kind[:3]}-post-sharp": sharpness_,
-            f"{model.model_kind[:3]}-post-calib": score,
+            f"{model.model_kind[:3]}-post-calib": score.item(),
         }
     )
 
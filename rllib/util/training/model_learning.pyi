@@ -21,12 +21,16 @@ def train_nn_step(
     weight: Union[Tensor, float] = ...,
     dynamical_model: Optional[AbstractModel] = ...,
 ) -> Tensor: ...
+def train_fused_ensemble_step(
+    model: EnsembleModel, observation: Observation, optimizer: Optimizer, mask: Tensor
+) -> Tensor: ...
 def train_ensemble_step(
     model: Union[EnsembleModel, IndependentEnsembleModel],
     observation: Observation,
     optimizer: Optimizer,
     mask: Tensor,
     dynamical_model: Optional[AbstractModel] = ...,
+    fused: bool = ...,
 ) -> Tensor: ...
 def train_exact_gp_type2mll_step(
     model: ExactGPModel, observation: Observation, optimizer: Optimizer
@@ -44,6 +48,7 @@ def train_model(
     logger: Optional[Logger] = ...,
     validation_set: Optional[ExperienceReplay] = ...,
     dynamical_model: Optional[AbstractModel] = ...,
+    fused_ensemble: bool = ...,
 ) -> None: ...
 def calibrate_model(
     model: AbstractModel,
@@ -52,7 +57,7 @@ def calibrate_model(
     epsilon: float = ...,
     temperature_range: Tuple[float, float] = ...,
     logger: Optional[Logger] = ...,
-    dynamical_model: Optional[AbstractModel] = ...,
+    num_temperatures: int = ...,
 ) -> None: ...
 def evaluate_model(
     model: AbstractModel,
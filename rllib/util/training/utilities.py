@@ -4,6 +4,7 @@ import torch
 import torch.nn as nn
 from torch.distributions import Categorical
 
+from rllib.model.utilities import PredictionStrategy
 from rllib.util.neural_networks.utilities import one_hot_encode
 from rllib.util.utilities import tensor_to_distribution
 
@@ -50,14 +51,18 @@ def gaussian_cdf(x, mean, chol_std):
 def calibration_count(target, mean, chol_std, buckets):
     """Get the calibration count of a target for the given buckets."""
     p_hat = gaussian_cdf(target, mean, chol_std).reshape(-1)
-    total = len(p_hat)
+    return _calibration_count(p_hat, buckets)
 
-    count = []
-    for p in buckets:
-        count.append((p_hat <= p).sum().double() / total)
-    count = torch.tensor(count)
 
-    return count
+def _calibration_count(p_hat, buckets):
+    """Get the fraction of `p_hat' that is below each bucket, along the last dim.
+
+    The sorted `p_hat' are counted with a single vectorized search.
+    """
+    p_hat = p_hat.sort(dim=-1)[0]
+    buckets = buckets.expand(*p_hat.shape[:-1], -1).contiguous()
+    count = torch.searchsorted(p_hat, buckets, right=True)
+    return count.double() / p_hat.shape[-1]
 
 
 def calibration_score(model, observation, bins=10, dynamical_model=None):
@@ -94,6 +99,58 @@ def _calibration_score(prediction, target, bins=10):
     return calibration_error
 
 
+class TemperatureCalibration(object):
+    """Calibration scores of a model at many temperatures from a single prediction.
+
+    The temperature scales the predictive standard deviation of the model. Hence,
+    the residuals and standard deviations are computed once, at the current
+    temperature of the model, and the calibration curves for other temperatures are
+    computed jointly by rescaling the standard deviations.
+    Only implemented for Gaussian predictions.
+
+    Parameters
+    ----------
+    model: AbstractModel.
+        Model to calibrate.
+    observation: Observation.
+        Calibration data.
+    bins: int, optional (default=10).
+        Number of buckets of the calibration curve.
+    """
+
+    def __init__(self, model, observation, bins=10):
+        target = get_target(model, observation)
+        with torch.no_grad():
+            mean, chol_std = get_prediction(model, observation)
+        self.temperature = model.temperature.clone()
+        self.residual = (target - mean).reshape(-1)
+        self.scale = torch.diagonal(chol_std, dim1=-1, dim2=-2).reshape(-1)
+        self.buckets = torch.linspace(0, 1, bins + 1)
+
+    def scores(self, temperatures):
+        """Get the calibration score of the model at each temperature.
+
+        Parameters
+        ----------
+        temperatures: Tensor
+            Temperatures with dimensions [num_temperatures].
+
+        Returns
+        -------
+        scores: Tensor
+            Calibration scores with dimensions [num_temperatures].
+        """
+        ratio = (temperatures / self.temperature).unsqueeze(-1)
+        z = self.residual / (ratio * self.scale + 1e-6)
+        p_hat = 0.5 * (1 + torch.erf(z / torch.sqrt(torch.tensor(2.0))))
+        count = _calibration_count(p_hat, self.buckets)
+        return torch.sum((self.buckets - count) ** 2, dim=-1)
+
+    def sharpness(self, temperature):
+        """Get the sharpness of the model at a temperature."""
+        return (temperature / self.temperature * self.scale).square().mean()
+
+
 def sharpness(model, observation, dynamical_model=None):
     """Get prediction sharpness score.
 
@@ -132,6 +189,23 @@ def model_loss(model, observation, dynamical_model=None):
     return _loss(prediction, target)
 
 
+def ensemble_model_loss(model, observation):
+    """Get the loss of each head of an ensemble model with a single forward pass.
+
+    The ensemble predicts all the heads in `multi_head' mode, which only needs one
+    pass through the shared layers, and the heads are moved to the first dimension.
+
+    Returns
+    -------
+    loss: Tensor
+        Loss of each head with dimensions [num_heads x batch_size].
+    """
+    target = get_target(model, observation)
+    with PredictionStrategy(model, prediction_strategy="multi_head"):
+        mean, scale_tril = model(observation.state, observation.action)
+    return _loss((mean.movedim(-2, 0), scale_tril.movedim(-3, 0)), target)
+
+
 def _loss(prediction, target):
     if len(prediction) == 1:  # Cross entropy loss.
         return nn.CrossEntropyLoss(reduction="none")(prediction[0], target)
@@ -143,11 +217,11 @@ def _loss(prediction, target):
     else:  # Probabilistic Model
         scale_tril_inv = torch.inverse(scale_tril)
         delta = scale_tril_inv @ ((mean - y).unsqueeze(-1))
-        loss = (delta.transpose(-2, -1) @ delta).squeeze()
+        loss = (delta.transpose(-2, -1) @ delta).squeeze(-1).squeeze(-1)
 
         # log det \Sigma = 2 trace log (scale_tril)
         idx = torch.arange(mean.shape[-1])
-        loss += 2 * torch.log(scale_tril[..., idx, idx]).mean(dim=-1).squeeze()
+        loss += 2 * torch.log(scale_tril[..., idx, idx]).mean(dim=-1)
 
     loss = loss.sum(dim=-1)  # add up time coordinates.
     return loss
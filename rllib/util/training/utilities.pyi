@@ -22,6 +22,18 @@ def calibration_score(
     bins: int = ...,
     dynamical_model: Optional[AbstractModel] = ...,
 ) -> Tensor: ...
+
+class TemperatureCalibration(object):
+    temperature: Tensor
+    residual: Tensor
+    scale: Tensor
+    buckets: Tensor
+    def __init__(
+        self, model: AbstractModel, observation: Observation, bins: int = ...
+    ) -> None: ...
+    def scores(self, temperatures: Tensor) -> Tensor: ...
+    def sharpness(self, temperature: Tensor) -> Tensor: ...
+
 def sharpness(
     model: AbstractModel,
     observation: Observation,
@@ -37,6 +49,7 @@ def model_loss(
     observation: Observation,
     dynamical_model: Optional[AbstractModel] = ...,
 ) -> Tensor: ...
+def ensemble_model_loss(model: AbstractModel, observation: Observation) -> Tensor: ...
 def rollout_predictions(
     dynamical_model: AbstractModel,
     model: AbstractModel,
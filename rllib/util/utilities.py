@@ -29,22 +29,31 @@ def set_random_seed(seed):
     torch.manual_seed(seed)
 
 
+def get_random_state():
+    """Get the simulation random state."""
+    return {"numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+
+
+def set_random_state(random_states):
+    """Set the simulation random state."""
+    if "numpy" in random_states:
+        np.random.set_state(random_states["numpy"])
+
+    if "torch" in random_states:
+        torch.set_rng_state(random_states["torch"])
+
+
 def save_random_state(directory):
     """Save the simulation random state in a directory."""
     with open(f"{directory}/random_state.pkl", "wb") as f:
-        pickle.dump({"numpy": np.random.get_state(), "torch": torch.get_rng_state()}, f)
+        pickle.dump(get_random_state(), f)
 
 
 def load_random_state(directory):
     """Load the simulation random state from a directory."""
     with open(f"{directory}/random_state.pkl", "rb") as f:
         random_states = pickle.load(f)
-
-    if "numpy" in random_states:
-        np.random.set_state(random_states["numpy"])
-
-    if "torch" in random_states:
-        torch.set_rng_state(random_states["torch"])
+    set_random_state(random_states)
 
 
 def integrate(function, distribution, num_samples=15):
@@ -1,4 +1,4 @@
-from typing import Any, Callable, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 import types
 import numpy as np
 import torch.__spec__ as torch_mod
@@ -11,6 +11,8 @@ from rllib.policy import AbstractPolicy
 
 def get_backend(array: Array) -> types.ModuleType: ...
 def set_random_seed(seed: int) -> None: ...
+def get_random_state() -> Dict[str, Any]: ...
+def set_random_state(random_states: Dict[str, Any]) -> None: ...
 def save_random_state(directory: str) -> None: ...
 def load_random_state(directory: str) -> None: ...
 def mellow_max(values: Array, omega: Union[Tensor, float] = ...) -> Array: ...
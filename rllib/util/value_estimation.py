@@ -10,9 +10,10 @@ from rllib.dataset.utilities import stack_list_of_tuples
 from rllib.util.neural_networks.utilities import (
     broadcast_to_tensor,
     repeat_along_dimension,
+    reverse_scan,
 )
 from rllib.util.rollout import rollout_model
-from rllib.util.utilities import RewardTransformer, get_backend
+from rllib.util.utilities import RewardTransformer
 
 MBValueReturn = namedtuple("MBValueReturn", ["value_estimate", "trajectory"])
 
@@ -34,20 +35,29 @@ def reward_to_go(
     return discounted_sum_rewards
 
 
-def discount_cumsum(rewards, gamma=1.0, reward_transformer=RewardTransformer()):
+def discount_cumsum(
+    rewards, gamma=1.0, reward_transformer=RewardTransformer(), done=None
+):
     r"""Get discounted cumulative sum of an array.
 
     Given a vector [r0, r1, r2], the discounted cum sum is another vector:
     .. math:: [r0 + gamma r1 + gamma^2 r2, r1 + gamma r2, r2].
 
+    The time dimension is the second to last one. Tensors are summed with the
+    parallel scan of `reverse_scan', which is differentiable and keeps their dtype,
+    whereas numpy arrays with a constant discount are filtered with scipy.
 
     Parameters
     ----------
     rewards: Array.
-        Array of rewards
-    gamma: float, optional.
-        Discount factor.
+        Array of rewards, with dimensions [batch_shape x time x dim_reward].
+    gamma: float or Tensor, optional.
+        Discount factor. Tensors of per-step discounts are broadcast to the
+        rewards, the discount of step t multiplies the return of step t + 1.
     reward_transformer: RewardTransformer, optional.
+    done: Tensor, optional.
+        Termination flags of the steps, with dimensions [batch_shape x time]. The
+        sum is not propagated through the steps that are done.
 
     Returns
     -------
@@ -59,26 +69,24 @@ def discount_cumsum(rewards, gamma=1.0, reward_transformer=RewardTransformer()):
     From rllab.
     """
     rewards = reward_transformer(rewards)
-    bk = get_backend(rewards)
-    if bk is torch and not rewards.requires_grad:
-        rewards = rewards.numpy()
-    if type(rewards) is np.ndarray:
+    if type(rewards) is np.ndarray and done is None and np.ndim(gamma) == 0:
         returns = scipy.signal.lfilter(
             [1], [1, -gamma], rewards[..., ::-1, :], axis=-2
         )[..., ::-1, :]
-        returns = returns.copy()  # The copy is for future transforms to pytorch
-
-        if bk is torch:
-            return torch.tensor(returns, dtype=torch.get_default_dtype())
-        else:
-            return returns
-
-    val = torch.zeros_like(rewards)
-    r = 0
-    for i, reward in enumerate(reversed(rewards)):
-        r = reward + gamma * r
-        val[-1 - i] = r
-    return val
+        return returns.copy()  # The copy is for future transforms to pytorch
+
+    is_numpy = type(rewards) is np.ndarray
+    rewards = torch.as_tensor(rewards)
+    if not rewards.is_floating_point():
+        rewards = rewards.to(torch.get_default_dtype())
+    discount = broadcast_to_tensor(
+        torch.as_tensor(gamma, dtype=rewards.dtype), target_tensor=rewards
+    )
+    if done is not None:
+        not_done = 1.0 - torch.as_tensor(done, dtype=rewards.dtype)
+        discount = discount * broadcast_to_tensor(not_done, target_tensor=rewards)
+    returns = reverse_scan(rewards, discount, dim=-2)
+    return returns.numpy() if is_numpy else returns
 
 
 def discount_sum(rewards, gamma=1.0, reward_transformer=RewardTransformer()):
@@ -132,8 +140,8 @@ def n_step_return(
 ):
     """Calculate all n-step returns for the observation.
 
-    It expects an observation with shape batch x n-step x dim.
-    It returns a tensor with shape batch x n-step.
+    It expects an observation with shape batch_shape x n-step x dim.
+    It returns a tensor with shape batch_shape x n-step.
     """
     if observation.reward.ndim < 2:
         return observation.reward.unsqueeze(1)
@@ -143,9 +151,7 @@ def n_step_return(
     rewards = rewards + entropy_regularization * entropy
 
     discount = torch.pow(torch.tensor(gamma), torch.arange(n_steps))
-    if rewards.ndim > 2:
-        discount = discount.unsqueeze(0)
-    discount = broadcast_to_tensor(discount, target_tensor=rewards)
+    discount = discount.unsqueeze(-1).expand_as(rewards)
     not_done = broadcast_to_tensor(1.0 - observation.done, target_tensor=rewards)
     discounted_rewards = rewards * discount
     value = torch.cumsum(discounted_rewards, dim=-2)
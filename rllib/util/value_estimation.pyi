@@ -1,4 +1,4 @@
-from typing import NamedTuple, Optional
+from typing import NamedTuple, Optional, Union
 
 from torch import Tensor
 
@@ -20,7 +20,10 @@ def reward_to_go(
     terminal_reward: Optional[Tensor] = ...,
 ) -> Tensor: ...
 def discount_cumsum(
-    rewards: Array, gamma: float = ..., reward_transformer: RewardTransformer = ...
+    rewards: Array,
+    gamma: Union[float, Tensor] = ...,
+    reward_transformer: RewardTransformer = ...,
+    done: Optional[Tensor] = ...,
 ) -> Array: ...
 def discount_sum(
     rewards: Tensor, gamma: float = ..., reward_transformer: RewardTransformer = ...,
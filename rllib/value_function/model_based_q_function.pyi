@@ -27,6 +27,7 @@ class ModelBasedQFunction(AbstractQFunction):
         td_lambda: float = ...,
         reward_transformer: RewardTransformer = ...,
         entropy_regularization: float = ...,
+        checkpoint_steps: Optional[int] = ...,
         *args: Any,
         **kwargs: Any,
     ) -> None: ...
@@ -3,9 +3,35 @@
 import torch
 import torch.nn as nn
 
+from rllib.util.neural_networks.neural_networks import EnsembleFeedForwardNN
+from rllib.util.neural_networks.utilities import one_hot_encode
+
 from .nn_value_function import NNQFunction, NNValueFunction
 
 
+def _stack_members_hook(module, state_dict, prefix, *args):
+    """Convert the state dict of an ensemble of separate networks in place.
+
+    The parameters `{prefix}nn.{i}.nn.{name}' of the i-th network are stacked into
+    the parameter `{prefix}nn.{name}' of the EnsembleFeedForwardNN.
+    """
+    if not isinstance(module.nn, EnsembleFeedForwardNN):
+        return
+    member_prefixes = [f"{prefix}nn.{i}.nn." for i in range(module.num_heads)]
+    if not any(key.startswith(member_prefixes[0]) for key in state_dict):
+        return
+    member_state_dicts = [
+        {
+            key[len(member_prefix) :]: state_dict.pop(key)
+            for key in list(state_dict.keys())
+            if key.startswith(member_prefix)
+        }
+        for member_prefix in member_prefixes
+    ]
+    stacked = EnsembleFeedForwardNN.stack_state_dicts(member_state_dicts)
+    state_dict.update({f"{prefix}nn.{key}": value for key, value in stacked.items()})
+
+
 class NNEnsembleValueFunction(NNValueFunction):
     """Implementation of a Value Function implemented with a Neural Network.
 
@@ -21,20 +47,28 @@ class NNEnsembleValueFunction(NNValueFunction):
         when a new parameter is set, tau low-passes the new parameter with the old one.
     biased_head: bool, optional
         flag that indicates if head of NN has a bias term or not.
+    batched: bool, optional
+        flag that indicates if the heads are an EnsembleFeedForwardNN with stacked
+        weights, or a list of separate value functions. Only for flat inputs.
+        State dicts of the separate value functions can be loaded in the former.
 
     """
 
-    def __init__(self, num_heads=2, *args, **kwargs):
+    def __init__(self, num_heads=2, *args, batched=True, **kwargs):
         assert num_heads > 0
         self.num_heads = num_heads
 
         super().__init__(*args, **kwargs)
-        self.nn = nn.ModuleList(
-            [NNValueFunction(*args, **kwargs) for _ in range(num_heads)]
-        )
+        if batched and len(self.nn.kwargs["in_dim"]) == 1:
+            self.nn = EnsembleFeedForwardNN.from_feedforward(self.nn, num_heads)
+            self._register_load_state_dict_pre_hook(_stack_members_hook, True)
+        else:
+            self.nn = nn.ModuleList(
+                [NNValueFunction(*args, **kwargs) for _ in range(num_heads)]
+            )
 
     @classmethod
-    def from_value_function(cls, value_function, num_heads: int):
+    def from_value_function(cls, value_function, num_heads: int, batched=True):
         """Create ensemble form value_function."""
         out = cls(
             dim_state=value_function.dim_state,
@@ -42,18 +76,26 @@ class NNEnsembleValueFunction(NNValueFunction):
             num_states=value_function.num_states,
             tau=value_function.tau,
             input_transform=value_function.input_transform,
+            batched=batched,
         )
 
-        out.nn = nn.ModuleList(
-            [
-                value_function.__class__.from_other(value_function, copy=False)
-                for _ in range(num_heads)
-            ]
-        )
+        if isinstance(out.nn, EnsembleFeedForwardNN):
+            out.nn = EnsembleFeedForwardNN.from_feedforward(
+                value_function.nn, num_heads
+            )
+        else:
+            out.nn = nn.ModuleList(
+                [
+                    value_function.__class__.from_other(value_function, copy=False)
+                    for _ in range(num_heads)
+                ]
+            )
         return out
 
     def forward(self, state, action=torch.tensor(float("nan"))):
         """Get value of the value-function at a given state."""
+        if isinstance(self.nn, EnsembleFeedForwardNN):
+            return super().forward(state, action)
         return torch.stack(
             [value_function(state, action) for value_function in self.nn], dim=-1
         )
@@ -61,6 +103,10 @@ class NNEnsembleValueFunction(NNValueFunction):
     @torch.jit.export
     def embeddings(self, state):
         """Get embeddings of the value-function at a given state."""
+        if isinstance(self.nn, EnsembleFeedForwardNN):
+            if self.discrete_state:
+                state = one_hot_encode(state, self.num_states)
+            return self.nn.last_layer_embeddings(state)
         return torch.stack(
             [value_function.embeddings(state) for value_function in self.nn], dim=-1
         )
@@ -90,19 +136,27 @@ class NNEnsembleQFunction(NNQFunction):
         when a new parameter is set, tau low-passes the new parameter with the old one.
     biased_head: bool, optional
         flag that indicates if head of NN has a bias term or not.
+    batched: bool, optional
+        flag that indicates if the heads are an EnsembleFeedForwardNN with stacked
+        weights, or a list of separate q-functions. Only for flat inputs.
+        State dicts of the separate q-functions can be loaded in the former.
     """
 
-    def __init__(self, num_heads=2, *args, **kwargs):
+    def __init__(self, num_heads=2, *args, batched=True, **kwargs):
         self.num_heads = num_heads
         assert num_heads > 0
         super().__init__(*args, **kwargs)
 
-        self.nn = nn.ModuleList(
-            [NNQFunction(*args, **kwargs) for _ in range(self.num_heads)]
-        )
+        if batched and len(self.nn.kwargs["in_dim"]) == 1:
+            self.nn = EnsembleFeedForwardNN.from_feedforward(self.nn, num_heads)
+            self._register_load_state_dict_pre_hook(_stack_members_hook, True)
+        else:
+            self.nn = nn.ModuleList(
+                [NNQFunction(*args, **kwargs) for _ in range(self.num_heads)]
+            )
 
     @classmethod
-    def from_q_function(cls, q_function, num_heads: int):
+    def from_q_function(cls, q_function, num_heads: int, batched=True):
         """Create ensemble form q-funciton."""
         out = cls(
             dim_state=q_function.dim_state,
@@ -112,21 +166,33 @@ class NNEnsembleQFunction(NNQFunction):
             num_actions=q_function.num_actions,
             tau=q_function.tau,
             input_transform=q_function.input_transform,
+            batched=batched,
         )
 
-        out.nn = nn.ModuleList(
-            [
-                q_function.__class__.from_other(q_function, copy=False)
-                for _ in range(num_heads)
-            ]
-        )
+        if isinstance(out.nn, EnsembleFeedForwardNN):
+            out.nn = EnsembleFeedForwardNN.from_feedforward(q_function.nn, num_heads)
+        else:
+            out.nn = nn.ModuleList(
+                [
+                    q_function.__class__.from_other(q_function, copy=False)
+                    for _ in range(num_heads)
+                ]
+            )
         return out
 
     def forward(self, state, action=torch.tensor(float("nan"))):
         """Get value of the q-function at a given state-action pair."""
-        return torch.stack(
-            [q_function(state, action) for q_function in self.nn], dim=-1
-        )
+        if not isinstance(self.nn, EnsembleFeedForwardNN):
+            return torch.stack(
+                [q_function(state, action) for q_function in self.nn], dim=-1
+            )
+        if not self.discrete_action or torch.isnan(action).all():
+            return super().forward(state, action)
+
+        action_value = super().forward(state)  # ... x actions x dim_reward x heads
+        index = action.long().reshape(action.shape + (1, 1, 1))
+        index = index.expand(action.shape + (1,) + action_value.shape[-2:])
+        return action_value.gather(-3, index).squeeze(-3)
 
     @classmethod
     def default(cls, environment, *args, **kwargs):
@@ -1,26 +1,36 @@
-from typing import Any, Type, TypeVar
+from typing import Any, Type, TypeVar, Union
 
 import torch.nn
 from torch import Tensor
 
+from rllib.util.neural_networks.neural_networks import EnsembleFeedForwardNN
 from rllib.value_function import AbstractQFunction, NNQFunction, NNValueFunction
 
 T = TypeVar("T", bound="AbstractQFunction")
 
 class NNEnsembleValueFunction(NNValueFunction):
-    nn: torch.nn.ModuleList
+    nn: Union[EnsembleFeedForwardNN, torch.nn.ModuleList]
     num_heads: int
-    def __init__(self, num_heads: int, *args: Any, **kwargs: Any) -> None: ...
+    def __init__(
+        self, num_heads: int, *args: Any, batched: bool = ..., **kwargs: Any
+    ) -> None: ...
     @classmethod
     def from_value_function(
-        cls: Type[T], value_function: NNValueFunction, num_heads: int
+        cls: Type[T],
+        value_function: NNValueFunction,
+        num_heads: int,
+        batched: bool = ...,
     ) -> T: ...
     def forward(self, *args: Tensor, **kwargs: Any) -> Tensor: ...
 
 class NNEnsembleQFunction(NNQFunction):
-    nn: torch.nn.ModuleList
+    nn: Union[EnsembleFeedForwardNN, torch.nn.ModuleList]
     num_heads: int
-    def __init__(self, num_heads: int, *args: Any, **kwargs: Any) -> None: ...
+    def __init__(
+        self, num_heads: int, *args: Any, batched: bool = ..., **kwargs: Any
+    ) -> None: ...
     @classmethod
-    def from_q_function(cls: Type[T], q_function: NNQFunction, num_heads: int) -> T: ...
+    def from_q_function(
+        cls: Type[T], q_function: NNQFunction, num_heads: int, batched: bool = ...
+    ) -> T: ...
     def forward(self, *args: Tensor, **kwargs: Any) -> Tensor: ...
@@ -145,6 +145,23 @@ class TestNNEnsembleValueFunction(object):
         )
         assert value.dtype is torch.get_default_dtype()
 
+    def test_load_members(self, discrete_state, dim_state, num_heads, batch_size):
+        self.init(discrete_state, dim_state, num_heads)
+        members = NNEnsembleValueFunction(
+            dim_state=self.dim_state,
+            num_states=self.num_states,
+            num_heads=num_heads,
+            layers=[32, 32],
+            batched=False,
+        )
+        self.value_function.load_state_dict(members.state_dict())
+        state = random_tensor(discrete_state, dim_state, batch_size)
+
+        torch.testing.assert_close(self.value_function(state), members(state))
+        torch.testing.assert_close(
+            self.value_function.embeddings(state), members.embeddings(state)
+        )
+
     def test_from_value_function(self, discrete_state, dim_state, num_heads):
         num_states, dim_state = (
             (dim_state, ()) if discrete_state else (-1, (dim_state,))
@@ -157,6 +174,11 @@ class TestNNEnsembleValueFunction(object):
         assert value_function is not other
         assert other.num_heads == num_heads
 
+    def test_positional_arguments(self, num_heads):
+        value_function = NNEnsembleValueFunction(num_heads, [16], dim_state=(4,))
+        assert value_function.num_heads == num_heads
+        assert value_function.nn.kwargs["layers"] == [16]
+
 
 class TestNNEnsembleQFunction(object):
     def init(
@@ -310,6 +332,37 @@ class TestNNEnsembleQFunction(object):
                     else [self.num_actions, dim_reward, num_heads]
                 )
 
+    def test_load_members(
+        self,
+        discrete_state,
+        discrete_action,
+        dim_state,
+        dim_action,
+        num_heads,
+        batch_size,
+    ):
+        if discrete_state and not discrete_action:
+            return
+        self.init(discrete_state, discrete_action, dim_state, dim_action, num_heads)
+        members = NNEnsembleQFunction(
+            dim_state=self.dim_state,
+            dim_action=self.dim_action,
+            num_states=self.num_states,
+            num_actions=self.num_actions,
+            num_heads=num_heads,
+            layers=[32, 32],
+            batched=False,
+        )
+        self.q_function.load_state_dict(members.state_dict())
+        state = random_tensor(discrete_state, dim_state, batch_size)
+        action = random_tensor(discrete_action, dim_action, batch_size)
+
+        torch.testing.assert_close(
+            self.q_function(state, action), members(state, action)
+        )
+        if discrete_action:
+            torch.testing.assert_close(self.q_function(state), members(state))
+
     def test_from_q_function(
         self, discrete_state, discrete_action, dim_state, dim_action, num_heads
     ):
@@ -332,3 +385,10 @@ class TestNNEnsembleQFunction(object):
 
             assert q_function is not other
             assert other.num_heads == num_heads
+
+    def test_positional_arguments(self, num_heads):
+        q_function = NNEnsembleQFunction(
+            num_heads, [16], dim_state=(4,), dim_action=(2,)
+        )
+        assert q_function.num_heads == num_heads
+        assert q_function.nn.kwargs["layers"] == [16]